@@ -987,6 +987,9 @@ try again when it is running.
         for the same named connection will not open multiple
         connections. If the name doesn't exist in self.dbConnectionDefs,
         then an exception is raised.
+
+        Work done in other threads should use the connection's
+        getThreadConnection() or its Pool, rather than share this one.
         """
         if not connName in self.dbConnections:
             if connName in self.dbConnectionDefs:
@@ -56,14 +56,14 @@ class RemoteBizobj(dBizobj):
         cls._createCacheDir(pth)
         pth = os.path.join(cls.cacheDir, hashval)
         if os.path.exists(pth):
-            with open(pth) as ff:
+            with open(pth, "rb") as ff:
                 kf, crsData = pickle.load(ff)
             biz.KeyField = kf
             # This is a dict with cursor keys as the keys, and
-            # values as a (dataset, typedef) tuple.
-            for kk, (ds, typinfo) in list(crsData.items()):
+            # cursor snapshots as the values.
+            for kk, snapshot in list(crsData.items()):
                 tmpCursor = biz.createCursor(key=kk)
-                tmpCursor._storeData(ds, typinfo)
+                tmpCursor.restoreSnapshot(snapshot)
         return biz
 
     def setConnectionParams(
@@ -102,10 +102,12 @@ class RemoteBizobj(dBizobj):
         pd = {}
         cursorDict = self._cursorDictReference()
         for kk, cursor in list(cursorDict.items()):
-            pd[kk] = (cursor.getDataSet(returnInternals=True), cursor.getDataTypes())
+            pd[kk] = cursor.takeSnapshot()
         dataToStore = (self.KeyField, pd)
-        with open(pth) as ff:
+        with open(pth, "wb") as ff:
             pickle.dump(dataToStore, ff)
+        for snapshot in pd.values():
+            snapshot.release()
 
     def storeRemoteSQL(self, sql):
         """The web backend uses '~~' as the name enclosure character. Convert that
@@ -23,6 +23,7 @@ So, dabo.biz sits in between dabo.db and dabo.ui
 
 from .bizobj import dBizobj
 from .RemoteBizobj import RemoteBizobj
+from .requery_task import dRequeryTask
 
 # from .dAutoBizobj import dAutoBizobj
 # from .dAutoBizobj import autoCreateTables
@@ -13,6 +13,7 @@ from ..db.cursor_mixin import dCursorMixin
 from ..lib.RemoteConnector import RemoteConnector
 from ..lib.utils import ustr
 from ..localization import _
+from .requery_task import dRequeryTask
 
 dabo_module = settings.get_dabo_package()
 
@@ -33,7 +34,10 @@ class dBizobj(dObject):
     def __init__(self, conn=None, properties=None, *args, **kwargs):
         """User code should override beforeInit() and/or afterInit() instead."""
         self.__att_try_setFieldVal = False
-        self._visitedKeys = set()
+        # Cursors that may hold changes, either in their own records or in the
+        # child records that depend on them. Kept up to date by the cursors
+        # themselves, and pruned whenever a cursor is found to have no changes.
+        self._changedCursors = set()
         self._cascadeDeleteFromParent = True
         # Collection of cursor objects. MUST be defined first.
         self.__cursors = {}
@@ -91,6 +95,8 @@ class dBizobj(dObject):
         self._parent = None
         self._autoPopulatePK = True
         self._autoQuoteNames = True
+        self._columnarStorage = False
+        self._fetchSize = 0
         self._keyField = ""
         self._requeryChildOnSave = False
         self._newRecordOnNewParent = False
@@ -99,6 +105,12 @@ class dBizobj(dObject):
         self.exitScan = False
         self.dbapiCursorClass = None
         self._childCacheInterval = None
+        # The pending requeryAsync(), if any
+        self._requeryTask = None
+        self._prefetchSize = 0
+        self._serverFilterThreshold = None
+        # WHERE expressions added by filter() calls that were sent to the database
+        self._serverFilters = []
 
         ##########################################
         ### referential integrity stuff ####
@@ -182,6 +194,7 @@ class dBizobj(dObject):
             ):
                 cursors[key] = cursor
         self.__cursors = cursors
+        self._changedCursors.intersection_update(cursors.values())
         if flush_current:
             self.__currentCursorKey = None
         for child in self._children:
@@ -463,8 +476,6 @@ class dBizobj(dObject):
         """
         Save changes to all rows in the bizobj, and (by default) the children.
         """
-        # JKA: I can't see any sense in using 'scanChangedRows()' here, since
-        # we must check for changes in 'save()' method too.
         rp = self._RemoteProxy
         if rp:
             return rp.saveAll(startTransaction=startTransaction)
@@ -478,29 +489,25 @@ class dBizobj(dObject):
 
         startTransaction = startTransaction and self.beginTransaction()
 
-        # First save the rows we know we've visited:
-        try:
-            self.scanKeys(
-                self.save,
-                self._visitedKeys,
-                startTransaction=False,
-                saveTheChildren=saveTheChildren,
-                scanRequeryChildren=False,
-            )
-        except (exceptions.DBQueryException, exceptions.dException):
-            if startTransaction:
-                self.rollbackTransaction()
-            raise
+        if self._canSaveAllBatched(saveTheChildren):
+            # The changed rows of each bizobj in the tree can be sent to the database together.
+            try:
+                self._saveCursorsBatched([self._CurrentCursorKey], saveAllHooks=False)
+            except (exceptions.DBQueryException, exceptions.dException):
+                if startTransaction:
+                    self.rollbackTransaction()
+                raise
+            self.commitTransaction()
+            self.afterSaveAll()
+            return
 
-        # Finally, scan all rows only if there are still potentially unsaved rows.
-        # The isAnyChanged() call will be expensive if there are changes buried
-        # in some out-of-context child cursor, but that should be rare. In the
-        # common case, all the changes would have already been made in the above
-        # block, and isAnyChanged() will return False very quickly in that case.
-        if self.isAnyChanged():
+        # Only visit the rows that have changes, in themselves or in their children.
+        rows = self.getChangedRows(includeNewUnchanged=self.SaveNewUnchanged)
+        if rows:
             try:
-                self.scan(
+                self.scanRows(
                     self.save,
+                    rows,
                     startTransaction=False,
                     saveTheChildren=saveTheChildren,
                     scanRequeryChildren=False,
@@ -511,10 +518,120 @@ class dBizobj(dObject):
                 raise
 
         self.commitTransaction()
-        self._visitedKeys.clear()
-        self._addVisitedKey()
         self.afterSaveAll()
 
+    def _canSaveAllBatched(self, saveTheChildren=True):
+        """
+        The batched saveAll() can't be used when a bizobj in the tree has its own
+        save() or saveAll() method, or when the children have to be requeried after
+        each parent record is saved.
+        """
+        if type(self).save is not dBizobj.save:
+            return False
+        if not self._children:
+            return True
+        if not saveTheChildren or self.RequeryChildOnSave:
+            return False
+        for child in self._children:
+            if type(child).saveAll is not dBizobj.saveAll or child._RemoteProxy:
+                return False
+            if not child._canSaveAllBatched():
+                return False
+        return True
+
+    def _saveCursorsBatched(self, keys, saveAllHooks=True):
+        """
+        Used by saveAll() to save the cursors with the passed keys, and below them the
+        rest of the bizobj tree. The same business rules and hook methods are run for
+        each changed row as in save(), but the rows of all of the cursors are saved
+        at once, grouping the ones that need the same statement. Once the new records
+        have their keys and the child records their foreign keys, each child does the
+        same for all of its cursors that belong to these rows.
+
+        If saveAllHooks is True, beforeSaveAll() and afterSaveAll() are called for each
+        cursor, as they would be by the saveAll() of a child bizobj.
+        """
+        cursors = self.__cursors
+        keys = [key for key in keys if key in cursors and cursors[key].RowCount]
+        if not keys:
+            return
+        if self.KeyField is None:
+            raise exceptions.MissingPKException(
+                _("No key field defined for table: %s") % self.DataSource
+            )
+        withNewUnchanged = self.SaveNewUnchanged
+        children = self._children
+        changedChildKeys = [
+            (child, child._getChangedCursorKeys(child.SaveNewUnchanged)) for child in children
+        ]
+        currentStatus = self.__getCurrentStatus()
+        try:
+            plan = []
+            for key in keys:
+                self._CurrentCursor = key
+                cursor = self._CurrentCursor
+                ownRows = set(cursor.getChangedRows(includeNewUnchanged=withNewUnchanged))
+                rows = set(ownRows)
+                for child, childKeys in changedChildKeys:
+                    if childKeys:
+                        rows.update(child._getParentRowsForKeys(cursor, childKeys))
+                if saveAllHooks:
+                    errMsg = self.beforeSaveAll()
+                    if errMsg:
+                        raise exceptions.BusinessRuleViolation(errMsg)
+                saveRows = []
+                links = {}
+                for row in sorted(rows):
+                    self._moveToRowNum(row, updateChildren=None)
+                    errMsg = self.beforeSave()
+                    if errMsg:
+                        raise exceptions.BusinessRuleViolation(errMsg)
+                    isAdding = self.IsAdding
+                    if isAdding or row in ownRows:
+                        self._validate()
+                        saveRows.append(row)
+                    if isAdding:
+                        # The children's cursors are keyed by the temporary link value
+                        # until the record is saved.
+                        links[row] = [child.getParentLinkValue() for child in children]
+                plan.append((key, cursor, sorted(rows), saveRows, links))
+
+            # New parent records have to be inserted before their children.
+            plan[0][1].saveRows([(cursor, saveRows) for key, cursor, rows, saveRows, links in plan])
+
+            childKeys = [(child, []) for child in children]
+            for key, cursor, rows, saveRows, links in plan:
+                self._CurrentCursor = key
+                for row in rows:
+                    self._moveToRowNum(row, updateChildren=None)
+                    if row in links:
+                        for child, link in zip(children, links[row]):
+                            child._CurrentCursor = link
+                        # Call the hook method for saving new records; this also passes
+                        # the new PK on to the children.
+                        self._onSaveNew()
+                    for child, linkKeys in childKeys:
+                        link = child.getParentLinkValue()
+                        if link not in linkKeys:
+                            linkKeys.append(link)
+            for child, linkKeys in childKeys:
+                changed = child._getChangedCursorKeys(child.SaveNewUnchanged)
+                child._saveCursorsBatched([link for link in linkKeys if link in changed])
+
+            for key, cursor, rows, saveRows, links in plan:
+                self._CurrentCursor = key
+                for row in rows:
+                    self._moveToRowNum(row, updateChildren=None)
+                    self.afterChange()
+                    self.afterSave()
+                if saveAllHooks:
+                    self.afterSaveAll()
+        finally:
+            if self.ScanRestorePosition:
+                self.__setCurrentStatus(currentStatus)
+            else:
+                self._resetChildrenParent(False)
+
     def save(self, startTransaction=True, saveTheChildren=True):
         """
         Save any changes that have been made in the current row.
@@ -593,30 +710,14 @@ class dBizobj(dObject):
         Cancel all changes made in all rows, including by default all children
         and all new, unmodified records.
         """
-        # First cancel the rows we know we've visited:
-        self.scanKeys(
+        self.scanChangedRows(
             self.cancel,
-            self._visitedKeys,
+            allCursors=False,
+            includeNewUnchanged=True,
             cancelTheChildren=cancelTheChildren,
             ignoreNoRecords=ignoreNoRecords,
-            scanRequeryChildren=False,
+            reverse=True,
         )
-        # Finally, scan all rows only if there are still potentially changed rows.
-        # The isAnyChanged() call will be expensive if there are changes buried
-        # in some out-of-context child cursor, but that should be rare. In the
-        # common case, all the cancellations would have already happened in the
-        # above block, and isAnyChanged() will return False very quickly.
-        if self.isAnyChanged(includeNewUnchanged=True):
-            self.scanChangedRows(
-                self.cancel,
-                allCursors=False,
-                includeNewUnchanged=True,
-                cancelTheChildren=cancelTheChildren,
-                ignoreNoRecords=ignoreNoRecords,
-                reverse=True,
-            )
-        self._visitedKeys.clear()
-        self._addVisitedKey()
 
     def cancel(self, ignoreNoRecords=None, cancelTheChildren=True):
         """
@@ -797,19 +898,15 @@ class dBizobj(dObject):
         if not self.RowCount:
             # If there are no records, there can be no changes
             return []
-        if self._children:
-            rows = []
-
-            def _isRowChanged():
-                if self.isChanged(includeNewUnchanged):
-                    rows.append(self.RowNumber)
-
-            # Must iterate all records to find potential changes in children:
-            self.scan(_isRowChanged, scanRequeryChildren=False)
-            return rows
-        else:
-            # Can use the much faster cursor.getChangedRows():
-            return self._CurrentCursor.getChangedRows(includeNewUnchanged)
+        cursor = self._CurrentCursor
+        if cursor not in self._changedCursors:
+            return []
+        rows = set(cursor.getChangedRows(includeNewUnchanged))
+        for child in self.getChildren():
+            keys = child._getChangedCursorKeys(includeNewUnchanged)
+            if keys:
+                rows.update(child._getParentRowsForKeys(cursor, keys))
+        return sorted(rows)
 
     def _listChangedRows(self, includeNewUnchanged=False):
         """
@@ -889,6 +986,70 @@ class dBizobj(dObject):
             flushUnchangedCursors=flushUnchangedCursors,
         )
 
+    def getColumns(self, flds=(), rows=None, virtualFields=False):
+        """
+        Returns a dict mapping each of the passed field names (default: all of the
+        fields) to a list with its value in each of the passed row numbers (default:
+        all of the rows). Unlike bizDataIterator() or scan(), this reads the values
+        straight from the cursor, without moving the record pointer or updating the
+        child bizobjs. Virtual fields are included if they are named in 'flds', or if
+        virtualFields is True.
+        """
+        cc = self._CurrentCursor
+        if cc is None:
+            return {}
+        oldRow = self.RowNumber
+        try:
+            return cc.getColumns(
+                flds, rows, virtualFields, _rowChangeCallback=self._changeRowNumCallback
+            )
+        finally:
+            # Virtual fields that need the child records move the record pointer.
+            if oldRow != self.RowNumber:
+                self._moveToRowNum(oldRow)
+
+    def clearVirtualFieldCache(self, flds=None):
+        """
+        Discards the cached values of the passed virtual fields (default: all of them)
+        in all of this bizobj's cursors. See dCursorMixin.clearVirtualFieldCache().
+        """
+        for cursor in list(self.__cursors.values()):
+            cursor.clearVirtualFieldCache(flds)
+
+    def iterRows(self, flds=(), rows=None, virtualFields=False):
+        """
+        Returns an iterator over a dict of the field values for each of the passed
+        row numbers (default: all of the rows). Like getColumns(), this doesn't move
+        the record pointer.
+        """
+        cols = self.getColumns(flds, rows, virtualFields)
+        names = list(cols)
+        return (dict(zip(names, vals)) for vals in zip(*cols.values()))
+
+    def apply(self, func, rows=None, flds=()):
+        """
+        Call func with a dict of the field values (see iterRows()) for each of the
+        passed rows (default: all of the rows). If it returns a dict of field names
+        and new values, those are set in that row just as setFieldVal() would, so the
+        changes can be saved or canceled as usual. The record pointer isn't moved.
+        Returns the list of the rows that were changed.
+        """
+        if rows is None:
+            rows = range(self.RowCount)
+        rows = list(rows)
+        changedRows = []
+        for row, rec in zip(rows, self.iterRows(flds, rows)):
+            newVals = func(rec)
+            if not newVals:
+                continue
+            changed = False
+            for fld, val in newVals.items():
+                if self.setFieldVal(fld, val, row=row):
+                    changed = True
+            if changed:
+                changedRows.append(row)
+        return changedRows
+
     def scan(self, func, *args, **kwargs):
         """
         Iterate over all records and apply the passed function to each.
@@ -1018,7 +1179,9 @@ class dBizobj(dObject):
         try:
             for key in cursors:
                 self._CurrentCursor = key
-                ret = self.scan(_callFunc, reverse=reverse, scanRequeryChildren=False)
+                rows = self.getChangedRows(includeNewUnchanged)
+                if rows:
+                    ret = self.scanRows(_callFunc, rows, reverse=reverse, scanRequeryChildren=False)
         except Exception as e:
             if self._logScanException(e):
                 nm = self.Name
@@ -1203,31 +1366,14 @@ class dBizobj(dObject):
         rp = self._RemoteProxy
         if rp:
             return rp.requery()
-        errMsg = self.beforeRequery()
-        if errMsg:
-            raise exceptions.BusinessRuleViolation(errMsg)
-        if self.KeyField is None:
-            errMsg = _("No Primary Key defined in the Bizobj for %s") % self.DataSource
-            raise exceptions.MissingPKException(errMsg)
-
-        # If this is a dependent (child) bizobj, this will enforce the relation
-        _childParamTuple = self.setChildLinkFilter()
-        # Hook method for creating the param tuple. Note that the child filter
-        # clause, if any, will always be the first clause in the WHERE expression.
-        params = _childParamTuple + self.getParams()
+        # A pending asynchronous requery has been superseded.
+        self.cancelRequery()
+        params = self._prepareRequery()
         uiException = None
 
-        # Since the FK value can't be None, we don't need to run non matching
-        # parameters requery in such situation.
-        if not (
-            self.Parent and self.LinkField and _childParamTuple and max(_childParamTuple) is None
-        ):
+        if params is not None:
             # Record this in case we need to restore the record position
-            try:
-                currPK = self.getPK()
-            except exceptions.NoRecordsException:
-                currPK = None
-            oldDataStructure = hash(self.DataStructure)
+            requeryState = self._getRequeryState()
             # run the requery
             cursor = self._CurrentCursor
             try:
@@ -1241,21 +1387,122 @@ class dBizobj(dObject):
                 uiException = exceptions.NoRecordsException
             except exceptions.dException:
                 raise
-            self._visitedKeys.clear()
-            if self.RestorePositionOnRequery:
-                self._positionUsingPK(currPK, updateChildren=False)
-            if hash(self.DataStructure) != oldDataStructure:
-                self._clearCursorRecord()
+            self._restoreRequeryState(*requeryState)
 
         try:
             self.requeryAllChildren()
         except exceptions.NoRecordsException:
             pass
         self.afterRequery()
-        self._addVisitedKey()
         if uiException:
             raise uiException
 
+    def requeryAsync(self, callback=None, convertQMarks=False):
+        """
+        Start a requery that runs in the background, and return its dRequeryTask.
+
+        The query runs on a connection from the Pool of the bizobj's connection,
+        so the calling thread isn't blocked, and none of its transactions are
+        involved. beforeRequery() is called right away. Once the rows have been
+        fetched, they are made the cursor's data on the calling thread, the
+        children are requeried with requeryAllChildrenAsync(), and afterRequery()
+        is called, followed by the callback, if any, which receives the task.
+
+        Any requery that is still pending for this bizobj or its children is
+        canceled, so that only the result of the latest one is used.
+        """
+        if self._RemoteProxy:
+            raise exceptions.FeatureNotSupportedException(
+                _("Remote bizobjs can't be requeried asynchronously")
+            )
+        self.cancelRequery()
+        params = self._prepareRequery()
+        cursor = self._CurrentCursor
+        sql = cursor.CurrentSQL
+
+        def fetch(task):
+            with self._connection.Pool.connection() as conn:
+                task._setBackend(conn.getBackendObject())
+                try:
+                    return cursor._fetchRequeryData(conn, sql, params, convertQMarks)
+                finally:
+                    task._setBackend(None)
+
+        def apply(data):
+            if self._requeryTask is task:
+                self._requeryTask = None
+            if data is not None:
+                if cursor is self._CurrentCursor:
+                    requeryState = self._getRequeryState()
+                    cursor._applyRequeryData(data)
+                    self._restoreRequeryState(*requeryState)
+                else:
+                    # The parent has moved on; keep the rows for when it comes back.
+                    cursor._applyRequeryData(data)
+            self.requeryAllChildrenAsync()
+            self.afterRequery()
+
+        task = self._requeryTask = dRequeryTask(fetch, apply, callback)
+        if params is None:
+            task.finishNow()
+        else:
+            task.start()
+        return task
+
+    def cancelRequery(self, recurse=True):
+        """
+        Cancel the requeryAsync() that is pending for this bizobj and, if recurse
+        is True, those of its children.
+        """
+        task = self._requeryTask
+        self._requeryTask = None
+        if task is not None:
+            task.cancel()
+        if recurse:
+            for child in self._children:
+                child.cancelRequery()
+
+    def _prepareRequery(self):
+        """
+        Run the checks and hooks that come before a requery, and return the params
+        for the query, or None if there is no need to run it.
+        """
+        errMsg = self.beforeRequery()
+        if errMsg:
+            raise exceptions.BusinessRuleViolation(errMsg)
+        if self.KeyField is None:
+            errMsg = _("No Primary Key defined in the Bizobj for %s") % self.DataSource
+            raise exceptions.MissingPKException(errMsg)
+
+        # If this is a dependent (child) bizobj, this will enforce the relation
+        _childParamTuple = self.setChildLinkFilter()
+        # Hook method for creating the param tuple. Note that the child filter
+        # clause, if any, will always be the first clause in the WHERE expression.
+        params = _childParamTuple + self.getParams()
+        # Records prefetched for the children may be out of date now.
+        for child in self._children:
+            child._clearPrefetched()
+
+        # Since the FK value can't be None, we don't need to run non matching
+        # parameters requery in such situation.
+        if self.Parent and self.LinkField and _childParamTuple and max(_childParamTuple) is None:
+            return None
+        return params
+
+    def _getRequeryState(self):
+        """Returns what _restoreRequeryState() needs to reposition after a requery."""
+        try:
+            currPK = self.getPK()
+        except exceptions.NoRecordsException:
+            currPK = None
+        return currPK, hash(self.DataStructure)
+
+    def _restoreRequeryState(self, currPK, oldDataStructure):
+        if self.RestorePositionOnRequery:
+            self._positionUsingPK(currPK, updateChildren=False)
+        if hash(self.DataStructure) != oldDataStructure:
+            self._clearCursorRecord()
+
     def _clearCursorRecord(self):
         ## The Record object must be reinstantiated to reflect the new structure:
         try:
@@ -1282,19 +1529,139 @@ class dBizobj(dObject):
                 ret = tuple((None,)) * len(links)
             else:
                 ret = self.getParentLinkValue()
-            linkFields = tuple()
-            for linkField in links:
-                linkFieldParts = linkField.split(".")
-                if len(linkFieldParts) < 2:
-                    linkFields += (linkFieldParts[0],)
-                else:
-                    # The source table was specified in the LinkField
-                    linkFields += (linkFieldParts[1],)
-            self._CurrentCursor.setChildFilter(linkFields)
+            self._CurrentCursor.setChildFilter(self._getLinkFields())
             if not isinstance(ret, tuple):
                 ret = (ret,)
         return ret
 
+    def _getLinkFields(self):
+        """Returns a tuple of the field names in LinkField, without any table names."""
+        linkFields = tuple()
+        for linkField in self.LinkField.replace(" ", "").split(","):
+            linkFieldParts = linkField.split(".")
+            if len(linkFieldParts) < 2:
+                linkFields += (linkFieldParts[0],)
+            else:
+                # The source table was specified in the LinkField
+                linkFields += (linkFieldParts[1],)
+        return linkFields
+
+    def prefetch(self, parentRows=None):
+        """
+        Load the records of this child bizobj for several parent rows with a single
+        query, instead of one query per parent row, and store them in the cursors
+        that setCurrentParent() will use for those rows. The first time the parent
+        moves to one of those rows, the prefetched records are used instead of a
+        requery.
+
+        parentRows is a sequence of row numbers of the parent; by default it is the
+        PrefetchSize rows starting at the parent's current row (or ending there,
+        when the parent scans in reverse). Rows whose cursor has unsaved changes,
+        or has already been prefetched, are skipped. Returns the number of parent
+        rows that were loaded.
+        """
+        parent = self.Parent
+        if not (parent and self.LinkField and self.DataSource) or self.UserSQL:
+            # Without the SQL Builder, the child filter can't be changed.
+            return 0
+        if parentRows is None:
+            size = max(self.PrefetchSize, 1)
+            row = parent.RowNumber
+            if parent.ScanReverse:
+                parentRows = range(max(row - size + 1, 0), row + 1)
+            else:
+                parentRows = range(row, min(row + size, parent.RowCount))
+        keys = []
+        for row in parentRows:
+            key = self._getParentLinkValueForRow(row)
+            if key is None or key in keys:
+                continue
+            crs = self.__cursors.get(key)
+            if crs is not None and (crs._prefetched or crs.isChanged()):
+                continue
+            keys.append(key)
+        if not keys:
+            return 0
+
+        errMsg = self.beforeRequery()
+        if errMsg:
+            raise exceptions.BusinessRuleViolation(errMsg)
+        linkFields = self._getLinkFields()
+        params = tuple()
+        for key in keys:
+            params += key if isinstance(key, tuple) else (key,)
+        cursor = self._CurrentCursor
+        cursor.setChildFilter(linkFields, keyCount=len(keys))
+        try:
+            data = cursor._fetchRequeryData(
+                self._connection, cursor.CurrentSQL, params + self.getParams()
+            )
+        finally:
+            # Put back the filter for a single parent
+            self.setChildLinkFilter()
+        sql, params, description, rows = data
+        keyRows = dict((key, []) for key in keys)
+        for rec in rows:
+            if len(linkFields) == 1:
+                key = rec[linkFields[0]]
+            else:
+                key = tuple(rec[fld] for fld in linkFields)
+            try:
+                keyRows[key].append(rec)
+            except KeyError:
+                # Can happen when the types of the key fields differ
+                pass
+        for key, recs in keyRows.items():
+            crs = self.__cursors.get(key)
+            if crs is None:
+                crs = self.createCursor(key)
+            crs._applyRequeryData((sql, params, description, recs))
+            crs._prefetched = True
+        self.afterRequery()
+        return len(keys)
+
+    def _getParentLinkValueForRow(self, row):
+        """
+        Like getParentLinkValue(), but for the passed row of the parent. Returns None
+        for new parent records that can't have any child records yet.
+        """
+        parentCursor = self.Parent._CurrentCursor
+        fld = self.ParentLinkField
+        if not fld:
+            if constants.CURSOR_TMPKEY_FIELD in parentCursor._records[row]:
+                return None
+            return parentCursor.getPK(row)
+        vals = [parentCursor.getFieldVal(f, row) for f in fld.replace(" ", "").split(",")]
+        if len(vals) == 1:
+            return vals[0]
+        return tuple(vals)
+
+    def _clearPrefetched(self):
+        """Makes sure that previously prefetched records aren't used in place of a requery."""
+        for crs in self.__cursors.values():
+            crs._prefetched = False
+
+    def _usePrefetched(self, allowPrefetch=True):
+        """
+        Called when the parent moves to another record. Returns True if the current
+        cursor holds prefetched records, which then take the place of a requery.
+        """
+        crs = self._CurrentCursor
+        if (
+            allowPrefetch
+            and self.PrefetchSize
+            and crs is not None
+            and not crs._prefetched
+            and not self.isAnyChanged()
+        ):
+            self.prefetch()
+            crs = self._CurrentCursor
+        if crs is not None and crs._prefetched:
+            # They are only used once; after that, the usual rules apply.
+            crs._prefetched = False
+            return True
+        return False
+
     def getParentLinkValue(self):
         """
         Return the value of the parent record on which this bizobj is dependent. Usually this
@@ -1326,10 +1693,24 @@ class dBizobj(dObject):
         Called when the data is to be sorted on a particular column
         in a particular order. All the checking on the parameters is done
         in the cursor.
+
+        When ServerFilterThreshold applies, the data is requeried with an ORDER BY
+        for the column(s) instead; 'ordr' must then be ASC or DESC, and None is
+        taken as ASC.
         """
         cc = self._CurrentCursor
-        if cc is not None:
+        if cc is None:
+            return
+        orderBy = None
+        if self._useServerFilters():
+            orderBy = self._getServerOrderBy(col, ordr, caseSensitive)
+        if orderBy is None:
             cc.sort(col, ordr, caseSensitive)
+            return
+        self.setOrderByClause(orderBy)
+        # A previous local sort would otherwise be applied again to the new rows.
+        cc.sortColumn = cc.sortOrder = ""
+        self.requery()
 
     def setParams(self, params):
         """
@@ -1362,19 +1743,28 @@ class dBizobj(dObject):
             | startswith, beginswith: fld.startswith(expr)
             | endswith: fld.endswith(expr)
             | contains: expr in fld
+
+        When ServerFilterThreshold applies, comparison filters are added to the WHERE
+        clause and the data is requeried instead, so that only the matching rows are
+        fetched. Removing that filter requeries again. Note that the database decides
+        how text is compared, so it may be case-insensitive. The startswith, endswith
+        and contains filters are always applied locally, as LIKE ignores case in some
+        databases.
         """
         currPK = self.getPK()
-        if fld in self.VirtualFields:
-            self.scan(self.scanVirtualFields, fld=fld, expr=expr, op=op, reverse=True)
-            self._CurrentCursor.filterByExpression(
-                "%s IN (%s)"
-                % (
-                    self.KeyField,
-                    ", ".join(f"{key}" for key in self.__filterPKVirtual),
-                )
+        whereExp = None
+        if fld not in self.VirtualFields and self._useServerFilters():
+            whereExp = self._getServerFilterExp(fld, expr, op)
+        if whereExp is not None:
+            self.addWhere(whereExp)
+            self._serverFilters.append(whereExp)
+            self.requery()
+        elif fld in self.VirtualFields:
+            # Get all of the values at once, instead of moving to each row.
+            vals = self.getColumns((fld,))[fld]
+            self._CurrentCursor._filterRows(
+                [row for row, val in enumerate(vals) if self._virtualFieldMatches(val, expr, op)]
             )
-            # clear filter ids
-            self.__filterPKVirtual = []
         else:
             self._CurrentCursor.filter(fld=fld, expr=expr, op=op)
 
@@ -1406,31 +1796,28 @@ class dBizobj(dObject):
         self._CurrentCursor.filterByExpression(expr)
 
     def scanVirtualFields(self, fld, expr, op):
-        virtValue = self.getFieldVal(fld)
+        if self._virtualFieldMatches(self.getFieldVal(fld), expr, op):
+            self.__filterPKVirtual.append(self.getFieldVal(self.KeyField))
 
+    def _virtualFieldMatches(self, virtValue, expr, op):
+        """Returns True if the virtual field value passes the filter() condition."""
         if op.lower() in ("eq", "equals", "="):
-            if virtValue == expr:
-                self.__filterPKVirtual.append(self.getFieldVal(self.KeyField))
+            return virtValue == expr
 
         elif op.lower() in ("ne", "nequals", "!="):
-            if virtValue != expr:
-                self.__filterPKVirtual.append(self.getFieldVal(self.KeyField))
+            return virtValue != expr
 
         elif op.lower() in ("gt", ">", "greater than"):
-            if expr > virtValue:
-                self.__filterPKVirtual.append(self.getFieldVal(self.KeyField))
+            return expr > virtValue
 
         elif op.lower() in ("gte", ">=", "greater than/equal to"):
-            if expr >= virtValue:
-                self.__filterPKVirtual.append(self.getFieldVal(self.KeyField))
+            return expr >= virtValue
 
         elif op.lower() in ("lt", "<", "less than"):
-            if expr < virtValue:
-                self.__filterPKVirtual.append(self.getFieldVal(self.KeyField))
+            return expr < virtValue
 
         elif op.lower() in ("lte", "<=", "less than/equal to"):
-            if expr <= virtValue:
-                self.__filterPKVirtual.append(self.getFieldVal(self.KeyField))
+            return expr <= virtValue
 
         else:
             if isinstance(virtValue, str) and isinstance(expr, str):
@@ -1438,24 +1825,133 @@ class dBizobj(dObject):
                 exprLower = expr.lower()
 
             if op.lower() in ("starts with", "begins with"):
-                if virtLower.startswith(exprLower):
-                    self.__filterPKVirtual.append(self.getFieldVal(self.KeyField))
+                return virtLower.startswith(exprLower)
 
             elif op.lower() == "endswith":
-                if virtLower.endswith(exprLower):
-                    self.__filterPKVirtual.append(self.getFieldVal(self.KeyField))
+                return virtLower.endswith(exprLower)
 
             elif op.lower() == "contains":
-                if exprLower in virtLower:
-                    self.__filterPKVirtual.append(self.getFieldVal(self.KeyField))
+                return exprLower in virtLower
+        return False
 
     def removeFilter(self):
         """Remove the most recently applied filter."""
-        self._CurrentCursor.removeFilter()
+        cursor = self._CurrentCursor
+        if self._serverFilters and not self._hasLocalFilters():
+            # The latest filter is the one in the WHERE clause.
+            self._checkNoChangesForServerFilter()
+            self.removeWhere(self._serverFilters.pop())
+            self.requery()
+        else:
+            cursor.removeFilter()
 
     def removeFilters(self):
         """Remove all applied filters, going back to the original data set."""
+        hasServerFilters = bool(self._serverFilters)
+        if hasServerFilters:
+            # Check before removing anything, so that the filters are left alone if it fails.
+            self._checkNoChangesForServerFilter()
         self._CurrentCursor.removeFilters()
+        if hasServerFilters:
+            while self._serverFilters:
+                self.removeWhere(self._serverFilters.pop())
+            self.requery()
+
+    def _hasLocalFilters(self):
+        """Returns True if filters have been applied to the current cursor's records."""
+        return self._CurrentCursor._records._sourceDataSet is not None
+
+    def _checkNoChangesForServerFilter(self):
+        if self.isAnyChanged():
+            raise exceptions.dException(
+                _("Save or cancel the changes before removing a filter applied by the database.")
+            )
+
+    def _useServerFilters(self):
+        """
+        Returns True if filter() and sort() should be run by the database: see
+        ServerFilterThreshold. Filters that come after a local filter are applied
+        locally too, so that removeFilter() can remove them in reverse order.
+        """
+        threshold = self._serverFilterThreshold
+        cursor = self._CurrentCursor
+        if threshold is None or cursor is None or self.UserSQL:
+            return False
+        if self._hasLocalFilters() or self.isAnyChanged():
+            # The requery would lose the local filters or the changes.
+            return False
+        return cursor._fetchPending or cursor.RowCount > threshold
+
+    def _getServerFieldName(self, fld):
+        """Returns the name to use in SQL for the passed field, or None if it has none."""
+        cursor = self._CurrentCursor
+        entry = cursor.getDataStructureMap().get(fld)
+        if entry is None or fld in self.VirtualFields:
+            return None
+        table, field = entry[3], entry[4]
+        name = f"{table}.{field}" if table else field
+        return cursor.BackendObject.encloseNames(name, autoQuote=self.AutoQuoteNames)
+
+    def _getServerFilterExp(self, fld, expr, op):
+        """
+        Returns the WHERE expression for the passed filter() arguments, or None if
+        it can't be expressed in SQL.
+        """
+        name = self._getServerFieldName(fld)
+        if name is None:
+            return None
+        op = op.strip().lower()
+        sqlOps = {
+            "eq": "=",
+            "=": "=",
+            "equals": "=",
+            "ne": "<>",
+            "!=": "<>",
+            "nequals": "<>",
+            "gt": ">",
+            ">": ">",
+            "gte": ">=",
+            ">=": ">=",
+            "lt": "<",
+            "<": "<",
+            "lte": "<=",
+            "<=": "<=",
+        }
+        formatForQuery = self._CurrentCursor.BackendObject.formatForQuery
+        if op in sqlOps:
+            sqlOp = sqlOps[op]
+            if expr is None:
+                if sqlOp == "=":
+                    return f"{name} is null"
+                if sqlOp == "<>":
+                    return f"{name} is not null"
+                return None
+            exp = f"{name} {sqlOp} {formatForQuery(expr)}"
+            if sqlOp == "<>":
+                # Locally, None doesn't equal any value.
+                exp = f"({exp} or {name} is null)"
+            return exp
+        # Text matching is left to the local filter, which is case-sensitive.
+        return None
+
+    def _getServerOrderBy(self, col, ordr, caseSensitive):
+        """
+        Returns the ORDER BY clause for the passed sort() arguments, or None if it
+        can't be expressed in SQL.
+        """
+        ordr = (ordr or "ASC").upper()
+        if ordr not in ("ASC", "DESC"):
+            return None
+        dsMap = self._CurrentCursor.getDataStructureMap()
+        parts = []
+        for sortCol in col if isinstance(col, (list, tuple)) else (col,):
+            name = self._getServerFieldName(sortCol)
+            if name is None:
+                return None
+            if not caseSensitive and dsMap[sortCol][1] in ("C", "M"):
+                name = f"lower({name})"
+            parts.append(f"{name} {ordr.lower()}")
+        return ", ".join(parts)
 
     def _validate(self):
         """
@@ -1543,7 +2039,7 @@ class dBizobj(dObject):
             self._CurrentCursor.moveToPK(pk)
             self._resetChildrenParent(updateChildren)
 
-    def _resetChildrenParent(self, updateChildren):
+    def _resetChildrenParent(self, updateChildren, childTasks=None):
         """
         For internal use only! Should never be called from a developer's code.
         Its purpose is to keep child cursor in sync with parent cursor.
@@ -1552,6 +2048,9 @@ class dBizobj(dObject):
             | None    - the fastest one, doesn't update parent nor requery child cursor
             | False - update child cursor with current parent
             | True    - do both, update child cursor's parent and requery child cursor.
+
+        If a childTasks list is passed, the children are requeried with requeryAsync(),
+        and their tasks are added to the list.
         """
         if updateChildren is not None:
             for child in self._children:
@@ -1567,12 +2066,29 @@ class dBizobj(dObject):
                 # certainly wrong as well, but at least we are now consistent in behavior between
                 # e.g. self.first() and self.RowNumber = 0.
                 if (
+                    updateChildren
+                    and child.RequeryWithParent
+                    and child._usePrefetched(allowPrefetch=childTasks is None)
+                ):
+                    # The records were loaded along with those of other parent rows,
+                    # so only the grandchildren need requerying.
+                    if childTasks is None:
+                        try:
+                            child.requeryAllChildren()
+                        except exceptions.NoRecordsException:
+                            pass
+                    else:
+                        childTasks.extend(child.requeryAllChildrenAsync())
+                elif (
                     updateChildren
                     and child.RequeryWithParent
                     and child.cacheExpired()
                     and not child.isAnyChanged()
                 ):
-                    child.requery()
+                    if childTasks is None:
+                        child.requery()
+                    else:
+                        childTasks.append(child.requeryAsync())
                 child.afterSetCurrentParent()
 
     def moveToPK(self, pk):
@@ -1669,49 +2185,92 @@ class dBizobj(dObject):
                     return True
         return False
 
-    def _isAnyChanged_fast(self, includeNewUnchanged=None):
+    def isAnyChanged(self, includeNewUnchanged=None, withChildren=True):
         """
-        INTERNAL USE ONLY: This checks all the cursors including the ones
-        out of context, and needs to be combined with the precise function
-        like:
-                if self._isAnyChanged_fast() or self._isAnyChanged_precise()...
+        Return True if at least one record in the current record set
+        has been changed.
+        """
+        cursor = self._CurrentCursor
+        if cursor is None or cursor not in self._changedCursors:
+            # Nothing has been changed since the cursor was last found to be clean.
+            return False
+        return self._isCursorChanged(cursor, includeNewUnchanged, withChildren)
 
-        Which will at least be much faster (and still correct) in the case of
-        _isAnyChanged_fast() returning False, and not much slower otherwise.
+    def _isCursorChanged(self, cursor, includeNewUnchanged, withChildren):
+        """
+        Return True if the passed cursor of this bizobj, or any child records that
+        depend on its rows, have changes. Only the cursors in _changedCursors are
+        checked, so no records have to be visited.
         """
         withNewUnchanged = includeNewUnchanged
         if withNewUnchanged is None:
             withNewUnchanged = self.SaveNewUnchanged
-        for cursor in list(self.__cursors.values()):
+        changed = False
+        if cursor.RowCount:
             if cursor.isChanged(allRows=True, includeNewUnchanged=withNewUnchanged):
-                return True
-        for child in self._children:
-            if child._isAnyChanged_fast(includeNewUnchanged=includeNewUnchanged):
-                return True
-        return False
-
-    def _isAnyChanged_precise(self, includeNewUnchanged=None, withChildren=True):
-        """
-        Return True if at least one record in the current record set
-        has been changed.
-        """
+                changed = True
+            elif withChildren:
+                for child in self.getChildren():
+                    keys = child._getChangedCursorKeys(includeNewUnchanged)
+                    if keys and child._getParentRowsForKeys(cursor, keys):
+                        changed = True
+                        break
+        if not changed and withChildren and withNewUnchanged:
+            # That was the broadest check, so the cursor is clean.
+            self._changedCursors.discard(cursor)
+        return changed
 
-        def _isThisChanged():
-            self.exitScan = self._isChanged(True, includeNewUnchanged, withChildren)
-            return self.exitScan
+    def _getChangedCursorKeys(self, includeNewUnchanged):
+        """Return the set of keys of this bizobj's cursors that hold changes."""
+        keys = set()
+        if not self._changedCursors:
+            return keys
+        for key, cursor in list(self.__cursors.items()):
+            if cursor in self._changedCursors and self._isCursorChanged(
+                cursor, includeNewUnchanged, True
+            ):
+                keys.add(key)
+        return keys
+
+    def _getParentRowsForKeys(self, parentCursor, keys):
+        """
+        Return the rows of the passed cursor of the parent bizobj whose records
+        have the passed link values, i.e. whose child cursors have those keys.
+        """
+        fld = self.ParentLinkField
+        if not fld:
+            rows = (parentCursor._getRecordByPk(key, raiseRowNotFound=False)[0] for key in keys)
+            return [row for row in rows if row is not None]
+        flds = fld.replace(" ", "").split(",")
+        rows = []
+        for row in range(parentCursor.RowCount):
+            vals = tuple([parentCursor.getFieldVal(f, row) for f in flds])
+            if (vals[0] if len(vals) == 1 else vals) in keys:
+                rows.append(row)
+        return rows
+
+    def _cursorChanged(self, cursor):
+        """
+        Called by the passed cursor when its records have been changed. The cursor
+        of the parent bizobj that holds the parent record is marked as well.
+        """
+        self._changedCursors.add(cursor)
+        parent = self.Parent
+        if parent is None:
+            return
+        if cursor is self._CurrentCursor:
+            parentCursor = parent._CurrentCursor
+            if parentCursor is not None:
+                parent._cursorChanged(parentCursor)
+        else:
+            # Changed out of context: any of the parent's cursors could hold the
+            # parent record.
+            parent._allCursorsChanged()
 
-        return self.scan(_isThisChanged, scanRequeryChildren=False) or False
-
-    def isAnyChanged(self, includeNewUnchanged=None, withChildren=True):
-        """
-        Return True if at least one record in the current record set
-        has been changed.
-        """
-        if not self._isAnyChanged_fast(includeNewUnchanged):
-            ## the fast function never gives false negatives
-            return False
-        ## must use precise function because fast function can return false positives:
-        return self._isAnyChanged_precise(includeNewUnchanged, withChildren)
+    def _allCursorsChanged(self):
+        self._changedCursors.update(self.__cursors.values())
+        if self.Parent is not None:
+            self.Parent._allCursorsChanged()
 
     def isChanged(self, includeNewUnchanged=None, withChildren=True):
         """
@@ -1926,6 +2485,36 @@ class dBizobj(dObject):
         if _doRequery:
             self.afterChildRequery()
 
+    def requeryAllChildrenAsync(self, callback=None):
+        """
+        Like requeryAllChildren(), but the children are requeried with requeryAsync().
+        Once they have all finished, afterChildRequery() is called, followed by the
+        callback, if any, which receives the list of the children's dRequeryTasks.
+        That list is also returned.
+        """
+        if not self._children:
+            return []
+
+        errMsg = self.beforeChildRequery()
+        if errMsg:
+            raise exceptions.BusinessRuleViolation(errMsg)
+
+        tasks = []
+        pending = [True]
+
+        def checkDone(task=None):
+            if pending[0] and all(tsk.Done for tsk in tasks):
+                pending[0] = False
+                self.afterChildRequery()
+                if callback is not None:
+                    callback(tasks)
+
+        self._resetChildrenParent(True, childTasks=tasks)
+        for task in tasks:
+            task.addCallback(checkDone)
+        checkDone()
+        return tasks
+
     def cacheExpired(self):
         """This controls if a child requery is needed when a parent is requeried."""
         if self._childCacheInterval:
@@ -2111,6 +2700,17 @@ class dBizobj(dObject):
             )
         return None
 
+    def getRecordStream(self):
+        """
+        Returns an object for going through all the records of the current cursor once,
+        such as for feeding a report. When FetchSize is set, the rows that haven't been
+        fetched yet are streamed from the database without being kept in the bizobj.
+        """
+        cc = self._CurrentCursor
+        if cc is not None:
+            return cc.getRecordStream()
+        return None
+
     def appendDataSet(self, ds, updateInternals=False):
         """
         Appends the rows in the passed dataset to this bizobj's dataset. No checking
@@ -2179,12 +2779,9 @@ class dBizobj(dObject):
         Given a field name, returns its Python type, or None if no
         DataStructure information is available.
         """
-        ds = self.getDataStructure()
-        if not ds:
-            return None
         try:
-            fldInfo = [rec[1] for rec in ds if rec[0] == fld][0]
-        except IndexError:
+            fldInfo = self._CurrentCursor.getDataStructureMap()[fld][1]
+        except KeyError:
             return None
             # raise ValueError(_("Field '%s' does not exist in the DataStructure") % fld)
         return db.getPythonType(fldInfo)
@@ -2193,13 +2790,9 @@ class dBizobj(dObject):
         """
         Given a field name, return the decimal precision, or None.
         """
-        ds = self.getDataStructure()
-        if not ds:
-            return None
         try:
-            fld_info = [rec for rec in ds if rec[0] == fld][0]
-            return fld_info[5]
-        except IndexError:
+            return self._CurrentCursor.getDataStructureMap()[fld][5]
+        except KeyError:
             pass
 
     def getParams(self):
@@ -2507,17 +3100,8 @@ class dBizobj(dObject):
     ########## END - SQL Builder interface section ##############
 
     def _afterPointerMove(self):
-        self._addVisitedKey()
         self.afterPointerMove()
 
-    def _addVisitedKey(self):
-        """
-        The _visitedKeys set is used for optimization of cancelAll()
-        and saveAll(), and only applies to bizobjs with no parent.
-        """
-        if not self.Parent and self.RowCount:
-            self._visitedKeys.add(self.getPK())
-
     def _makeHookMethod(name, action, mainDoc=None, additionalDoc=None):
         mode = name[:5]
         if mode == "befor":
@@ -2639,6 +3223,8 @@ afterDelete() which is only called after a delete().""",
         crs.KeyField = self._keyField
         crs.AutoPopulatePK = self._autoPopulatePK
         crs.AutoQuoteNames = self._autoQuoteNames
+        crs.ColumnarStorage = self._columnarStorage
+        crs.FetchSize = self._fetchSize
         if self._dataStructure is not None:
             crs.DataStructure = self._dataStructure
         if not self._RemoteProxy:
@@ -2740,6 +3326,19 @@ afterDelete() which is only called after a delete().""",
     def ChildCacheInterval(self, val):
         self._childCacheInterval = val
 
+    @property
+    def ColumnarStorage(self):
+        """
+        When True, the cursors store their data column-wise instead of as one dict
+        per record, which uses much less memory for large data sets. Default=False  (bool)
+        """
+        return self._columnarStorage
+
+    @ColumnarStorage.setter
+    def ColumnarStorage(self, val):
+        self._columnarStorage = bool(val)
+        self._syncWithCursors()
+
     @property
     def CurrentSQL(self):
         """Returns the current SQL that will be run, which is one of UserSQL or AutoSQL."""
@@ -2856,6 +3455,14 @@ afterDelete() which is only called after a delete().""",
         self._dataStructure = val
         self._clearCursorRecord()
 
+    @property
+    def DataVersion(self):
+        """
+        Changes whenever the records of the current cursor, or the values in them,
+        change, and when another cursor becomes the current one.  (int) (read-only)
+        """
+        return self._CurrentCursor.DataVersion
+
     @property
     def DefaultValues(self):
         """
@@ -2890,6 +3497,20 @@ afterDelete() which is only called after a delete().""",
         self._encoding = val
         self._syncWithCursors()
 
+    @property
+    def FetchSize(self):
+        """
+        When greater than 0, a requery only gets this many rows from the database at
+        first, and the rest are fetched in batches of this size as they are reached.
+        Default=0, which fetches all the rows at once  (int)
+        """
+        return self._fetchSize
+
+    @FetchSize.setter
+    def FetchSize(self, val):
+        self._fetchSize = max(0, int(val or 0))
+        self._syncWithCursors()
+
     @property
     def FillLinkFromParent(self):
         """
@@ -3014,6 +3635,20 @@ afterDelete() which is only called after a delete().""",
     def ParentLinkField(self, val):
         self._parentLinkField = f"{val}"
 
+    @property
+    def PrefetchSize(self):
+        """
+        When this is a child bizobj, the number of parent rows whose child records
+        are loaded by a single query when the parent moves to a row whose records
+        haven't been loaded yet. 0, the default, runs one query per parent row.
+        See prefetch().  (int)
+        """
+        return self._prefetchSize
+
+    @PrefetchSize.setter
+    def PrefetchSize(self, val):
+        self._prefetchSize = int(val)
+
     @property
     def Record(self):
         """
@@ -3202,6 +3837,22 @@ afterDelete() which is only called after a delete().""",
     def ScanReverse(self, val):
         self._scanReverse = val
 
+    @property
+    def ServerFilterThreshold(self):
+        """
+        When not None, filter() and sort() calls are run by the database, by adding
+        to the WHERE clause or replacing the ORDER BY clause and requerying, whenever
+        the current data set has more rows than this, or still has rows to fetch
+        (see FetchSize). Filters on virtual fields, filterByExpression(), and data
+        sets with unsaved changes or a UserSQL are always handled locally. The
+        default of None always filters and sorts locally.  (int)
+        """
+        return self._serverFilterThreshold
+
+    @ServerFilterThreshold.setter
+    def ServerFilterThreshold(self, val):
+        self._serverFilterThreshold = None if val is None else int(val)
+
     @property
     def SqlManager(self):
         """Reference to the cursor that handles SQL Builder information (cursor)"""
@@ -3232,7 +3883,8 @@ afterDelete() which is only called after a delete().""",
         A dictionary mapping virtual_field_name to function to call.
 
         The specified function will be called when getFieldVal() is called on the specified virtual
-        field name.
+        field name. See dCursorMixin.VirtualFields for the keys that can be given in a dict instead
+        of the function, such as a batch function and the fields the value depends on.
 
         We need to save the explicitly-assigned VirtualFields here in the bizobj, so that we are
         able to propagate it to any future-assigned child cursors.
@@ -3247,3 +3899,70 @@ afterDelete() which is only called after a delete().""",
         self._virtualFields = val
         self._syncWithCursors()
         self._clearCursorRecord()
+
+
+class _bizIterator(object):
+    """
+    Iterator returned by dBizobj.bizIterator() and dBizobj.bizDataIterator(). It moves
+    the bizobj's record pointer one row at a time, so when the cursor has a FetchSize
+    set, the rows are fetched from the database as the iteration reaches them.
+    """
+
+    def __init__(
+        self,
+        obj,
+        returnRecords=False,
+        reversed=False,
+        restorePointer=False,
+        flushUnchangedCursors=False,
+    ):
+        self.obj = obj
+        self.returnRecords = returnRecords
+        self.reversed = reversed
+        self.restorePointer = restorePointer
+        self.flushUnchangedCursors = flushUnchangedCursors
+        self._row = None
+        self._savedPK = None
+        self._savedRow = None
+
+    def __iter__(self):
+        return self
+
+    def __next__(self):
+        obj = self.obj
+        if self._row is None:
+            # First pass
+            if obj.RowCount < 1:
+                raise StopIteration
+            if self.restorePointer:
+                self._savedRow = obj.RowNumber
+                try:
+                    self._savedPK = obj.getPK()
+                except exceptions.dException:
+                    self._savedPK = None
+            self._row = obj.RowCount - 1 if self.reversed else 0
+        elif self.reversed:
+            self._row -= 1
+        else:
+            self._row += 1
+        if not (0 <= self._row < obj.RowCount):
+            self._finish()
+            raise StopIteration
+        if self.flushUnchangedCursors:
+            obj._flushUnchangedCursors()
+        obj._moveToRowNum(self._row)
+        if self.returnRecords:
+            return obj.getFieldVals()
+        return self._row
+
+    def _finish(self):
+        if not self.restorePointer:
+            return
+        obj = self.obj
+        if self._savedPK is not None:
+            try:
+                obj._positionUsingPK(self._savedPK)
+                return
+            except exceptions.dException:
+                pass
+        obj._moveToRowNum(self._savedRow)
@@ -0,0 +1,147 @@
+# -*- coding: utf-8 -*-
+import concurrent.futures
+import threading
+
+from .. import settings
+from ..localization import _
+
+
+class dRequeryTask(object):
+    """
+    Handle for a requery started by dBizobj.requeryAsync().
+
+    The query runs on a worker thread, using a connection from the bizobj's
+    connection pool. The rows are then handed back to the thread that started
+    the requery, and only there are they made the cursor's data and the
+    afterRequery() hook called. In an application with a UI this happens in the
+    UI's event loop; otherwise the starting thread must call wait().
+
+    A requery that is superseded can be cancel()ed: its rows are then thrown away,
+    and the backend is asked to abort the query if it is still running.
+    """
+
+    # Worker threads shared by all tasks; created when first needed.
+    _executor = None
+    _executorLock = threading.Lock()
+
+    def __init__(self, fetch, apply, callback=None):
+        # fetch(task) runs on the worker thread and returns the data;
+        # apply(data) runs on the owning thread.
+        self._fetch = fetch
+        self._apply = apply
+        self._callbacks = [callback] if callback is not None else []
+        self._thread = threading.current_thread()
+        self._lock = threading.Lock()
+        self._future = None
+        self._backend = None
+        self._cancelled = False
+        self._finished = False
+        self._exception = None
+
+    @classmethod
+    def _getExecutor(cls):
+        with cls._executorLock:
+            if cls._executor is None:
+                cls._executor = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=settings.connectionPoolMaxSize, thread_name_prefix="daboRequery"
+                )
+        return cls._executor
+
+    def addCallback(self, callback):
+        """
+        Add a function to be called with the task, on the owning thread, once the
+        result has been applied. It isn't called if the task has already finished.
+        """
+        self._callbacks.append(callback)
+
+    def start(self):
+        self._future = self._getExecutor().submit(self._run)
+
+    def finishNow(self, data=None):
+        """Complete the task with the passed data, without running a query."""
+        self._future = concurrent.futures.Future()
+        self._future.set_result(data)
+        self._complete()
+
+    def _run(self):
+        try:
+            return self._fetch(self)
+        finally:
+            if not self._cancelled:
+                self._deliver()
+
+    def _setBackend(self, backend):
+        """Records the backend running the query, so that cancel() can interrupt it."""
+        with self._lock:
+            self._backend = backend
+
+    def _deliver(self):
+        """Arranges for the result to be applied on the thread that started the task."""
+        app = settings.get_application()
+        if getattr(app, "uiApp", None) is not None and self._thread is threading.main_thread():
+            from .. import ui
+
+            ui.callAfter(self._complete)
+
+    def _complete(self):
+        with self._lock:
+            if self._finished or self._cancelled:
+                return
+            self._finished = True
+        try:
+            data = self._future.result()
+        except Exception as e:
+            self._exception = e
+        else:
+            self._apply(data)
+        for callback in self._callbacks:
+            callback(self)
+
+    def wait(self, timeout=None):
+        """
+        Wait for the query to finish, and apply its result. Must be called from
+        the thread that started the requery. Raises any exception raised by the
+        query, and TimeoutError if it doesn't finish within timeout seconds.
+        """
+        if threading.current_thread() is not self._thread:
+            raise RuntimeError(_("wait() must be called from the thread that started the requery"))
+        if self._cancelled:
+            return
+        if not concurrent.futures.wait([self._future], timeout).done:
+            raise TimeoutError(_("The requery did not finish in time"))
+        self._complete()
+        if self._exception is not None:
+            raise self._exception
+
+    def cancel(self):
+        """
+        Discard the result of the requery. Returns False if it has already been
+        applied.
+        """
+        with self._lock:
+            if self._finished:
+                return False
+            self._cancelled = True
+            if self._future is not None:
+                self._future.cancel()
+            if self._backend is not None:
+                try:
+                    self._backend.interrupt()
+                except Exception:
+                    pass
+        return True
+
+    @property
+    def Cancelled(self):
+        """True if the requery was canceled.  (bool) (read-only)"""
+        return self._cancelled
+
+    @property
+    def Done(self):
+        """True once the result has been applied, or the task canceled.  (bool) (read-only)"""
+        return self._finished or self._cancelled
+
+    @property
+    def Exception(self):
+        """The exception raised by the query, if it failed.  (Exception) (read-only)"""
+        return self._exception
@@ -1,4 +1,6 @@
 # -*- coding: utf-8 -*-
+import os
+import tempfile
 import unittest
 
 from ...lib import getRandomUUID
@@ -177,6 +179,223 @@ insert into %s (cField, iField, nField) values (NULL, NULL, NULL)
         biz.deleteAll()
         self.assertEqual(biz.RowNumber, -1)
 
+    def test_bulkAccess(self):
+        biz = self.biz
+        biz.VirtualFields["double"] = lambda: biz.Record.iField * 2
+        moves = []
+        biz.afterPointerMove = lambda: moves.append(biz.RowNumber)
+        cols = biz.getColumns(("pk", "iField", "double"))
+        self.assertEqual(cols["iField"], [23, 42, 10223])
+        self.assertEqual(cols["double"], [46, 84, 20446])
+        recs = list(biz.iterRows(("cField",), rows=(2, 0)))
+        self.assertEqual(recs, [{"cField": "Carl Karsten"}, {"cField": "Paul Keith McNett"}])
+        self.assertEqual(len(next(biz.iterRows(virtualFields=True))), 5)
+        self.assertRaises(exceptions.FieldNotFoundException, biz.getColumns, ("bogus",))
+
+        def addOne(rec):
+            if rec["iField"] < 100:
+                return {"iField": rec["iField"] + 1}
+
+        self.assertEqual(biz.apply(addOne, flds=("iField",)), [0, 1])
+        self.assertEqual(biz.getColumns(("iField",))["iField"], [24, 43, 10223])
+        self.assertEqual(biz.getChangedRows(), [0, 1])
+        self.assertEqual(biz.RowNumber, 0)
+        self.assertEqual(moves, [])
+
+    def test_filterVirtualField(self):
+        biz = self.biz
+        biz.VirtualFields["double"] = lambda: biz.Record.iField * 2
+        biz.filter("double", 84)
+        self.assertEqual(biz.RowCount, 1)
+        self.assertEqual(biz.Record.cField, "Edward Leafe")
+        biz.filter("double", 0)
+        self.assertEqual(biz.RowCount, 0)
+        biz.removeFilter()
+        self.assertEqual(biz.RowCount, 1)
+        biz.removeFilters()
+        self.assertEqual(biz.RowCount, 3)
+
+    def test_filterVirtualFieldTextKeys(self):
+        self.biz._CurrentCursor.execute("create table tpk (code CHAR PRIMARY KEY, cField CHAR)")
+        self.biz._CurrentCursor.execute("insert into tpk values ('Al', 'one'), ('Bo', 'two')")
+        bizText = biz.dBizobj(self.con)
+        bizText.KeyField = "code"
+        bizText.DataSource = "tpk"
+        bizText.VirtualFields["upper"] = lambda: bizText.Record.cField.upper()
+        bizText.requery()
+        bizText.filter("upper", "TWO")
+        self.assertEqual(bizText.RowCount, 1)
+        self.assertEqual(bizText.Record.code, "Bo")
+
+    def test_VirtualFieldsBatch(self):
+        biz = self.biz
+        calls = []
+
+        def triple(rows):
+            calls.append(list(rows))
+            return [val * 3 for val in biz.getColumns(("iField",), rows)["iField"]]
+
+        biz.VirtualFields["triple"] = {"batch_func": triple, "depends_on": ("iField",)}
+        self.assertEqual(biz.getColumns(("triple",))["triple"], [69, 126, 30669])
+        self.assertEqual(biz.getFieldVal("triple", row=1), 126)
+        # Cached values are used until a dependency changes
+        self.assertEqual(calls, [[0, 1, 2]])
+        biz.setFieldVal("iField", 1, row=1)
+        biz.Record.cField = "Dependencies only"
+        self.assertEqual(biz.getColumns(("triple",))["triple"], [69, 3, 30669])
+        self.assertEqual(calls, [[0, 1, 2], [1]])
+        biz.filter("triple", 69)
+        self.assertEqual(biz.RowCount, 1)
+        biz.removeFilter()
+        biz.requery()
+        self.assertEqual(biz.getFieldVal("triple", row=1), 126)
+        self.assertEqual(len(calls), 3)
+
+    def test_ServerFilterThreshold(self):
+        biz = self.biz
+        biz.filter("iField", 40, ">")
+        self.assertEqual(biz.RowCount, 2)
+        self.assertNotIn("where", biz.LastSQL.lower())
+        biz.removeFilter()
+        biz.ServerFilterThreshold = 2
+        biz.filter("iField", 40, ">")
+        self.assertEqual(biz.RowCount, 2)
+        self.assertIn('"parent"."iField" > 40', biz.LastSQL)
+        # Now below the threshold, so handled locally
+        biz.filter("cField", "Carl", "startswith")
+        self.assertEqual(biz.RowCount, 1)
+        biz.removeFilter()
+        self.assertEqual(biz.RowCount, 2)
+        biz.sort("cField", "DESC")
+        self.assertEqual(biz.Record.cField, "Edward Leafe")
+        self.assertNotIn("order by", biz.LastSQL.lower())
+        biz.removeFilter()
+        self.assertEqual(biz.RowCount, 3)
+        self.assertNotIn("where", biz.LastSQL.lower())
+        biz.sort("cField", "DESC", caseSensitive=False)
+        self.assertIn('lower("parent"."cField") desc', biz.LastSQL)
+        self.assertEqual(biz.getFieldVal("cField", 0), "Paul Keith McNett")
+        # Text matching is always local, and so case-sensitive
+        biz.filter("cField", "paul", "startswith")
+        self.assertNotIn("like", biz.LastSQL.lower())
+        self.assertEqual(biz.RowCount, 0)
+        biz.removeFilter()
+        biz.filter("iField", 40, ">")
+        biz.filter("cField", "Carl", "startswith")
+        self.assertEqual(biz.RowCount, 1)
+        biz.Record.iField = 1
+        self.assertRaises(exceptions.dException, biz.removeFilters)
+        # The local filter survives the failed removal
+        self.assertEqual(biz.RowCount, 1)
+        self.assertEqual(biz.Record.cField, "Carl Karsten")
+
+    def test_FetchSize(self):
+        biz = self.biz
+        biz.FetchSize = 2
+        biz.requery()
+        self.assertEqual(biz.RowCount, 3)
+        names = [rec["cField"] for rec in biz.bizDataIterator(restorePointer=True)]
+        self.assertEqual(names, ["Paul Keith McNett", "Edward Leafe", "Carl Karsten"])
+        self.assertEqual(biz.RowNumber, 0)
+        self.assertEqual(list(biz.bizIterator(reversed=True)), [2, 1, 0])
+
+    def test_saveAll(self):
+        biz = self.biz
+        saved = []
+        biz.afterSave = lambda: saved.append(biz.Record.cField)
+        biz.Record.cField = "Paul McNett"
+        biz.new()
+        biz.Record.cField = "Denise McNett"
+        biz.new()
+        biz.Record.cField = "Alison Anton"
+        biz.saveAll()
+        self.assertEqual(biz.isAnyChanged(), False)
+        self.assertEqual(saved, ["Paul McNett", "Denise McNett", "Alison Anton"])
+        self.assertEqual(biz.RowNumber, 4)
+        self.assertEqual(biz.Record.pk, 5)
+        biz.requery()
+        self.assertEqual(biz.RowCount, 5)
+        self.assertEqual(biz.getFieldVal("cField", 0), "Paul McNett")
+
+    def test_saveAllTree(self):
+        bizMain = self.biz
+        bizChild = biz.dBizobj(self.con)
+        bizChild.KeyField = "pk"
+        bizChild.DataSource = self.temp_child_table_name
+        bizChild.LinkField = "parent_fk"
+        bizChild.FillLinkFromParent = True
+        bizChild2 = biz.dBizobj(self.con)
+        bizChild2.KeyField = "pk"
+        bizChild2.DataSource = self.temp_child2_table_name
+        bizChild2.LinkField = "parent_fk"
+        bizChild2.FillLinkFromParent = True
+        bizMain.addChild(bizChild)
+        bizChild.addChild(bizChild2)
+        bizMain.requery()
+        saved = []
+        bizMain.afterSave = lambda: saved.append(bizMain.Record.cField)
+        for name in ("Alison Anton", "Denise McNett"):
+            bizMain.new()
+            bizMain.Record.cField = name
+            for num in ("1", "2"):
+                bizChild.new()
+                bizChild.Record.cInvNum = name[0] + num
+                bizChild2.new()
+                bizChild2.Record.cPart = name[0] + num
+        bizMain.RowNumber = 0
+        bizChild.Record.cInvNum = "IN99999"
+        bizMain.saveAll()
+        self.assertFalse(bizMain.isAnyChanged())
+        self.assertEqual(saved, ["Paul Keith McNett", "Alison Anton", "Denise McNett"])
+        self.assertEqual(bizMain.RowNumber, 0)
+        crs = bizMain._CurrentCursor.AuxCursor
+        crs.execute(
+            "select p.cField, c.cInvNum, g.cPart from %s p join %s c on c.parent_fk = p.pk "
+            "join %s g on g.parent_fk = c.pk order by c.cInvNum"
+            % (self.temp_table_name, self.temp_child_table_name, self.temp_child2_table_name)
+        )
+        self.assertEqual(
+            [(rec["cField"], rec["cInvNum"], rec["cPart"]) for rec in crs.getDataSet()],
+            [
+                ("Alison Anton", "A1", "A1"),
+                ("Alison Anton", "A2", "A2"),
+                ("Denise McNett", "D1", "D1"),
+                ("Denise McNett", "D2", "D2"),
+                ("Paul Keith McNett", "IN00455", "hhfg-234"),
+                ("Paul Keith McNett", "IN00455", "pkd-8878"),
+                ("Paul Keith McNett", "IN99999", "fldk-333"),
+                ("Paul Keith McNett", "IN99999", "9930"),
+            ],
+        )
+        # The children's cursors are now keyed by the saved parent records.
+        bizMain.RowNumber = 4
+        self.assertEqual(bizChild.RowCount, 2)
+        self.assertEqual(bizChild.getFieldVal("parent_fk"), bizMain.Record.pk)
+        self.assertEqual(bizChild2.RowCount, 1)
+        self.assertEqual(bizChild2.getFieldVal("parent_fk"), bizChild.Record.pk)
+
+    def test_saveNullDefaults(self):
+        self.biz._CurrentCursor.execute(
+            "create table dflt (pk INTEGER PRIMARY KEY AUTOINCREMENT, "
+            "cField CHAR DEFAULT 'none', iField INT DEFAULT 7)"
+        )
+        bizDflt = biz.dBizobj(self.con)
+        bizDflt.KeyField = "pk"
+        bizDflt.DataSource = "dflt"
+        bizDflt.DefaultValues = None
+        bizDflt.requery()
+        bizDflt.new()
+        bizDflt.Record.cField = "one"
+        bizDflt.new()
+        bizDflt.Record.iField = 3
+        bizDflt.saveAll()
+        self.assertFalse(bizDflt.isAnyChanged())
+        # The generated keys and the column defaults are read back into the records.
+        self.assertEqual(
+            list(bizDflt.getDataSet()),
+            [{"pk": 1, "cField": "one", "iField": 7}, {"pk": 2, "cField": "none", "iField": 3}],
+        )
+
     def test_UserSQL(self):
         biz = self.biz
         testSQL = "select * from %s where nField = 23.23" % self.temp_table_name
@@ -255,6 +474,55 @@ insert into %s (cField, iField, nField) values (NULL, NULL, NULL)
         self.assertEqual(biz.RowCount, 1)
         self.assertEqual(biz.RowNumber, 0)
 
+    def test_prefetch(self):
+        bizMain = self.biz
+        bizChild = biz.dBizobj(self.con)
+        bizChild.KeyField = "pk"
+        bizChild.DataSource = self.temp_child_table_name
+        bizChild.LinkField = "parent_fk"
+        bizChild.PrefetchSize = 10
+        queries = []
+        bizChild.beforeRequery = lambda: queries.append(bizMain.RowNumber)
+        bizMain.addChild(bizChild)
+        bizMain.requery()
+        counts = [bizChild.RowCount]
+        for row in range(1, bizMain.RowCount):
+            bizMain.RowNumber = row
+            counts.append(bizChild.RowCount)
+        self.assertEqual(counts, [2, 0, 1])
+        self.assertEqual(bizChild.Record.cInvNum, "IN00024")
+        # One query loaded the child records of all three parents
+        self.assertEqual(queries, [0])
+        # Once used, the prefetched records are requeried as usual
+        bizMain.RowNumber = 0
+        self.assertEqual(queries, [0, 0])
+        self.assertEqual(bizChild.RowCount, 2)
+
+    def test_changedChildren(self):
+        bizMain = self.biz
+        bizChild = biz.dBizobj(self.con)
+        bizChild.KeyField = "pk"
+        bizChild.DataSource = self.temp_child_table_name
+        bizChild.LinkField = "parent_fk"
+        bizMain.addChild(bizChild)
+        bizMain.requery()
+        self.assertFalse(bizMain.isAnyChanged())
+        self.assertEqual(bizMain.getChangedRows(), [])
+        # Change a child record of the last parent, then move away from it.
+        bizMain.RowNumber = 2
+        bizChild.Record.cInvNum = "IN99999"
+        bizMain.RowNumber = 0
+        self.assertFalse(bizMain.isChanged())
+        self.assertTrue(bizMain.isAnyChanged())
+        self.assertFalse(bizMain.isAnyChanged(withChildren=False))
+        self.assertEqual(bizMain.getChangedRows(), [2])
+        bizMain.saveAll()
+        self.assertFalse(bizMain.isAnyChanged())
+        self.assertEqual(bizMain.RowNumber, 0)
+        crs = bizMain._CurrentCursor.AuxCursor
+        crs.execute("select cInvNum from %s where parent_fk = 3" % self.temp_child_table_name)
+        self.assertEqual(crs.getDataSet()[0]["cInvNum"], "IN99999")
+
     def testDeleteChildThenDeleteParent(self):
         """See ticket #1312"""
         bizMain = self.biz
@@ -705,6 +973,66 @@ insert into %s (cField, iField, nField) values (NULL, NULL, NULL)
         self.testChangesToTwoChildRecords("cancel")
 
 
+class Test_dBizobjRequeryAsync(unittest.TestCase):
+    """The asynchronous requery uses pooled connections, so it needs a database file."""
+
+    def setUp(self):
+        fd, self.dbPath = tempfile.mkstemp(suffix=".sqlite")
+        os.close(fd)
+        self.con = db.dConnection(DbType="SQLite", Database=self.dbPath)
+        self.biz = biz.dBizobj(self.con)
+        self.temp_table_name = "parent"
+        self.temp_child_table_name = "child"
+        self.temp_child2_table_name = "grandchild"
+        Test_dBizobj.createSchema(self)
+        self.biz.KeyField = "pk"
+        self.biz.DataSource = self.temp_table_name
+        self.child = biz.dBizobj(self.con)
+        self.child.KeyField = "pk"
+        self.child.DataSource = self.temp_child_table_name
+        self.child.LinkField = "parent_fk"
+        self.biz.addChild(self.child)
+
+    def tearDown(self):
+        self.biz = self.child = None
+        self.con.close()
+        os.remove(self.dbPath)
+
+    def test_requeryAsync(self):
+        bizMain, bizChild = self.biz, self.child
+        done = []
+        task = bizMain.requeryAsync(callback=done.append)
+        self.assertEqual(bizMain.RowCount, 0)
+        task.wait(5)
+        self.assertEqual(done, [task])
+        self.assertTrue(task.Done)
+        self.assertEqual(bizMain.RowCount, 3)
+        self.assertEqual(bizMain.Record.cField, "Paul Keith McNett")
+        # The children are requeried asynchronously, too
+        bizChild._requeryTask.wait(5)
+        self.assertEqual(bizChild.RowCount, 2)
+
+    def test_cancel(self):
+        bizMain = self.biz
+        first = bizMain.requeryAsync()
+        bizMain.UserSQL = "select * from parent where iField > 100"
+        second = bizMain.requeryAsync()
+        self.assertTrue(first.Cancelled)
+        first.wait(5)
+        self.assertEqual(bizMain.RowCount, 0)
+        second.wait(5)
+        self.assertEqual(bizMain.RowCount, 1)
+        self.assertFalse(second.cancel())
+
+    def test_error(self):
+        bizMain = self.biz
+        bizMain.UserSQL = "select * from nosuchtable"
+        task = bizMain.requeryAsync()
+        self.assertRaises(exceptions.DBQueryException, task.wait, 5)
+        self.assertIsInstance(task.Exception, exceptions.DBQueryException)
+
+
 if __name__ == "__main__":
-    suite = unittest.TestLoader().loadTestsFromTestCase(Test_dBizobj)
-    unittest.TextTestRunner(verbosity=2).run(suite)
+    for testCase in (Test_dBizobj, Test_dBizobjRequeryAsync):
+        suite = unittest.TestLoader().loadTestsFromTestCase(testCase)
+        unittest.TextTestRunner(verbosity=2).run(suite)
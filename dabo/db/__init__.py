@@ -35,7 +35,9 @@ from .. import settings
 from ..exceptions import FieldNotFoundException
 from .connect_info import dConnectInfo
 from .connection import dConnection
+from .connection_pool import dConnectionPool
 from .cursor_mixin import dCursorMixin
+from .cursor_snapshot import dCursorSnapshot
 from .dataset import dDataSet
 
 daboTypes = {
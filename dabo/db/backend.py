@@ -1,6 +1,8 @@
 # -*- coding: utf-8 -*-
+import collections
 import datetime
 import decimal
+import json
 import re
 import sys
 import threading
@@ -8,6 +10,7 @@ import time
 
 from .. import exceptions
 from .. import settings
+from .. import version
 from ..base_object import dObject
 from ..lib.utils import ustr
 from ..localization import _
@@ -16,6 +19,89 @@ from .no_esc_quote_str import dNoEscQuoteStr
 from .table import dTable
 
 dabo_module = settings.get_dabo_package()
+_daboVersion = None
+
+
+def _getDaboVersion():
+    global _daboVersion
+    if _daboVersion is None:
+        try:
+            _daboVersion = version.get_version()
+        except OSError:
+            _daboVersion = ""
+    return _daboVersion
+
+
+class _SchemaCache(object):
+    """
+    Least-recently-used cache of the field information for the tables of one
+    connection. Every change to the cache bumps its version, so that callers
+    holding on to field information can tell when it may be stale.
+    """
+
+    # Format of the snapshots written by save(); bump it whenever that changes.
+    snapshotFormat = 1
+
+    def __init__(self, maxSize):
+        self._fields = collections.OrderedDict()
+        # The cache is shared by all of the pooled connections to a database.
+        self._lock = threading.Lock()
+        self.maxSize = maxSize
+        self.version = 0
+
+    def __contains__(self, tableName):
+        return tableName in self._fields
+
+    def __len__(self):
+        return len(self._fields)
+
+    def get(self, tableName):
+        """Returns the cached fields for the table; raises KeyError if there are none."""
+        with self._lock:
+            flds = self._fields[tableName]
+            self._fields.move_to_end(tableName)
+        return flds
+
+    def set(self, tableName, flds):
+        with self._lock:
+            self._fields[tableName] = flds
+            self._fields.move_to_end(tableName)
+            while len(self._fields) > max(self.maxSize, 1):
+                self._fields.popitem(last=False)
+            self.version += 1
+
+    def invalidate(self, tableName=None):
+        with self._lock:
+            if tableName is None:
+                self._fields.clear()
+            else:
+                self._fields.pop(tableName, None)
+            self.version += 1
+
+    def save(self, pth, identity):
+        snapshot = {
+            "format": self.snapshotFormat,
+            "identity": identity,
+            "tables": {tbl: [list(fld) for fld in flds] for tbl, flds in self._fields.items()},
+        }
+        with open(pth, "w", encoding="utf-8") as ff:
+            json.dump(snapshot, ff)
+
+    def load(self, pth, identity):
+        try:
+            with open(pth, encoding="utf-8") as ff:
+                snapshot = json.load(ff)
+        except (OSError, ValueError):
+            return False
+        if (
+            not isinstance(snapshot, dict)
+            or snapshot.get("format") != self.snapshotFormat
+            or snapshot.get("identity") != identity
+        ):
+            return False
+        for tbl, flds in snapshot["tables"].items():
+            self.set(tbl, tuple(tuple(fld) for fld in flds))
+        return True
 
 
 class dBackend(dObject):
@@ -28,15 +114,24 @@ class dBackend(dObject):
     nameEnclosureChar = '"'
     # The character used in sql to represent parameters to be substituted
     paramPlaceholder = "%s"
+    # Cheap statement used to check that a connection is still usable
+    validationSQL = "select 1"
 
     def __init__(self):
         self._baseClass = dBackend
         super().__init__()
         self.dbModuleName = None
         self._connection = None
+        # The dConnectInfo that the connection was made with
+        self.connectInfo = None
         # Reference to the cursor that is using this object
         self._cursor = None
         self.lastExecuteTime = time.time()  # For keep alive interval
+        # Set for the connections of a dConnectionPool, which are handed from
+        # thread to thread
+        self.pooled = False
+        # Field information for the tables of this connection
+        self._schemaCache = _SchemaCache(settings.schemaCacheSize)
 
     def isValidModule(self):
         """Test the dbapi to see if it is supported on this computer."""
@@ -54,6 +149,34 @@ class dBackend(dObject):
         """override in subclasses"""
         return None
 
+    def clone(self):
+        """
+        Return a new, unconnected backend object of the same type, for making another
+        connection to the same database. It shares this object's schema cache.
+        """
+        bo = self.__class__()
+        bo._schemaCache = self._schemaCache
+        return bo
+
+    def interrupt(self):
+        """
+        Abort the statement that the connection is running, if the backend
+        supports that; used to cancel superseded queries. Override in subclasses.
+        """
+        pass
+
+    def isConnectionAlive(self):
+        """Run validationSQL on the connection, and return whether it succeeded."""
+        try:
+            cur = self._connection.cursor()
+            cur.execute(self.validationSQL)
+            cur.fetchall()
+            cur.close()
+        except Exception:
+            return False
+        self.lastExecuteTime = time.time()
+        return True
+
     def getMainCursorClass(self):
         """override in subclasses if they need something other than dCursorMixin"""
         return dCursorMixin
@@ -160,6 +283,34 @@ class dBackend(dObject):
         except AttributeError:
             return None
 
+    def insertMany(self, cursor, sql, paramList, keyField=None):
+        """
+        Run the passed insert statement once for each set of parameters in
+        'paramList', in as few calls to the database as possible.
+
+        If 'keyField' is passed, the values that the database generated for that
+        field must be returned in a list, in the same order as 'paramList'. Backends
+        that can't do that for a batch of inserts return None without inserting
+        anything, and the rows are then inserted one at a time. When 'keyField'
+        is None, an empty list is returned.
+        """
+        # Most dbapi modules don't give the generated keys from executemany().
+        # OVERRIDE IN SUBCLASSES that can!
+        if keyField:
+            return None
+        cursor._executeMany(sql, paramList)
+        return []
+
+    def insertManyReturning(self, cursor, sql, paramList):
+        """
+        Like insertMany(), but returns the inserted records as dicts, in the same
+        order as 'paramList', so that the keys and default values that the database
+        filled in are known without selecting the records again. Backends that can't
+        do that return None without inserting anything.
+        """
+        # OVERRIDE IN SUBCLASSES that can!
+        return None
+
     def getTables(self, cursor, includeSystemTables=False):
         """
         Return a tuple of the tables in the current database.
@@ -172,6 +323,47 @@ class dBackend(dObject):
         """Return the number of records in the backend table."""
         return -1
 
+    def getCachedFields(self, tableName, cursor):
+        """
+        Return the same information as getFields(), but only introspect the backend
+        table the first time it is requested. At most settings.schemaCacheSize tables
+        are kept; the least recently used ones are dropped first.
+        """
+        cache = self._schemaCache
+        try:
+            return cache.get(tableName)
+        except KeyError:
+            flds = self.getFields(tableName, cursor)
+            cache.set(tableName, flds)
+            return flds
+
+    def invalidateSchemaCache(self, tableName=None):
+        """
+        Discard the cached field information for the table, or for all tables if
+        tableName is None. Call this after changing the structure of a table.
+        """
+        self._schemaCache.invalidate(tableName)
+
+    def saveSchemaCache(self, pth):
+        """Write the cached field information to the file at pth."""
+        self._schemaCache.save(pth, self._getSchemaCacheIdentity())
+
+    def loadSchemaCache(self, pth):
+        """
+        Add the field information from a file written by saveSchemaCache() to the
+        cache, so that the tables don't have to be introspected again. Returns False,
+        and leaves the cache alone, if the file is missing or unreadable, or was
+        written by a different version of Dabo or for a different database.
+        """
+        return self._schemaCache.load(pth, self._getSchemaCacheIdentity())
+
+    def _getSchemaCacheIdentity(self):
+        """Identifies the Dabo version and the database that the cached field information is for."""
+        ci = self.connectInfo
+        if ci is None:
+            return [self.__class__.__name__, _getDaboVersion()]
+        return [self.__class__.__name__, _getDaboVersion(), ci.Host, ci.Port, ci.Database]
+
     def getFields(self, tableName, cursor):
         """
         Return field information from the backend table.
@@ -643,9 +835,6 @@ class dBackend(dObject):
                 while self.backendObj._connection is None:
                     time.sleep(5)
 
-                con = self.backendObj._connection
-                cur = con.cursor()
-
                 while True:
                     time.sleep(5)
 
@@ -655,8 +844,7 @@ class dBackend(dObject):
                         return
 
                     if time.time() - self.backendObj.lastExecuteTime > kal:
-                        cur.execute("select 1")
-                        self.backendObj.lastExecuteTime = time.time()
+                        self.backendObj.isConnectionAlive()
 
         existingThread = getattr(self, "_keepAliveThread", None)
         if existingThread:
@@ -700,3 +888,11 @@ class dBackend(dObject):
     def KeepAliveInterval(self, val):
         self._keepAliveInterval = val
         self._applyKeepAlive()
+
+    @property
+    def SchemaCacheVersion(self):
+        """
+        Incremented whenever the cached field information changes, so that anything
+        derived from it can tell when it needs rebuilding.  (int) (read-only)
+        """
+        return self._schemaCache.version
@@ -116,9 +116,16 @@ class dConnectInfo(dObject):
             else:
                 self._customParameters[k] = v
 
-    def getConnection(self, **kwargs):
+    def getConnection(self, backendObject=None, **kwargs):
+        """
+        Open a connection using the backend object for the DbType, or the passed
+        backendObject, which must be of the same type.
+        """
+        if backendObject is None:
+            backendObject = self._backendObject
         kwargs.update(self.CustomParameters)
-        return self._backendObject.getConnection(self, **kwargs)
+        backendObject.connectInfo = self
+        return backendObject.getConnection(self, **kwargs)
 
     def getDictCursorClass(self):
         try:
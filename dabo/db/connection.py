@@ -1,4 +1,6 @@
 # -*- coding: utf-8 -*-
+import threading
+
 from ..base_object import dObject
 from ..localization import _
 from .connect_info import dConnectInfo
@@ -8,9 +10,15 @@ from .cursor_mixin import dCursorMixin
 class dConnection(dObject):
     """Hold a connection to a backend database."""
 
-    def __init__(self, connectInfo=None, parent=None, forceCreate=False, **kwargs):
+    def __init__(
+        self, connectInfo=None, parent=None, forceCreate=False, privateBackend=False, **kwargs
+    ):
         self._baseClass = dConnection
         self._forceCreate = forceCreate
+        self._backendObject = None
+        self._pool = None
+        self._poolLock = threading.Lock()
+        self._thread = threading.current_thread()
         super().__init__()
         # Store a reference to the parent object (bizobj maybe; app
         # object connection collection most likely)
@@ -30,14 +38,33 @@ class dConnection(dObject):
             self._connectInfo = dConnectInfo(connInfo=connectInfo)
         else:
             raise TypeError("dConnectInfo instance or kwargs not sent.")
+        if privateBackend:
+            # Used for pooled connections, which can't share the backend object, as
+            # it holds the DB-API connection.
+            self._backendObject = self._connectInfo.getBackendObject().clone()
+            self._backendObject.pooled = True
         self._connection = self._openConnection(**kwargs)
 
     def getConnection(self):
         return self._connection
 
     def close(self):
+        if self._pool is not None:
+            self._pool.close()
+            self._pool = None
         self._connection.close()
 
+    def getThreadConnection(self):
+        """
+        Return this connection when called from the thread that opened it, and
+        otherwise the connection from the Pool that is reserved for the calling
+        thread, so that work done in other threads stays out of this connection's
+        transactions.
+        """
+        if threading.current_thread() is self._thread:
+            return self
+        return self.Pool.getThreadConnection()
+
     def getDictCursorClass(self):
         return self._connectInfo.getDictCursorClass()
 
@@ -77,14 +104,20 @@ class dConnection(dObject):
 
     def _openConnection(self, **kwargs):
         """Open a connection to the database and store it for future use."""
-        self.getBackendObject().KeepAliveInterval = self._connectInfo.KeepAliveInterval
-        return self._connectInfo.getConnection(forceCreate=self._forceCreate, **kwargs)
+        if self._backendObject is None:
+            self.getBackendObject().KeepAliveInterval = self._connectInfo.KeepAliveInterval
+        # Pooled connections are validated when they are borrowed instead of kept alive.
+        return self._connectInfo.getConnection(
+            backendObject=self._backendObject, forceCreate=self._forceCreate, **kwargs
+        )
 
     def getBackendObject(self):
         """
         Return a reference to the connectInfo's backend-specific
-        database object.
+        database object, or to this connection's own one if it is pooled.
         """
+        if self._backendObject is not None:
+            return self._backendObject
         return self._connectInfo.getBackendObject()
 
     def isRemote(self):
@@ -99,6 +132,19 @@ class dConnection(dObject):
         """The connectInfo for the connection.  (dConnectInfo)"""
         return self._connectInfo
 
+    @property
+    def Pool(self):
+        """
+        Pool of further connections to the same database, created when first
+        used.  (dConnectionPool) (read-only)
+        """
+        with self._poolLock:
+            if self._pool is None:
+                from .connection_pool import dConnectionPool
+
+                self._pool = dConnectionPool(self._connectInfo, forceCreate=self._forceCreate)
+        return self._pool
+
     @property
     def Name(self):
         """The name of the connection.  (str)"""
@@ -0,0 +1,274 @@
+# -*- coding: utf-8 -*-
+import contextlib
+import threading
+import time
+
+from .. import exceptions
+from .. import settings
+from ..base_object import dObject
+from ..localization import _
+from .connection import dConnection
+
+
+class dConnectionPool(dObject):
+    """
+    Pool of connections to one database, so that work running in other threads
+    (background requeries, reports, ...) doesn't share the connection, and with it
+    the transactions, of the UI.
+
+    Each pooled connection is a dConnection with its own backend object. Borrow one
+    with checkout() and give it back with checkin(), or use the connection() context
+    manager::
+
+        with conn.Pool.connection() as pooled:
+            crs = pooled.getDaboCursor()
+            crs.execute("select ...")
+
+    A connection that has not been used for ValidateAfter seconds is tested with the
+    backend's validationSQL when it is borrowed, and replaced if that fails; this
+    takes the place of the KeepAlive threads of unpooled connections. Idle
+    connections above MinSize are closed after IdleTimeout seconds.
+    """
+
+    def __init__(self, connectInfo, forceCreate=False, **kwargs):
+        self._baseClass = dConnectionPool
+        self._connectInfo = connectInfo
+        self._forceCreate = forceCreate
+        self._minSize = settings.connectionPoolMinSize
+        self._maxSize = settings.connectionPoolMaxSize
+        self._idleTimeout = settings.connectionPoolIdleTimeout
+        self._validateAfter = settings.connectionPoolValidateAfter
+        self._timeout = settings.connectionPoolTimeout
+        # Idle connections as (connection, time checked in), oldest first
+        self._idle = []
+        self._busy = set()
+        # Connections reserved by getThreadConnection(), keyed by thread
+        self._threadConnections = {}
+        self._closed = False
+        self._lock = threading.Condition()
+        super().__init__(**kwargs)
+        with self._lock:
+            self._fill()
+
+    def checkout(self, timeout=None):
+        """
+        Borrow a connection from the pool. If all MaxSize connections are in use,
+        wait up to timeout seconds (default: Timeout) for one to be checked in,
+        and then raise ConnectionPoolExhaustedException.
+        """
+        if timeout is None:
+            timeout = self._timeout
+        deadline = time.time() + timeout
+        with self._lock:
+            if self._closed:
+                raise exceptions.DatabaseException(_("The connection pool is closed"))
+            while True:
+                self._reclaimThreadConnections()
+                while self._idle:
+                    conn = self._idle.pop()[0]
+                    if self._validate(conn):
+                        self._busy.add(conn)
+                        return conn
+                    self._discard(conn)
+                if len(self._busy) < self._maxSize:
+                    conn = self._newConnection()
+                    self._busy.add(conn)
+                    return conn
+                remaining = deadline - time.time()
+                if remaining <= 0:
+                    raise exceptions.ConnectionPoolExhaustedException(
+                        _("All %s pooled connections are in use") % self._maxSize
+                    )
+                self._lock.wait(remaining)
+
+    def checkin(self, conn):
+        """Return a connection obtained from checkout(). Any open transaction is rolled back."""
+        with self._lock:
+            try:
+                self._busy.remove(conn)
+            except KeyError:
+                raise ValueError(_("The connection was not checked out of this pool"))
+            self._release(conn)
+            self._reap()
+            self._lock.notify()
+
+    @contextlib.contextmanager
+    def connection(self, timeout=None):
+        """Context manager that checks a connection out, and back in when the block ends."""
+        conn = self.checkout(timeout)
+        try:
+            yield conn
+        finally:
+            self.checkin(conn)
+
+    def getThreadConnection(self):
+        """
+        Return the connection reserved for the calling thread, checking one out the
+        first time. It goes back to the pool when releaseThreadConnection() is called,
+        or once the thread has ended.
+        """
+        thread = threading.current_thread()
+        with self._lock:
+            conn = self._threadConnections.get(thread)
+            if conn is None:
+                conn = self._threadConnections[thread] = self.checkout()
+        return conn
+
+    def releaseThreadConnection(self):
+        """Return the calling thread's connection, if it has one, to the pool."""
+        with self._lock:
+            conn = self._threadConnections.pop(threading.current_thread(), None)
+            if conn is not None:
+                self.checkin(conn)
+
+    def reap(self):
+        """Close the connections that have been idle longer than IdleTimeout."""
+        with self._lock:
+            self._reclaimThreadConnections()
+            self._reap()
+
+    def close(self):
+        """
+        Close the idle connections and the ones reserved for threads. Other connections
+        that are checked out are closed when they are checked in.
+        """
+        with self._lock:
+            self._closed = True
+            for conn in self._threadConnections.values():
+                self._busy.discard(conn)
+                self._release(conn)
+            self._threadConnections.clear()
+            while self._idle:
+                self._discard(self._idle.pop()[0])
+            self._lock.notify_all()
+
+    def _newConnection(self):
+        return dConnection(
+            self._connectInfo, parent=self, forceCreate=self._forceCreate, privateBackend=True
+        )
+
+    def _validate(self, conn):
+        bo = conn.getBackendObject()
+        if time.time() - bo.lastExecuteTime < self._validateAfter:
+            return True
+        return bo.isConnectionAlive()
+
+    def _discard(self, conn):
+        try:
+            conn.close()
+        except Exception:
+            pass
+
+    def _release(self, conn):
+        """Put a connection that is no longer in use back with the idle ones."""
+        if self._closed:
+            self._discard(conn)
+            return
+        try:
+            conn.getConnection().rollback()
+        except Exception:
+            # Not usable any more
+            self._discard(conn)
+            return
+        self._idle.append((conn, time.time()))
+
+    def _reclaimThreadConnections(self):
+        """Take back the connections reserved by threads that have ended."""
+        for thread, conn in list(self._threadConnections.items()):
+            if not thread.is_alive():
+                del self._threadConnections[thread]
+                self._busy.discard(conn)
+                self._release(conn)
+
+    def _reap(self):
+        cutoff = time.time() - self._idleTimeout
+        while (
+            self._idle
+            and self._idle[0][1] < cutoff
+            and len(self._idle) + len(self._busy) > self._minSize
+        ):
+            self._discard(self._idle.pop(0)[0])
+
+    def _fill(self):
+        """Open connections until there are at least MinSize."""
+        while not self._closed and len(self._idle) + len(self._busy) < self._minSize:
+            self._idle.append((self._newConnection(), time.time()))
+
+    @property
+    def ConnectInfo(self):
+        """The connectInfo for the pooled connections.  (dConnectInfo) (read-only)"""
+        return self._connectInfo
+
+    @property
+    def IdleCount(self):
+        """Number of open connections that aren't checked out.  (int) (read-only)"""
+        return len(self._idle)
+
+    @property
+    def IdleTimeout(self):
+        """
+        Seconds an unused connection is kept open when there are more than MinSize.
+        Default: settings.connectionPoolIdleTimeout  (int)
+        """
+        return self._idleTimeout
+
+    @IdleTimeout.setter
+    def IdleTimeout(self, val):
+        self._idleTimeout = val
+
+    @property
+    def MaxSize(self):
+        """
+        Most connections that can be open at once.
+        Default: settings.connectionPoolMaxSize  (int)
+        """
+        return self._maxSize
+
+    @MaxSize.setter
+    def MaxSize(self, val):
+        with self._lock:
+            self._maxSize = val
+            self._lock.notify_all()
+
+    @property
+    def MinSize(self):
+        """
+        Connections that are kept open even when unused.
+        Default: settings.connectionPoolMinSize  (int)
+        """
+        return self._minSize
+
+    @MinSize.setter
+    def MinSize(self, val):
+        with self._lock:
+            self._minSize = val
+            self._fill()
+
+    @property
+    def Size(self):
+        """Number of open connections, idle or checked out.  (int) (read-only)"""
+        return len(self._idle) + len(self._busy)
+
+    @property
+    def Timeout(self):
+        """
+        Seconds checkout() waits for a connection when all are in use.
+        Default: settings.connectionPoolTimeout  (float)
+        """
+        return self._timeout
+
+    @Timeout.setter
+    def Timeout(self, val):
+        self._timeout = val
+
+    @property
+    def ValidateAfter(self):
+        """
+        Seconds a connection can go unused before it is validated when borrowed.
+        Default: settings.connectionPoolValidateAfter  (float)
+        """
+        return self._validateAfter
+
+    @ValidateAfter.setter
+    def ValidateAfter(self, val):
+        self._validateAfter = val
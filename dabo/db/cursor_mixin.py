@@ -1,8 +1,11 @@
 # -*- coding: utf-8 -*-
+import bisect
 import datetime
 import functools
+import itertools
 import re
 import time
+import weakref
 from decimal import Decimal
 
 from .. import constants
@@ -16,6 +19,7 @@ from ..lib.utils import caseInsensitiveSortKey
 from ..lib.utils import noneSortKey
 from ..lib.utils import ustr
 from ..localization import _
+from .cursor_snapshot import dCursorSnapshot
 from .dataset import dDataSet
 from .no_esc_quote_str import dNoEscQuoteStr
 
@@ -23,19 +27,93 @@ cursor_flags = (
     constants.CURSOR_MEMENTO,
     constants.CURSOR_NEWFLAG,
     constants.CURSOR_TMPKEY_FIELD,
-    constants.CURSOR_FIELD_TYPES_CORRECTED,
 )
 
+# Shared by all cursors, so that a DataVersion value is never used for two data sets.
+_dataVersions = itertools.count(1)
 
 dabo_module = settings.get_dabo_package()
 
 
+class _RecordStream(object):
+    """
+    Returned by dCursorMixin.getRecordStream(). It can be used wherever a list of
+    records is expected and only gone through once: it supports len(), indexing,
+    which fetches rows into the cursor like getFieldVal() does, and iteration that
+    streams the rows that haven't been fetched.
+    """
+
+    def __init__(self, cursor):
+        self._cursor = cursor
+        self._len = cursor.RowCount
+
+    def __len__(self):
+        return self._len
+
+    def __getitem__(self, idx):
+        cursor = self._cursor
+        if isinstance(idx, int) and idx >= 0:
+            cursor._fetchToRow(idx)
+        else:
+            cursor._fetchRemaining()
+        return cursor._records[idx]
+
+    def __iter__(self):
+        return self._cursor._streamRecords()
+
+
+class _TypeConverters(dict):
+    """
+    Maps field names to functions that return the passed value converted to the
+    type of that field. Created by dCursorMixin._getTypeConverters(); 'correct' is
+    the cursor's _correctFieldType(), which handles the values that can't be
+    converted the quick way. Fields without a known type get a converter that only
+    needs to handle floats, which may have to become Decimals.
+    """
+
+    def __init__(self, correct):
+        super().__init__()
+        self._correct = correct
+
+    def addField(self, fld, pythonType, scale=None):
+        correct = self._correct
+        if pythonType is Decimal and scale is not None:
+            quantizer = Decimal(f"0.{scale * '0'}")
+
+            def convert(val):
+                if val is None or isinstance(val, Decimal):
+                    return val
+                try:
+                    return Decimal(ustr(val) if isinstance(val, float) else val).quantize(quantizer)
+                except Exception:
+                    # Let the general code handle (and log) it.
+                    return correct(val, fld)
+
+        else:
+
+            def convert(val):
+                if val is None or isinstance(val, pythonType):
+                    return val
+                return correct(val, fld)
+
+        self[fld] = convert
+
+    def __missing__(self, fld):
+        correct = self._correct
+
+        def convert(val):
+            if isinstance(val, float):
+                return correct(val, fld)
+            return val
+
+        self[fld] = convert
+        return convert
+
+
 class dCursorMixin(dObject):
     """Dabo's cursor class, representing the lowest tier."""
 
     _call_initProperties = False
-    # Make these class attributes, so that they are shared among all instances
-    _fieldStructure = {}
 
     def __init__(self, sql="", *args, **kwargs):
         self._convertStrToUnicode = True
@@ -75,7 +153,8 @@ class dCursorMixin(dObject):
         self.descriptionClean = None
         # Last executed sql params
         self.lastParams = None
-        # Column on which the result set is sorted
+        # Column on which the result set is sorted. A tuple of column names when
+        # sorting on more than one column.
         self.sortColumn = ""
         # Order of the sorting. Should be either ASC, DESC or empty for no sort
         self.sortOrder = ""
@@ -91,8 +170,20 @@ class dCursorMixin(dObject):
         self.__lastFieldList = ""
         self._whitespacePat = re.compile(r"(\s+)")
         self._selectStatementPat = re.compile(r"\bselect\b(.+)\bfrom\b", re.I | re.M | re.S)
-        # Holds the keys in the original, unsorted order for unsorting the dataset
-        self.__unsortedRows = []
+        # Holds the records in the original, unsorted order for unsorting the dataset
+        self.__unsortedRows = None
+        # Maps (column, caseSensitive) to the sort keys for that column, in the same
+        # order as the records in the dataset they were built for: (records, keys).
+        self._sortKeyCache = {}
+        # (records, columns, caseSensitive, order) of the last sort, as long as the
+        # values haven't been changed since.
+        self._lastSort = None
+        # Maps (fields, caseSensitive) to the sorted index used by seek() for those
+        # fields: (records, keys, rows, compStrings).
+        self._seekIndexCache = {}
+        # Maps the names of the virtual fields that declare 'depends_on' to their
+        # cached values: (definition, {PK: value}).
+        self._virtualFieldCache = {}
         # Holds the name of fields to be skipped when updating the backend, such
         # as calculated or derived fields, or fields that are otherwise not to be updated.
         self.__nonUpdateFields = None
@@ -106,6 +197,13 @@ class dCursorMixin(dObject):
         self.sqlManager = self
         # Attribute that holds the data of the cursor
         self._records = dDataSet()
+        # Changes whenever the records or their values change; see DataVersion.
+        self._dataVersion = next(_dataVersions)
+        # Maps PK values to row numbers. It is tied to the _records object it was
+        # built from, and gets rebuilt on first use after _records is replaced.
+        self._pkIndex = None
+        self._pkIndexRecords = None
+        self._pkIndexHasDups = False
         # Attribute that holds the current row number
         self.__rownumber = -1
         # Data structure info
@@ -117,6 +215,21 @@ class dCursorMixin(dObject):
 
         self._autoPopulatePK = True
         self._autoQuoteNames = True
+        self._columnarStorage = False
+        # Maps field names to their DataStructure entries and type codes; rebuilt
+        # when DataStructure changes.
+        self._dataStructureMap = {}
+        self._fieldTypeMap = {}
+        self._dataStructureMapSource = None
+        # True when the records were loaded by the bizobj's prefetch(), and haven't been used yet
+        self._prefetched = False
+        # Per-field type correction functions; rebuilt when the field types change.
+        self._typeConverters = None
+        self._typeConvertersSource = None
+        # Number of rows to get from the backend at a time; 0 means all at once.
+        self._fetchSize = 0
+        # Set while there are rows of the last query that haven't been fetched yet.
+        self._clearFetchPending()
 
         self.__tmpPK = -1  # temp PK value for new records.
         # Holds the data types for each field
@@ -145,6 +258,10 @@ class dCursorMixin(dObject):
         # mementos and new records, keyed on record object ids:
         self._mementos = {}
         self._newRecords = {}
+        # Open snapshots of the cursor, and whether they share the current
+        # mementos and new record flags.
+        self._snapshots = weakref.WeakSet()
+        self._snapshotShared = False
 
         # Flag preference cursors so that they don't fill up the logs
         self._isPrefCursor = False
@@ -191,7 +308,8 @@ class dCursorMixin(dObject):
                 rec = {}
         # Prevent correction of empty rows.
         if rec:
-            self._correctFieldTypesIfNeeded(rec)
+            kf = self.KeyField
+            self._correctRecordTypes(rec, kf if isinstance(kf, tuple) else (kf,))
         if isinstance(self.KeyField, tuple):
             if rec:
                 pk = tuple([rec[kk] for kk in self.KeyField])
@@ -212,12 +330,72 @@ class dCursorMixin(dObject):
             pkField = self.KeyField
         return pkField
 
-    def _correctFieldTypesIfNeeded(self, rec):
-        if not rec.get(constants.CURSOR_FIELD_TYPES_CORRECTED, False):
-            _correctFieldType = self._correctFieldType
-            for fld_name in (i for i in rec if i not in cursor_flags):
-                rec[fld_name] = _correctFieldType(rec[fld_name], fld_name)
-            rec[constants.CURSOR_FIELD_TYPES_CORRECTED] = True
+    def _getTypeConverters(self):
+        """
+        Returns a _TypeConverters dict mapping field names to a function that corrects
+        the type of a value for that field. It is built once for the current field types
+        and DataStructure, so that the type and scale lookups aren't repeated for every
+        value. Values that already have the right type are returned unchanged; the rest
+        go through _correctFieldType().
+        """
+        types = self._types
+        dataStructure = getattr(self, "_dataStructure", None)
+        if (
+            self._typeConverters is not None
+            and self._typeConvertersSource[0] is types
+            and self._typeConvertersSource[1] is dataStructure
+        ):
+            return self._typeConverters
+        scales = {}
+        if Decimal in list(types.values()):
+            scales = dict([(fld[0], fld[5]) for fld in self.DataStructure])
+            dataStructure = getattr(self, "_dataStructure", None)
+        converters = _TypeConverters(self._correctFieldType)
+        for fld, pythonType in list(types.items()):
+            if pythonType and isinstance(pythonType, type):
+                converters.addField(fld, pythonType, scales.get(fld))
+        self._typeConverters = converters
+        self._typeConvertersSource = (types, dataStructure)
+        return converters
+
+    def _correctRowTypes(self, fldNames, rows):
+        """
+        Corrects the field types of the passed rows, which are sequences of values in
+        the order of 'fldNames'. The values are converted a column at a time, and the
+        corrected rows are returned.
+        """
+        if not rows:
+            return rows
+        converters = self._getTypeConverters()
+        cols = [[converters[fld](val) for val in col] for fld, col in zip(fldNames, zip(*rows))]
+        return list(zip(*cols))
+
+    def _correctDataSetTypes(self, ds):
+        """Corrects the field types of all the records in the passed dataset, a field at a time."""
+        if not ds:
+            return
+        converters = self._getTypeConverters()
+        for fld in [fld for fld in ds[0] if fld not in cursor_flags]:
+            convert = converters[fld]
+            for rec in ds:
+                try:
+                    val = rec[fld]
+                except KeyError:
+                    continue
+                newVal = convert(val)
+                if newVal is not val:
+                    rec[fld] = newVal
+
+    def _correctRecordTypes(self, rec, flds):
+        """Corrects the types of the passed fields of a single record, in place."""
+        converters = self._getTypeConverters()
+        for fld in flds:
+            if fld not in rec:
+                continue
+            val = rec[fld]
+            newVal = converters[fld](val)
+            if newVal is not val:
+                rec[fld] = newVal
 
     def _correctFieldType(self, field_val, field_name):
         """
@@ -259,15 +437,14 @@ class dCursorMixin(dObject):
         elif pythonType in (datetime.date,) and isinstance(field_val, str):
             return tryToCorrect(dates.getDateFromString, field_val, field_name)
         elif pythonType in (Decimal,):
-            ds = self.DataStructure
             _field_val = field_val
             if type(field_val) in (float,):
                 # Can't convert to decimal directly from float
                 _field_val = ustr(_field_val)
             # Need to convert to the correct scale:
             try:
-                scale = [s[5] for s in ds if s[0] == field_name][0]
-            except IndexError:
+                scale = self.getDataStructureMap()[field_name][5]
+            except (KeyError, IndexError):
                 scale = None
             if scale is None:
                 try:
@@ -351,6 +528,8 @@ class dCursorMixin(dObject):
             sql = self._qMarkToParamPlaceholder(sql)
         # Some backends, notably Firebird, require that fields be specially marked.
         sql = self.processFields(sql)
+        # Any rows of a previous query that haven't been fetched are gone now.
+        self._clearFetchPending()
         try:
             if params:
                 res = self.superCursor.execute(self, sql, params)
@@ -391,13 +570,24 @@ class dCursorMixin(dObject):
         if self._newStructure(sql):
             self._storeFieldTypes()
 
-        if sql.split(None, 1)[0].lower() not in ("select", "pragma"):
+        verb = sql.split(None, 1)[0].lower()
+        if verb in ("create", "alter", "drop"):
+            # The cached field information may no longer match the tables.
+            self.BackendObject.invalidateSchemaCache()
+        if verb not in ("select", "pragma"):
             # No need to massage the data for DML commands
             self._records = dDataSet(tuple())
+            self._bumpDataVersion()
             return res
 
+        fetchSize = self._fetchSize
         try:
-            _records = self.fetchall()
+            if fetchSize > 0:
+                # Only get the first batch; the rest are fetched as they are needed.
+                _records = self.fetchmany(fetchSize)
+                self._fetchPending = len(_records) >= fetchSize
+            else:
+                _records = self.fetchall()
         except Exception as e:
             _records = dDataSet()
             # Database errors need to be decoded from database encoding.
@@ -406,23 +596,157 @@ class dCursorMixin(dObject):
             except UnicodeError:
                 errMsg = ustr(e)
             dabo_module.error(f"Error fetching records: ({type(e)}, {errMsg})")
-
-        if _records and isinstance(_records[0], (tuple, list)):
-            # Need to convert each row to a Dict, since the backend didn't do it.
-            tmpRows = []
-            fldNames = [f[0] for f in self.FieldDescription]
-            for row in _records:
-                dic = {}
-                for idx, fldName in enumerate(fldNames):
-                    dic[fldName] = row[idx]
-                tmpRows.append(dic)
-            _records = tmpRows
-
-        self._records = dDataSet(_records)
+        if self._fetchPending:
+            # Needed if we have to ask the backend for the total row count.
+            self._pendingSQL = sql
+            self._pendingParams = params
+            self._pendingFetched = len(_records)
+
+        self._records = self._makeDataSet(_records)
+        self._bumpDataVersion()
         # This will handle bounds issues
         self.RowNumber = self.RowNumber
         return res
 
+    def _makeDataSet(self, rows, appendTo=None):
+        """
+        Converts the rows returned by the backend into a dDataSet. If 'appendTo' is
+        passed, the rows are added to the end of that dataset.
+        """
+        if self._columnarStorage:
+            # Store the data column-wise instead of creating a dict for each row.
+            fldNames = [f[0] for f in self.FieldDescription]
+            if rows and not isinstance(rows[0], (tuple, list)):
+                rows = [[rec[fld] for fld in fldNames] for rec in rows]
+            rows = self._correctRowTypes(fldNames, rows)
+            if appendTo and appendTo._getColumnStore() is not None:
+                return appendTo.extendRows(rows)
+            ret = dDataSet.fromRows(fldNames, rows)
+        else:
+            if rows and isinstance(rows[0], (tuple, list)):
+                # Need to convert each row to a Dict, since the backend didn't do it.
+                tmpRows = []
+                fldNames = [f[0] for f in self.FieldDescription]
+                for row in rows:
+                    dic = {}
+                    for idx, fldName in enumerate(fldNames):
+                        dic[fldName] = row[idx]
+                    tmpRows.append(dic)
+                rows = tmpRows
+            ret = dDataSet(rows)
+            self._correctDataSetTypes(ret)
+        if appendTo:
+            ret = appendTo + ret
+        return ret
+
+    def _fetchMore(self, fetchAll=False):
+        """
+        Gets the next batch of rows of the last query from the backend when FetchSize
+        is set, or all of the remaining rows if 'fetchAll' is True.
+        """
+        if not self._fetchPending:
+            return
+        fetchSize = self._fetchSize
+        try:
+            if fetchAll or fetchSize <= 0:
+                rows = self.fetchall()
+            else:
+                rows = self.fetchmany(fetchSize)
+        except Exception as e:
+            rows = []
+            dabo_module.error(f"Error fetching records: ({type(e)}, {ustr(e)})")
+        if fetchAll or fetchSize <= 0 or len(rows) < fetchSize:
+            self._clearFetchPending()
+        if rows:
+            self._pendingFetched += len(rows)
+            self._records = self._makeDataSet(rows, appendTo=self._records)
+            self._bumpDataVersion()
+
+    def _fetchToRow(self, row):
+        """Makes sure that the passed row number has been fetched, if it exists."""
+        while self._fetchPending and row >= len(self._records):
+            self._fetchMore()
+
+    def _fetchRemaining(self):
+        """Gets all the rows of the last query that haven't been fetched yet."""
+        if self._fetchPending:
+            self._fetchMore(fetchAll=True)
+
+    def _clearFetchPending(self):
+        self._fetchPending = False
+        self._pendingRowCount = None
+        self._pendingRemoved = 0
+        # The number of rows of the last query that have been read from the backend
+        self._pendingFetched = 0
+        self._pendingSQL = self._pendingParams = None
+
+    def _getPendingRowCount(self):
+        """
+        Returns the total number of rows in the last query's result while some of
+        them are still waiting to be fetched. The count is obtained from the backend
+        with a 'select count(*)' around the query; if that fails, all of the rows
+        are fetched instead.
+        """
+        if self._pendingRowCount is None:
+            sql = self._pendingSQL.strip().rstrip(";")
+            aux = self.AuxCursor
+            try:
+                aux.execute(
+                    f"select count(*) as dabo_count from ({sql}) dabo_rowcount",
+                    self._pendingParams,
+                    errorClass=Exception,
+                )
+                rec = aux._records[0]
+                self._pendingRowCount = int(list(rec.values())[0]) - self._pendingRemoved
+            except Exception:
+                self._fetchRemaining()
+                return len(self._records)
+        return self._pendingRowCount
+
+    def getRecordStream(self):
+        """
+        Returns a sequence-like object for going through all the records of the last
+        query once, such as for feeding a report. When FetchSize is set and not all the
+        rows have been fetched yet, the remaining ones are read from the backend one
+        batch at a time and handed out without being stored in the cursor, so that
+        very large results can be processed without holding them all in memory.
+
+        The rows that haven't been fetched are read by running the query again with
+        a separate cursor, so going through the stream leaves this cursor as it was.
+        """
+        return _RecordStream(self)
+
+    def _streamRecords(self):
+        row = 0
+        while row < len(self._records):
+            yield self._records[row]
+            row += 1
+        if not self._fetchPending:
+            return
+        fetchSize = self._fetchSize or 1
+        skip = self._pendingFetched
+        crs = self.BackendObject.getCursor(self.__class__)
+        crs.BackendObject = self.BackendObject
+        crs._isPrefCursor = self._isPrefCursor
+        try:
+            crs._executeUnstored(self._pendingSQL, self._pendingParams)
+            while True:
+                try:
+                    # Skip the rows that this cursor has already fetched.
+                    rows = crs.fetchmany(min(skip, fetchSize) if skip else fetchSize)
+                except Exception as e:
+                    rows = []
+                    dabo_module.error(f"Error fetching records: ({type(e)}, {ustr(e)})")
+                if not rows:
+                    break
+                if skip:
+                    skip -= len(rows)
+                    continue
+                for rec in self._makeDataSet(rows):
+                    yield rec
+        finally:
+            crs.close()
+
     def executeSafe(self, sql, params=None):
         """
         Execute the passed SQL using an auxiliary cursor.
@@ -485,7 +809,40 @@ class dCursorMixin(dObject):
         self._savedStructureDescription = []
 
         self.execute(currSQL, params, convertQMarks=convertQMarks)
+        self._finishRequery(newQuery)
+        return True
 
+    def _fetchRequeryData(self, conn, sql, params=None, convertQMarks=False):
+        """
+        Runs the passed query on a cursor of the passed connection, without touching
+        this cursor, so that it can be called from another thread. Returns the data
+        for _applyRequeryData(), which must be called on the thread that owns this
+        cursor. All the rows are fetched, regardless of FetchSize.
+        """
+        crs = conn.getDaboCursor()
+        crs.execute(sql, params, convertQMarks=convertQMarks)
+        return (sql, params, crs.descriptionClean, list(crs._records))
+
+    def _applyRequeryData(self, data):
+        """Makes the result of _fetchRequeryData() this cursor's data, as requery() would."""
+        sql, params, description, rows = data
+        newQuery = self._lastSQL != sql
+        self._lastSQL = sql
+        self.lastParams = params
+        self._savedStructureDescription = []
+        self._clearFetchPending()
+        self.descriptionClean = description
+        if self._newStructure(sql):
+            self._storeFieldTypes()
+        self._records = self._makeDataSet(rows)
+        self._bumpDataVersion()
+        # This will handle bounds issues
+        self.RowNumber = self.RowNumber
+        self._finishRequery(newQuery)
+
+    def _finishRequery(self, newQuery):
+        """Resets the cursor state after new data has been loaded by a requery."""
+        self._prefetched = False
         # clear mementos and new record flags:
         self._mementos = {}
         self._newRecords = {}
@@ -498,14 +855,14 @@ class dCursorMixin(dObject):
             self.__setNonUpdateFields()
 
         # Clear the unsorted list, and then apply the current sort
-        self.__unsortedRows = []
+        self.__unsortedRows = None
+        self._clearSortKeys()
         if self.sortColumn:
             try:
                 self.sort(self.sortColumn, self.sortOrder)
             except exceptions.NoRecordsException:
                 # No big deal
                 pass
-        return True
 
     def _storeFieldTypes(self, target=None):
         """Stores the data type for each column in the result set."""
@@ -535,18 +892,25 @@ class dCursorMixin(dObject):
             CYCLE
 
         Only the first three characters are significant; case is ignored.
+
+        To sort on more than one column, pass a tuple or list of column names for 'col';
+        the rows are ordered by the first column, then by the second, and so on.
         """
         currCol = self.sortColumn
         currOrd = self.sortOrder
+        if isinstance(col, list):
+            col = tuple(col)
         if not ordr:
             ordr = "ASC"
         if ordr[:3].upper() == "CYC":
-            ordr = {"ASC": "DESC", "DES": None, None: "ASC"}[currOrd]
+            ordr = {"ASC": "DESC", "DESC": None}.get(currOrd, "ASC")
             col = currCol
 
         # Make sure that the specified column is a column in the result set
-        if not [True for t in self.DataStructure if t[0] == col] and col not in self.VirtualFields:
-            raise exceptions.dException(_("Invalid column specified for sort: ") + col)
+        fldNames = self.getDataStructureMap()
+        for sortCol in col if isinstance(col, tuple) else (col,):
+            if sortCol not in fldNames and sortCol not in self.VirtualFields:
+                raise exceptions.dException(_("Invalid column specified for sort: ") + sortCol)
 
         newCol = col
         if col == currCol:
@@ -588,65 +952,137 @@ class dCursorMixin(dObject):
         Sort the rows of the cursor.
 
         At this point, we know we have a valid column and order. We need to
-        preserve the unsorted order if we haven't done that yet; then we sort
-        the data according to the request.
+        preserve the unsorted order if we haven't done that yet; then we work out
+        the new order of the rows as a permutation of the current one, and apply it.
+        Flipping the order of the last sort just reverses the rows, and restoring
+        the unsorted order doesn't need to compare any values.
         """
         kf = self.KeyField
         if not kf or not self.RowCount:
             return
-
-        if not self.__unsortedRows:
-            # Record the PK values
-            for row in self._records:
-                if self._compoundKey:
-                    key = tuple([row[k] for k in kf])
-                    self.__unsortedRows.append(key)
-                else:
-                    self.__unsortedRows.append(row[kf])
-
-        # First, preserve the PK of the current row so that we can reset
-        # the RowNumber property to point to the same row in the new order.
-        try:
-            if self._compoundKey:
-                currRow = self._records[self.RowNumber]
-                currRowKey = tuple([currRow[k] for k in kf])
-            else:
-                currRowKey = self._records[self.RowNumber][kf]
-        except IndexError:
-            # Row no longer exists, such as after a Requery that returns
-            # fewer rows.
-            currRowKey = None
-        # Create the list to hold the rows for sorting
-        sortList = []
+        self._fetchRemaining()
+        records = self._records
+        if self.__unsortedRows is None:
+            # Remember the records in their original order
+            self.__unsortedRows = records
+
+        cols = col if isinstance(col, tuple) else (col,)
+        lastSort = self._lastSort
         if not ordr:
             # Restore the rows to their unsorted order
-            for row in self._records:
-                if self._compoundKey:
-                    key = tuple([row[k] for k in kf])
-                    sortList.append([self.__unsortedRows.index(key), row])
-                else:
-                    sortList.append([self.__unsortedRows.index(row[kf]), row])
+            perm = self.__getUnsortPermutation()
+        elif (
+            lastSort is not None
+            and lastSort[0] is records
+            and lastSort[1:3] == (cols, caseSensitive)
+            and lastSort[3] != ordr
+        ):
+            # Same values, opposite direction.
+            perm = range(len(records) - 1, -1, -1)
         else:
-            for row, rec in enumerate(self._records):
-                sortList.append([self.getFieldVal(col, row), rec])
-        # At this point we have a list consisting of lists. Each of these member
-        # lists contain the sort value in the zeroth element, and the row as
-        # the first element.
-        # First, see if we are comparing strings
-        compString = isinstance(sortList[0][0], str)
+            keys = self.__getSortKeys(cols, caseSensitive)
+            perm = sorted(range(len(records)), key=keys.__getitem__, reverse=(ordr == "DESC"))
+        self.__applyPermutation(perm)
+        self._lastSort = (self._records, cols, caseSensitive, ordr) if ordr else None
 
+    def __getSortKeys(self, cols, caseSensitive):
+        """
+        Returns the list of sort keys for the current records, in the same order as
+        the records. The keys for each (non-virtual) column are cached until the
+        values in that column are changed.
+        """
+        records = self._records
+        colKeys = []
+        for col in cols:
+            if col in self.VirtualFields:
+                # These can depend on anything, so they are never cached.
+                vals = self._getVirtualFieldVals(col, range(len(records)))
+                colKeys.append(self.__makeSortKeys(vals, caseSensitive))
+                continue
+            cached = self._sortKeyCache.get((col, caseSensitive))
+            if cached is not None and cached[0] is records:
+                colKeys.append(cached[1])
+                continue
+            if records._getColumnStore() is not None:
+                # Columnar data: read the values straight from the column.
+                vals = records._columnValues(col)
+            else:
+                vals = [rec[col] for rec in records]
+            convert = self._getTypeConverters()[col]
+            keys = self.__makeSortKeys([convert(val) for val in vals], caseSensitive)
+            self._sortKeyCache[(col, caseSensitive)] = (records, keys)
+            colKeys.append(keys)
+        if len(colKeys) == 1:
+            return colKeys[0]
+        return list(zip(*colKeys))
+
+    def __makeSortKeys(self, vals, caseSensitive):
+        """Returns the sort keys for the passed column values."""
+        compString = isinstance(next((val for val in vals if val is not None), None), str)
         if compString and not caseSensitive:
             sortKey = caseInsensitiveSortKey
         else:
             sortKey = noneSortKey
-        sortList.sort(key=sortKey, reverse=(ordr == "DESC"))
+        return [sortKey((val,)) for val in vals]
 
-        # Extract the rows into a new list, then convert them back to the _records tuple
-        newRows = [elem[1] for elem in sortList]
-        self._records = dDataSet(newRows)
+    def __getUnsortPermutation(self):
+        """
+        Returns the permutation of the current rows that puts them back in their
+        original order. Rows that weren't in the original data set, such as new
+        records, go at the end.
+        """
+        currRows = dict([(id(rec), row) for row, rec in enumerate(self._records)])
+        perm = [currRows[id(rec)] for rec in self.__unsortedRows if id(rec) in currRows]
+        if len(perm) < len(currRows):
+            unsorted = set([id(rec) for rec in self.__unsortedRows])
+            perm.extend([row for row, rec in enumerate(self._records) if id(rec) not in unsorted])
+        return perm
+
+    def __applyPermutation(self, perm):
+        """
+        Reorders the records so that new row 'n' is the record that was at row
+        perm[n], keeping the record pointer, the PK index and the cached sort keys
+        in step.
+        """
+        records = self._records
+        newPos = [0] * len(records)
+        for row, oldRow in enumerate(perm):
+            newPos[oldRow] = row
+        newRecords = dDataSet([records[oldRow] for oldRow in perm])
+        if self._pkIndexIsCurrent() and not self._pkIndexHasDups:
+            self._pkIndex = dict([(key, newPos[row]) for key, row in self._pkIndex.items()])
+            self._pkIndexRecords = newRecords
+        for cacheKey, (keyRecords, keys) in list(self._sortKeyCache.items()):
+            if keyRecords is records:
+                self._sortKeyCache[cacheKey] = (newRecords, [keys[oldRow] for oldRow in perm])
+            else:
+                del self._sortKeyCache[cacheKey]
+        currRow = self.RowNumber
+        self._records = newRecords
+        self._bumpDataVersion()
+        # Keep the pointer on the same record.
+        if 0 <= currRow < len(newPos):
+            self.RowNumber = newPos[currRow]
+        else:
+            self.RowNumber = 0
 
-        # restore the RowNumber
-        self.moveToPK(currRowKey)
+    def _clearSortKeys(self, fld=None):
+        """
+        Discards the cached sort keys and seek indexes for the passed field, or for
+        all fields if no field is passed. Must be called whenever values in the
+        records change. If no field is passed, the cached virtual field values are
+        discarded as well.
+        """
+        if fld is None:
+            self._sortKeyCache = {}
+            self._seekIndexCache = {}
+            self._virtualFieldCache = {}
+        else:
+            self._sortKeyCache.pop((fld, True), None)
+            self._sortKeyCache.pop((fld, False), None)
+            for cacheKey in [key for key in self._seekIndexCache if fld in key[0]]:
+                del self._seekIndexCache[cacheKey]
+        self._lastSort = None
 
     @staticmethod
     def getType(val):
@@ -679,6 +1115,7 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
         colTemplate = """            <column name="%s" type="%s">%s</column>"""
 
         rowXML = ""
+        self._fetchRemaining()
         for rec in self._records:
             recInfo = [
                 colTemplate % (k, self.getType(v), self.escape(v)) for k, v in list(rec.items())
@@ -784,12 +1221,42 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
 
         """
         pk = None
+        self._beforeChange(self._records[self.RowNumber])
         if self.KeyField:
             pk = self.getPK()
             self._newRecords[pk] = None
+            self._notifyChanged()
         # Add the 'new record' flag
         self._records[self.RowNumber][constants.CURSOR_TMPKEY_FIELD] = pk
 
+    def _notifyChanged(self):
+        """Let the bizobj that owns this cursor know that it now holds changes."""
+        biz = self._bizobj
+        if biz is not None:
+            biz._cursorChanged(self)
+
+    def _bumpDataVersion(self):
+        """Called whenever the records, or the values in them, have changed."""
+        self._dataVersion = next(_dataVersions)
+
+    def _beforeChange(self, rec=None):
+        """
+        Called before the mementos, the new record flags or the passed record are
+        changed in place. If there are open snapshots, the mementos and flags are
+        copied the first time that this happens after a snapshot is taken, and the
+        snapshots keep a copy of the record the first time that it is changed.
+        """
+        snapshots = self._snapshots
+        if not snapshots:
+            return
+        if self._snapshotShared:
+            self._mementos = dict([(pk, dict(mem)) for pk, mem in self._mementos.items()])
+            self._newRecords = dict(self._newRecords)
+            self._snapshotShared = False
+        if rec is not None:
+            for snapshot in snapshots:
+                snapshot._keepRecord(rec)
+
     def genTempAutoPK(self):
         """
         Create a temporary PK for a new record. Set the key field to this
@@ -811,12 +1278,19 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
         # are assigned to the same child, we need to use sqlManager
         # for temporary key creation.
         tmpPK = self.sqlManager._genTempPKVal(pkVal)
+        oldKey = self._pkForRecord(rec)
+        self._beforeChange(rec)
         if isinstance(kf, tuple):
             for key in kf:
                 rec[key] = tmpPK
+            newKey = tuple([tmpPK for key in kf])
         else:
             rec[kf] = tmpPK
+            newKey = tmpPK
         rec[constants.CURSOR_TMPKEY_FIELD] = tmpPK
+        self._updatePKIndex(oldKey, newKey, self.RowNumber)
+        self._bumpDataVersion()
+        self._clearSortKeys()
         return tmpPK
 
     def _genTempPKVal(self, pkValue):
@@ -860,6 +1334,8 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
 
     def getFieldVal(self, fld, row=None, _rowChangeCallback=None):
         """Return the value of the specified field in the current or specified row."""
+        if row is not None and self._fetchPending:
+            self._fetchToRow(row)
         _records = self._records
         if not _records:
             raise exceptions.NoRecordsException(_("No records in dataset '%s'.") % self.Table)
@@ -872,41 +1348,115 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
             raise exceptions.RowNotFoundException(
                 _("Row #%(row)s requested, but the data set has only %(cnt)s row(s),") % locals()
             )
-        self._correctFieldTypesIfNeeded(rec)
         if isinstance(fld, (tuple, list)):
             return list(map(functools.partial(self.getFieldVal, row=row), fld))
         if fld in rec:
-            return rec[fld]
+            val = rec[fld]
+            ret = self._getTypeConverters()[fld](val)
+            if ret is not val:
+                rec[fld] = ret
+            return ret
         elif fld in self.VirtualFields:
-            vf = self.VirtualFields[fld]
-            if not isinstance(vf, dict):
-                vf = {"func": vf}
-            vf.setdefault("args", ())
-            vf.setdefault("kwargs", {})
-
-            requery_children = vf.get("requery_children", False) and bool(_rowChangeCallback)
-
-            # Move to specified row if necessary, and then call the VirtualFields
-            # function, which expects to be on the correct row.
-            if not requery_children:
-                # The VirtualFields 'requery_children' key is False, or
-                # we aren't being called by a bizobj, so there aren't child bizobjs.
-                _oldrow = self.RowNumber
-                self.RowNumber = row
-                ret = vf["func"](*vf["args"], **vf["kwargs"])
-                self.RowNumber = _oldrow
-                return ret
-            else:
-                # The VirtualFields definition's 'requery_children' key is True, so
-                # we need to request a row change and requery of any child bizobjs
-                # as necessary, before executing the virtual field function.
-                _rowChangeCallback(row)
-                return vf["func"](*vf["args"], **vf["kwargs"])
+            return self._getVirtualFieldVals(fld, (row,), _rowChangeCallback)[0]
         else:
             raise exceptions.FieldNotFoundException(
                 f"{_('Field')} '{fld}' {_('does not exist in the data set')}"
             )
 
+    def _getVirtualFieldVals(self, fld, rows, _rowChangeCallback=None):
+        """
+        Returns a list with the value of the passed virtual field for each of the rows.
+        The values of virtual fields that declare 'depends_on' are cached for each
+        record, and only computed for the records that have no cached value.
+        """
+        vf = self.VirtualFields[fld]
+        if not isinstance(vf, dict):
+            vf = {"func": vf}
+        vf.setdefault("args", ())
+        vf.setdefault("kwargs", {})
+        if "depends_on" not in vf or not self.KeyField:
+            return self._computeVirtualFieldVals(vf, rows, _rowChangeCallback)
+
+        cached = self._virtualFieldCache.get(fld)
+        if cached is None or cached[0] is not vf:
+            # Not cached yet, or the definition has been replaced since.
+            cached = self._virtualFieldCache[fld] = (vf, {})
+        cache = cached[1]
+        _records = self._records
+        _pkForRecord = self._pkForRecord
+        pks = [_pkForRecord(_records[row]) for row in rows]
+        missing = [idx for idx, pk in enumerate(pks) if pk not in cache]
+        if missing:
+            vals = self._computeVirtualFieldVals(
+                vf, [rows[idx] for idx in missing], _rowChangeCallback
+            )
+            for idx, val in zip(missing, vals):
+                cache[pks[idx]] = val
+        return [cache[pk] for pk in pks]
+
+    def _computeVirtualFieldVals(self, vf, rows, _rowChangeCallback=None):
+        """Calls the function(s) of the passed virtual field definition for the rows."""
+        args, kwargs = vf["args"], vf["kwargs"]
+        batchFunc = vf.get("batch_func")
+        if batchFunc is not None:
+            # Computes the values for all of the rows at once, without moving to them.
+            return list(batchFunc(list(rows), *args, **kwargs))
+        func = vf["func"]
+
+        requery_children = vf.get("requery_children", False) and bool(_rowChangeCallback)
+
+        # Move to each row, and then call the VirtualFields function, which
+        # expects to be on the correct row.
+        ret = []
+        if not requery_children:
+            # The VirtualFields 'requery_children' key is False, or
+            # we aren't being called by a bizobj, so there aren't child bizobjs.
+            _oldrow = self.RowNumber
+            try:
+                for row in rows:
+                    self.RowNumber = row
+                    ret.append(func(*args, **kwargs))
+            finally:
+                self.RowNumber = _oldrow
+        else:
+            # The VirtualFields definition's 'requery_children' key is True, so
+            # we need to request a row change and requery of any child bizobjs
+            # as necessary, before executing the virtual field function.
+            for row in rows:
+                _rowChangeCallback(row)
+                ret.append(func(*args, **kwargs))
+        return ret
+
+    def _invalidateVirtualFields(self, fld, rec=None):
+        """
+        Discards the cached values of the virtual fields that depend on the passed
+        field: only their values for the passed record, or for all of the records.
+        """
+        cache = self._virtualFieldCache
+        if not cache:
+            return
+        pk = None if rec is None else self._pkForRecord(rec)
+        for vfld, (vf, vals) in list(cache.items()):
+            if fld in vf.get("depends_on", ()):
+                if pk is None:
+                    del cache[vfld]
+                else:
+                    vals.pop(pk, None)
+
+    def clearVirtualFieldCache(self, flds=None):
+        """
+        Discards the cached values of the passed virtual fields, or of all of them.
+        Call this when a virtual field that declares 'depends_on' also depends on
+        data that isn't in the record, and that data has changed.
+        """
+        if flds is None:
+            self._virtualFieldCache = {}
+            return
+        if isinstance(flds, str):
+            flds = (flds,)
+        for fld in flds:
+            self._virtualFieldCache.pop(fld, None)
+
     def _fldTypeFromDB(self, fld):
         """
         Try to determine the field type from the database information
@@ -955,6 +1505,8 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
             row, rec = self._getRecordByPk(pk)
         elif row is None:
             row = self.RowNumber
+        elif self._fetchPending:
+            self._fetchToRow(row)
 
         if not rec:
             try:
@@ -1049,6 +1601,9 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
         if old_val == val:
             return False
         else:
+            self._beforeChange(rec)
+            # Holds the old PK value when a key field is being changed.
+            pkChange = None
             if valid_pk:
                 if (fld == keyField) or (self._compoundKey and fld in keyField):
                     # Changing the key field value, need to key the mementos on the new
@@ -1067,6 +1622,7 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
                         # Should't ever happen, but just in case of desynchronization.
                         if constants.CURSOR_TMPKEY_FIELD in rec:
                             rec[constants.CURSOR_TMPKEY_FIELD] = keyFieldValue
+                    pkChange = self._pkForRecord(rec)
                 elif self._compoundKey:
                     keyFieldValue = tuple([rec[k] for k in keyField])
                 else:
@@ -1087,6 +1643,7 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
                     pass
                 if mem:
                     self._mementos[keyFieldValue] = mem
+                    self._notifyChanged()
                 else:
                     self._clearMemento(row)
             else:
@@ -1097,6 +1654,12 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
 
             # Finally, save the new value to the field and signify that the field was changed:
             rec[fld] = val
+            self._records.dataChanged()
+            self._bumpDataVersion()
+            self._clearSortKeys(fld)
+            self._invalidateVirtualFields(fld, rec)
+            if pkChange is not None:
+                self._updatePKIndex(pkChange, self._pkForRecord(rec), row)
             return True
 
     def lookupPKWithAdd(self, field, val, tbl=None, pkCol=None):
@@ -1288,10 +1851,8 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
         """
         ret = {}
         if pk is not None:
-            recs = [r for r in self._records if r[self._keyField] == pk]
-            try:
-                rec = recs[0]
-            except IndexError:
+            row, rec = self._getRecordByPk(pk, raiseRowNotFound=False)
+            if rec is None:
                 return ret
         else:
             if row is None:
@@ -1318,10 +1879,8 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
         """
         ret = {}
         if pk is not None:
-            recs = [r for r in self._records if r[self._keyField] == pk]
-            try:
-                rec = recs[0]
-            except IndexError:
+            row, rec = self._getRecordByPk(pk, raiseRowNotFound=False)
+            if rec is None:
                 return ret
         else:
             if row is None:
@@ -1329,10 +1888,9 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
             rec = self._records[row]
             pk = self.pkExpression(rec)
 
+        dsMap = self.getDataStructureMap()
         for k, v in list(rec.items()):
-            if k not in cursor_flags and self.Table in [
-                f[3] for f in self.DataStructure if f[0] == k
-            ]:
+            if k not in cursor_flags and k in dsMap and dsMap[k][3] == self.Table:
                 ret[k] = (None, v)
         return ret
 
@@ -1357,6 +1915,7 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
         if not ds:
             ds = dDataSet()
         self._records = ds
+        self._bumpDataVersion()
 
     def getDataSet(
         self,
@@ -1381,11 +1940,12 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
             rows = min(rowStart + rows, rowCount)
         if rows < 1 or rowStart > self.RowCount:
             return dDataSet()
+        self._fetchToRow(rows - 1)
 
         getFieldVal = self.getFieldVal
         _records = self._records
         vFieldKeys = list(self.VirtualFields.keys())
-        _correctFieldTypesIfNeeded = self._correctFieldTypesIfNeeded
+        converters = self._getTypeConverters()
 
         if not flds:
             vflds = vFieldKeys
@@ -1393,17 +1953,85 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
         else:
             vflds = [f for f in flds if f in vFieldKeys]
             flds = [f for f in flds if f not in vFieldKeys]
+        if not vflds and _records._getColumnStore() is not None:
+            # Build the result from the columns, without visiting each record.
+            subset = dDataSet(_records[rowStart:rows])
+            try:
+                cols = [subset._columnValues(fld) for fld in flds]
+                cols = [[converters[fld](val) for val in col] for fld, col in zip(flds, cols)]
+            except KeyError:
+                # Not every record has all of the fields; use the per-record code.
+                pass
+            else:
+                return dDataSet([dict(zip(flds, vals)) for vals in zip(*cols)])
         ds = []
         for row in range(rowStart, rows):
             rec = _records[row]
-            _correctFieldTypesIfNeeded(rec)
             tmprec = dict([(k, rec[k]) for k in flds if k in rec])
+            for k in tmprec:
+                tmprec[k] = converters[k](tmprec[k])
             for v in vflds:
                 tmprec.update({v: getFieldVal(v, row, _rowChangeCallback=_rowChangeCallback)})
             ds.append(tmprec)
         self.RowNumber = _currentRow
         return dDataSet(ds)
 
+    def getColumns(self, flds=(), rows=None, virtualFields=False, _rowChangeCallback=None):
+        """
+        Returns a dict mapping each of the passed field names (default: all of the
+        fields) to a list with its value in each of the passed row numbers (default:
+        all of the rows). The values are read straight from the records, without
+        moving the record pointer; with columnar storage each list is copied from the
+        column. Virtual fields are included if they are named in 'flds', or if
+        virtualFields is True; each one is computed for all of the rows in one pass.
+        """
+        self._fetchRemaining()
+        _records = self._records
+        vFieldKeys = self.VirtualFields
+        if not flds:
+            flds = [f for f in _records[0] if f not in cursor_flags] if _records else []
+            if virtualFields:
+                flds += list(vFieldKeys)
+        if rows is None:
+            rowList = range(len(_records))
+        else:
+            rowList = list(rows)
+            rowCount = len(_records)
+            for row in rowList:
+                if not 0 <= row < rowCount:
+                    raise exceptions.RowNotFoundException(
+                        _("Row #%(row)s requested, but the data set has only %(rowCount)s row(s),")
+                        % locals()
+                    )
+        converters = self._getTypeConverters()
+        ret = {}
+        for fld in flds:
+            if fld in vFieldKeys:
+                ret[fld] = self._getVirtualFieldVals(fld, rowList, _rowChangeCallback)
+                continue
+            try:
+                if rows is None:
+                    vals = _records._columnValues(fld)
+                else:
+                    vals = [_records[row][fld] for row in rowList]
+            except KeyError:
+                raise exceptions.FieldNotFoundException(
+                    f"{_('Field')} '{fld}' {_('does not exist in the data set')}"
+                )
+            convert = converters[fld]
+            ret[fld] = [convert(val) for val in vals]
+        return ret
+
+    def iterRows(self, flds=(), rows=None, virtualFields=False, _rowChangeCallback=None):
+        """
+        Returns an iterator over a dict of the field values for each of the passed
+        row numbers (default: all of the rows). Like getColumns(), this doesn't move
+        the record pointer.
+        """
+        cols = self.getColumns(flds, rows, virtualFields, _rowChangeCallback)
+        names = list(cols)
+        return (dict(zip(names, vals)) for vals in zip(*cols.values()))
+
     def appendDataSet(self, ds, updateInternals=False):
         """
         Appends the rows in the passed dataset to this cursor's dataset. No checking
@@ -1437,17 +2065,66 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
                 kf = (kf,)
             for fld in kf:
                 rec[fld] = blank[fld]
-        for delfld in (constants.CURSOR_TMPKEY_FIELD, constants.CURSOR_FIELD_TYPES_CORRECTED):
-            try:
-                del rec[delfld]
-            except KeyError:
-                pass
+        try:
+            del rec[constants.CURSOR_TMPKEY_FIELD]
+        except KeyError:
+            pass
         self.appendDataSet((rec,))
 
     def getDataTypes(self):
         """Returns the internal _types dict."""
         return self._types
 
+    def takeSnapshot(self):
+        """
+        Returns a dCursorSnapshot that can return the records, mementos and new
+        record flags to their current state. Nothing is copied when the snapshot is
+        taken; each record is copied the first time that it is changed afterwards.
+        Any rows of the last query that haven't been fetched yet are fetched first.
+        """
+        self._fetchRemaining()
+        snapshot = dCursorSnapshot(self, self.__unsortedRows)
+        self._snapshots.add(snapshot)
+        self._snapshotShared = True
+        return snapshot
+
+    def restoreSnapshot(self, snapshot):
+        """
+        Return the records, mementos and new record flags to the state they were in
+        when the passed snapshot was taken. A snapshot of this cursor stays open, and
+        can be restored again. A snapshot that was unpickled, or taken from another
+        cursor, replaces the data of this cursor with a copy of its records.
+        """
+        if snapshot._cursor is not self:
+            self.sortColumn, self.sortOrder, self.sortCase = snapshot._sort
+            self._storeData(dDataSet(snapshot.getRecords()), snapshot._types)
+            self._mementos = dict([(pk, dict(mem)) for pk, mem in snapshot._mementos.items()])
+            self._newRecords = dict(snapshot._newRecords)
+        else:
+            # Put back the values of the records changed since the snapshot was
+            # taken, letting any other snapshots keep their current values.
+            originals = snapshot._originals
+            snapshot._originals = {}
+            others = [snap for snap in self._snapshots if snap is not snapshot]
+            for rec, orig in list(originals.values()):
+                for snap in others:
+                    snap._keepRecord(rec)
+                for fld in [fld for fld in rec if fld not in orig]:
+                    del rec[fld]
+                rec.update(orig)
+            self._records = snapshot._records
+            self._bumpDataVersion()
+            self._mementos = snapshot._mementos
+            self._newRecords = snapshot._newRecords
+            self._snapshotShared = True
+            self.sortColumn, self.sortOrder, self.sortCase = snapshot._sort
+            self.__unsortedRows = snapshot._unsortedRows
+            self._records.dataChanged()
+            self._clearSortKeys()
+            self._clearPKIndex()
+        self.RowNumber = snapshot._rowNumber
+        self._notifyChanged()
+
     def _storeData(self, data, typs):
         """
         Accepts a dataset and type dict from an external source and
@@ -1462,9 +2139,12 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
             return
         # Store the values
         self._records = data
+        self._bumpDataVersion()
         self._types = typs
+        self._correctDataSetTypes(data)
         # Clear the unsorted list, and then apply the current sort
-        self.__unsortedRows = []
+        self.__unsortedRows = None
+        self._clearSortKeys()
         if self.sortColumn:
             try:
                 self.sort(self.sortColumn, self.sortOrder)
@@ -1474,19 +2154,31 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
 
     def filter(self, fld, expr, op="="):
         """Apply a filter to the current records."""
+        self._fetchRemaining()
         self._records = self._records.filter(fld=fld, expr=expr, op=op)
+        self._bumpDataVersion()
 
     def filterByExpression(self, expr):
         """Allows you to filter by any valid Python expression."""
+        self._fetchRemaining()
         self._records = self._records.filterByExpression(expr)
+        self._bumpDataVersion()
+
+    def _filterRows(self, rows):
+        """Apply a filter that keeps the records at the passed row numbers."""
+        self._fetchRemaining()
+        self._records = self._records._filterRows(rows)
+        self._bumpDataVersion()
 
     def removeFilter(self):
         """Remove the most recently applied filter."""
         self._records = self._records.removeFilter()
+        self._bumpDataVersion()
 
     def removeFilters(self):
         """Remove all applied filters, going back to the original data set."""
         self._records = self._records.removeFilters()
+        self._bumpDataVersion()
 
     def replace(self, field, valOrExpr, scope=None):
         """
@@ -1506,10 +2198,19 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
            be used in any programming.
 
         """
+        self._fetchRemaining()
+        if self._snapshots:
+            for rec in self._records:
+                self._beforeChange(rec)
         # Make sure that the data set object has any necessary references
         self._records.Cursor = self
         self._records.Bizobj = self._bizobj
         self._records.replace(field, valOrExpr, scope=scope)
+        self._bumpDataVersion()
+        self._clearSortKeys(field)
+        self._invalidateVirtualFields(field)
+        if self._isKeyField(field):
+            self._clearPKIndex()
 
     def first(self):
         """Move the record pointer to the first record of the data set."""
@@ -1548,42 +2249,23 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
             raise exceptions.NoRecordsException(_("No records in dataset '%s'.") % self.Table)
 
     def save(self, allRows=False, includeNewUnchanged=False):
-        """Save any changes to the current record back to the data store."""
+        """
+        Save any changes to the current record back to the data store.
+
+        If allRows is True, all the changed records are saved. Rows that need the same
+        statement are then sent to the backend together, with a single executemany()
+        call per group.
+        """
         # Make sure that there is data to save
         if self.RowCount <= 0:
             raise exceptions.NoRecordsException(_("No data to save"))
         # Make sure that there is a PK
         self.checkPK()
-
-        def saverow(row):
-            try:
-                self.__saverow(row)
-            except exceptions.DBQueryException as e:
-                # Error was encountered. Raise an exception so that the
-                # calling bizobj can rollback the transaction if necessary
-                try:
-                    errMsg = ustr(e).decode(self.Encoding)
-                except UnicodeError:
-                    errMsg = ustr(e)
-                dbActivityLog.info(_("DBQueryException encountered in save(): %s") % errMsg)
-                raise e
-            except Exception as e:
-                errMsg = ustr(e)
-                if "connect" in errMsg.lower():
-                    dbActivityLog.info(
-                        _("Connection Lost exception encountered in saverow(): %s") % errMsg
-                    )
-                    raise exceptions.ConnectionLostException(errMsg)
-                else:
-                    # Error was encountered. Raise an exception so that the
-                    # calling bizobj can rollback the transaction if necessary
-                    raise
-
         self._syncAuxProperties()
 
         if allRows:
-            # This branch doesn't happen when called from dBizobj (not sure if
-            # we really need the allRows arg at all).
+            # This branch doesn't happen when called from dBizobj.save(); dBizobj.saveAll()
+            # uses it for bizobjs without children.
             rows = self.getChangedRows(includeNewUnchanged=includeNewUnchanged)
         else:
             # This branch results in redundant isChanged() call when called from
@@ -1592,10 +2274,156 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
             rows = []
             if self.isChanged(allRows=False, includeNewUnchanged=includeNewUnchanged):
                 rows = [self.RowNumber]
-        for row in rows:
-            saverow(row)
+        if rows:
+            self._runSave(self.__saveCursorRows, [(self, sorted(rows))], len(rows) > 1)
+
+    def saveRows(self, cursorRows):
+        """
+        Save the passed rows of this cursor and of other cursors for the same table,
+        such as the cursors that a child bizobj keeps for each parent record.
+        'cursorRows' is a sequence of (cursor, rows) pairs; new rows are inserted
+        even when they haven't been changed. Rows of any of the cursors that need
+        the same statement are sent to the backend together.
+        """
+        cursorRows = [(crs, sorted(rows)) for crs, rows in cursorRows if rows]
+        if not cursorRows:
+            return
+        for crs, rows in cursorRows:
+            crs.checkPK()
+            crs._syncAuxProperties()
+        self._runSave(self.__saveCursorRows, cursorRows, True)
+
+    def _runSave(self, func, *args):
+        try:
+            func(*args)
+        except exceptions.DBQueryException as e:
+            # Error was encountered. Raise an exception so that the
+            # calling bizobj can rollback the transaction if necessary
+            try:
+                errMsg = ustr(e).decode(self.Encoding)
+            except UnicodeError:
+                errMsg = ustr(e)
+            dbActivityLog.info(_("DBQueryException encountered in save(): %s") % errMsg)
+            raise e
+        except Exception as e:
+            errMsg = ustr(e)
+            if "connect" in errMsg.lower():
+                dbActivityLog.info(
+                    _("Connection Lost exception encountered in saverow(): %s") % errMsg
+                )
+                raise exceptions.ConnectionLostException(errMsg)
+            else:
+                # Error was encountered. Raise an exception so that the
+                # calling bizobj can rollback the transaction if necessary
+                raise
 
-    def __saverow(self, row):
+    def __saveCursorRows(self, cursorRows, paramWhere):
+        """
+        Saves the rows of the passed (cursor, rows) pairs, using this cursor's
+        AuxCursor. Rows that need the same SQL statement are grouped, and each group
+        is sent to the backend in one call. New rows that need the backend to send
+        back their generated PK, or their default values when the cursor has null
+        defaults, are only grouped if the backend can do that for a batch of
+        inserts; otherwise they are saved one at a time.
+        """
+        aux = self.AuxCursor
+        bo = self.BackendObject
+        groups = {}
+        for crs, rows in cursorRows:
+            for row in rows:
+                stmt = crs.__getSaveStatement(row, paramWhere=paramWhere)
+                if stmt is None:
+                    continue
+                recKey, newrec, newPKVal, sql, params = stmt
+                needsKey = newrec and crs.AutoPopulatePK and (newPKVal is None)
+                readBack = newrec and crs._nullDefaults
+                groups.setdefault((sql, needsKey, readBack), []).append(
+                    (crs, row, recKey, newrec, params)
+                )
+
+        for (sql, needsKey, readBack), items in list(groups.items()):
+            paramList = [item[4] for item in items]
+            if readBack:
+                # Get the generated key and the default values back from the insert
+                # itself, instead of selecting each new row again.
+                recs = bo.insertManyReturning(aux, sql, paramList)
+                if recs is not None:
+                    for (crs, row, recKey, newrec, params), rec in zip(items, recs):
+                        crs.__setReadBackValues(row, rec)
+                        crs.__afterRowSaved(row, recKey, newrec, True)
+                    continue
+                newKeys = None
+            elif len(items) == 1:
+                newKeys = None
+            elif items[0][3]:
+                kf = self.KeyField if needsKey and not self._compoundKey else None
+                newKeys = bo.insertMany(aux, sql, paramList, keyField=kf)
+            else:
+                aux._executeMany(sql, paramList)
+                newKeys = []
+            if newKeys is None:
+                # Not batched: run them one at a time.
+                for crs, row, recKey, newrec, params in items:
+                    res = aux.execute(sql, params)
+                    if needsKey:
+                        # Call the database backend-specific code to retrieve the
+                        # most recently generated PK value.
+                        newPKVal = aux.getLastInsertID()
+                        if newPKVal and not crs._compoundKey:
+                            crs.setFieldVal(crs.KeyField, newPKVal, row)
+                    if readBack:
+                        crs.__readBackRow(row)
+                    crs.__afterRowSaved(row, recKey, newrec, res)
+                continue
+            for idx, (crs, row, recKey, newrec, params) in enumerate(items):
+                if needsKey and idx < len(newKeys) and not crs._compoundKey:
+                    crs.setFieldVal(crs.KeyField, newKeys[idx], row)
+                crs.__afterRowSaved(row, recKey, newrec, True)
+
+    def __readBackRow(self, row):
+        """Selects the passed row after it has been inserted, to get its default values."""
+        aux = self.AuxCursor
+        bo = self.BackendObject
+        aq = self.AutoQuoteNames
+        rec = self._records[row]
+        keyFields = list(self.KeyField) if self._compoundKey else [self.KeyField]
+        where = " and ".join(
+            [f"{bo.encloseNames(fld, aq)} = {self.ParamPlaceholder}" for fld in keyFields]
+        )
+        params = tuple([rec[fld] for fld in keyFields])
+        aux.execute("select * from %s where %s" % (bo.encloseNames(self.Table, aq), where), params)
+        try:
+            rec = aux.getDataSet()[0]
+        except IndexError:
+            # For some reason we could not retrieve the matching PK record
+            return
+        self.__setReadBackValues(row, rec)
+
+    def __setReadBackValues(self, row, rec):
+        for fld, val in list(rec.items()):
+            try:
+                self.setFieldVal(fld, val, row)
+            except exceptions.FieldNotFoundException:
+                # Field is not in the dataset
+                pass
+
+    def __afterRowSaved(self, row, recKey, newrec, res):
+        self._clearMemento(row)
+        if newrec:
+            self._clearNewRecord(row=row, pkVal=recKey)
+        else:
+            if not res:
+                # Different backends may cause res to be None
+                # even if the save is successful.
+                self.BackendObject.noResultsOnSave()
+
+    def __getSaveStatement(self, row, paramWhere=False):
+        """
+        Returns a 5-tuple of (recKey, newrec, newPKVal, sql, params) for saving the
+        passed row, or None if the row has no changes to save. If paramWhere is True,
+        the PK values for an update are passed as parameters instead of being part of
+        the SQL, so that the same statement can be used for other rows.
+        """
         rec = self._records[row]
         recKey = self.pkExpression(rec)
         newrec = constants.CURSOR_TMPKEY_FIELD in rec
@@ -1615,120 +2443,153 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
             diff = self._getNewRecordDiff(row)
         else:
             diff = self.getRecordStatus(row)
+        if not diff:
+            return None
         aq = self.AutoQuoteNames
-        if diff:
-            if newrec:
-                flds = ""
-                vals = []
-                kf = self.KeyField
-                for kk, vv in list(diff.items()):
-                    if self.AutoPopulatePK:
-                        if self._compoundKey:
-                            skipIt = kk in kf
-                        else:
-                            # Skip the key field, unless we pre-generated its value above.
-                            skipIt = (kk == self.KeyField) and not newPKVal
-                        if skipIt:
-                            # we don't want to include the PK in the insert
-                            continue
-                    if kk in self.getNonUpdateFields():
-                        # Skip it.
-                        continue
-                    if self._nullDefaults and vv == (None, None):
-                        # Skip these, too
+        if newrec:
+            flds = ""
+            vals = []
+            kf = self.KeyField
+            fieldTypes = self._getFieldTypeMap()
+            nonup = self.getNonUpdateFields()
+            for kk, vv in list(diff.items()):
+                if self.AutoPopulatePK:
+                    if self._compoundKey:
+                        skipIt = kk in kf
+                    else:
+                        # Skip the key field, unless we pre-generated its value above.
+                        skipIt = (kk == self.KeyField) and not newPKVal
+                    if skipIt:
+                        # we don't want to include the PK in the insert
                         continue
-                    # Append the field and its value.
-                    flds += ", " + self.BackendObject.encloseNames(kk, aq)
-                    # add value to expression
-                    fieldType = [ds[1] for ds in self.DataStructure if ds[0] == kk][0]
-                    val = vv[1]
-                    if fieldType == "L" or (isinstance(val, str) and "\0" in val):
-                        val = self.formatBLOB(val)
-                    # elif fieldType in ("D", "T"):
-                    #    val = self.formatDateTime(val)
-                    vals.append(val)
-
-                # Trim leading comma-space from the 'flds' string
-                flds = flds[2:]
-                if not flds:
-                    # Some backends (sqlite) require non-empty field clauses. We already
-                    # know that we are expecting the backend to generate the PK, so send
-                    # NULL as the PK Value:
-                    flds = self.KeyField
-                    vals = "NULL"
-                nms = self.BackendObject.encloseNames(self.Table, aq)
-                placeHolders = len(vals) * [self.ParamPlaceholder]
-                sql = "insert into %s (%s) values (%s) " % (
-                    nms,
-                    flds,
-                    ",".join(placeHolders),
-                )
-                params = tuple(vals)
+                if kk in nonup:
+                    # Skip it.
+                    continue
+                if self._nullDefaults and vv == (None, None):
+                    # Skip these, too
+                    continue
+                # Append the field and its value.
+                flds += ", " + self.BackendObject.encloseNames(kk, aq)
+                # add value to expression
+                fieldType = fieldTypes[kk]
+                val = vv[1]
+                if fieldType == "L" or (isinstance(val, str) and "\0" in val):
+                    val = self.formatBLOB(val)
+                # elif fieldType in ("D", "T"):
+                #    val = self.formatDateTime(val)
+                vals.append(val)
+
+            # Trim leading comma-space from the 'flds' string
+            flds = flds[2:]
+            if not flds:
+                # Some backends (sqlite) require non-empty field clauses. We already
+                # know that we are expecting the backend to generate the PK, so send
+                # NULL as the PK Value:
+                flds = self.KeyField
+                vals = "NULL"
+            nms = self.BackendObject.encloseNames(self.Table, aq)
+            placeHolders = len(vals) * [self.ParamPlaceholder]
+            sql = "insert into %s (%s) values (%s) " % (
+                nms,
+                flds,
+                ",".join(placeHolders),
+            )
+            params = tuple(vals)
+        else:
+            if paramWhere:
+                pkWhere, pkParams = self._makePkParamWhere(row)
             else:
-                pkWhere = self.makePkWhere(row)
-                updClause, params = self.makeUpdClause(diff)
-                sql = "update %s set %s where %s" % (
-                    self.BackendObject.encloseNames(self.Table, aq),
-                    updClause,
-                    pkWhere,
-                )
-            # run the update
-            aux = self.AuxCursor
-            res = aux.execute(sql, params)
-
-            if newrec and self.AutoPopulatePK and (newPKVal is None):
-                # Call the database backend-specific code to retrieve the
-                # most recently generated PK value.
-                newPKVal = aux.getLastInsertID()
-                if newPKVal and not self._compoundKey:
-                    self.setFieldVal(self.KeyField, newPKVal, row)
-
-            if newrec and self._nullDefaults:
-                # We need to retrieve any new default values
-                aux = self.AuxCursor
-                if not isinstance(self.KeyField, tuple):
-                    keyFields = [self.KeyField]
-                else:
-                    keyFields = self.KeyField
-                wheres = []
-                for kf in keyFields:
-                    fld = self.BackendObject.encloseNames(kf, self.AutoQuoteNames)
-                    val = self.getFieldVal(kf)
-                    if isinstance(val, str):
-                        val = "'" + val.encode(self.Encoding) + "' "
-                    elif isinstance(val, (datetime.date, datetime.datetime)):
-                        val = self.formatDateTime(val)
-                    else:
-                        val = ustr(val)
-                    wheres.append(f"{fld} = {val}")
-                where = " and ".join(wheres)
-                aux.execute("select * from %s where %s" % (self.Table, where))
-                try:
-                    data = aux.getDataSet()[0]
-                    for fld, val in list(data.items()):
-                        try:
-                            self.setFieldVal(fld, val)
-                        except exceptions.FieldNotFoundException:
-                            # Field is not in the dataset
-                            pass
-                except IndexError:
-                    # For some reason we could not retrieve the matching PK record
-                    pass
+                pkWhere, pkParams = self.makePkWhere(row), ()
+            updClause, params = self.makeUpdClause(diff)
+            sql = "update %s set %s where %s" % (
+                self.BackendObject.encloseNames(self.Table, aq),
+                updClause,
+                pkWhere,
+            )
+            params = params + pkParams
+        return (recKey, newrec, newPKVal, sql, params)
 
-            self._clearMemento(row)
-            if newrec:
-                self._clearNewRecord(row=row, pkVal=recKey)
+    def _executeMany(self, sql, paramList):
+        """
+        Runs the passed statement once for each set of parameters in 'paramList',
+        using a single call to the dbapi cursor's executemany().
+        """
+        sql = self.processFields(sql)
+        try:
+            res = self.superCursor.executemany(self, sql, paramList)
+            if not self.IsPrefCursor:
+                self._dblogExecute(f"executemany() ({len(paramList)} rows)", sql)
+        except Exception as e:
+            self._dblogExecute("executemany() FAILED", sql)
+            errMsg = str(e)
+            if "connect" in errMsg.lower():
+                raise exceptions.ConnectionLostException(errMsg)
+            errMsg = _("DBQueryException encountered in executemany(): %s") % errMsg
+            self._dblogExecute(errMsg, sql)
+            raise exceptions.DBQueryException(errMsg)
+        self.BackendObject.lastExecuteTime = time.time()
+        return res
+
+    def _executeReturning(self, sql, params):
+        """
+        Runs a statement that returns rows, such as an insert with a RETURNING clause,
+        and returns the rows as the dbapi cursor gives them. Unlike execute(), this
+        leaves the cursor's records alone.
+        """
+        self._executeUnstored(sql, params)
+        return self.superCursor.fetchall(self)
+
+    def _executeUnstored(self, sql, params=None):
+        """
+        Runs the statement, leaving its rows with the dbapi cursor for the caller to
+        fetch; the cursor's records are left alone.
+        """
+        sql = self.processFields(sql)
+        try:
+            if params:
+                self.superCursor.execute(self, sql, params)
             else:
-                if not res:
-                    # Different backends may cause res to be None
-                    # even if the save is successful.
-                    self.BackendObject.noResultsOnSave()
+                self.superCursor.execute(self, sql)
+            if not self.IsPrefCursor:
+                self._dblogExecute("execute()", sql, params)
+        except Exception as e:
+            self._dblogExecute("execute() FAILED", sql, params)
+            errMsg = str(e)
+            if "connect" in errMsg.lower():
+                raise exceptions.ConnectionLostException(errMsg)
+            errMsg = _("DBQueryException encountered in execute(): %s") % errMsg
+            self._dblogExecute(errMsg, sql)
+            raise exceptions.DBQueryException(errMsg)
+        self.BackendObject.lastExecuteTime = time.time()
+
+    def getDataStructureMap(self):
+        """
+        Returns a dict mapping each field alias in DataStructure to its DataStructure
+        entry, so that field information can be looked up without scanning the list.
+        The dict is rebuilt whenever DataStructure changes; don't modify it.
+        """
+        src = getattr(self, "_dataStructure", None) or self.__createDataStructure()
+        if self._dataStructureMapSource is not src:
+            dsMap = {}
+            for fld in src:
+                # The first entry for an alias wins, as with a scan of the list.
+                dsMap.setdefault(fld[0], fld)
+            self._dataStructureMap = dsMap
+            self._fieldTypeMap = {alias: fld[1] for alias, fld in dsMap.items()}
+            self._dataStructureMapSource = src
+        return self._dataStructureMap
+
+    def _getFieldTypeMap(self):
+        """Returns a dict mapping the field names in DataStructure to their type codes."""
+        self.getDataStructureMap()
+        return self._fieldTypeMap
 
     def _clearMemento(self, row=None):
         """Erase the memento for the passed row, or current row if none passed."""
         if row is None:
             row = self.RowNumber
 
+        self._beforeChange()
         try:
             pk = self.getPK(row)
             del self._mementos[pk]
@@ -1738,6 +2599,7 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
 
     def _clearNewRecord(self, row=None, pkVal=None):
         """Erase the new record flag for the passed row, or current row if none passed."""
+        self._beforeChange()
         # If pkVal passed, delete that reference:
         if pkVal is not None:
             try:
@@ -1759,7 +2621,9 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
             # didn't exist
             pass
         # Remove the temp key field column, if still present.
-        rec.pop(constants.CURSOR_TMPKEY_FIELD, None)
+        if constants.CURSOR_TMPKEY_FIELD in rec:
+            self._beforeChange(rec)
+            rec.pop(constants.CURSOR_TMPKEY_FIELD, None)
 
     def getDataDiff(self, allRows=False):
         """
@@ -1808,8 +2672,21 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
 
     def new(self):
         """Add a new record to the data set."""
+        # New records go at the end, so we need to have all of the others first.
+        self._fetchRemaining()
         blank = self._getBlankRecord()
+        indexCurrent = self._pkIndexIsCurrent()
         self._records = dDataSet(self._records + (blank,))
+        self._bumpDataVersion()
+        if indexCurrent:
+            # Add the new row to the PK index instead of having it rebuilt.
+            self._pkIndexRecords = self._records
+            if self.KeyField:
+                key = self._pkForRecord(blank)
+                if key in self._pkIndex:
+                    self._pkIndexHasDups = True
+                else:
+                    self._pkIndex[key] = self.RowCount - 1
         # Adjust the RowCount and position
         self.RowNumber = self.RowCount - 1
 
@@ -1824,6 +2701,10 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
             else:
                 raise exceptions.NoRecordsException(_("No data to cancel."))
 
+        # The restored values invalidate any cached sort keys.
+        self._records.dataChanged()
+        self._bumpDataVersion()
+        self._clearSortKeys()
         # Faster to deal with 2 specific cases: all rows or just current row
         if allRows:
             try:
@@ -1840,20 +2721,26 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
                     # append to the list of indexes to delete.
                     row, rec = self._getRecordByPk(rec_id)
                     self._clearMemento(row)
-                    delrecs_idx.append(self._records._index(rec))
+                    delrecs_idx.append(row)
                 delrecs_idx.sort(reverse=True)
                 for idx in delrecs_idx:
                     del recs[idx]
                 self._newRecords = {}
                 self._records = dDataSet(recs)
+                self._bumpDataVersion()
                 if self.RowNumber >= self.RowCount:
                     self.RowNumber = self.RowCount - 1
 
+            keyRestored = False
             for rec_pk, mem in list(self._mementos.items()):
                 row, rec = self._getRecordByPk(rec_pk)
+                self._beforeChange(rec)
                 for fld, val in list(mem.items()):
                     self._records[row][fld] = val
+                    keyRestored = keyRestored or self._isKeyField(fld)
             self._mementos = {}
+            if keyRestored:
+                self._clearPKIndex()
 
         else:
             row = self.RowNumber
@@ -1866,13 +2753,18 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
                 recs = list(self._records)
                 del recs[recs.index(rec)]
                 self._records = dDataSet(recs)
+                self._bumpDataVersion()
                 if self.RowNumber >= self.RowCount:
                     self.RowNumber = self.RowCount - 1
                 return
 
             # Not a new record: need to manually replace the old values:
-            for fld, val in list(self._mementos.get(recKey, {}).items()):
+            mem = self._mementos.get(recKey, {})
+            self._beforeChange(rec)
+            for fld, val in list(mem.items()):
                 self._records[row][fld] = val
+            if [fld for fld in mem if self._isKeyField(fld)]:
+                self._clearPKIndex()
             self._clearMemento(row)
 
     def delete(self, delRowNum=None):
@@ -1886,6 +2778,7 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
 
         rec = self._records[delRowNum]
         pk = self.pkExpression(rec)
+        self._beforeChange()
         if pk in self._newRecords:
             res = True
             del self._newRecords[pk]
@@ -1913,9 +2806,24 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
     def _removeRow(self, row):
         ## Since record sets are tuples and thus immutable, we need to do this
         ## little dance to remove a row.
+        indexCurrent = self._pkIndexIsCurrent() and not self._pkIndexHasDups
         lRec = list(self._records)
         del lRec[row]
         self._records = dDataSet(lRec)
+        self._bumpDataVersion()
+        if self._fetchPending:
+            # Keep the total row count correct while rows remain to be fetched.
+            self._pendingRemoved += 1
+            if self._pendingRowCount is not None:
+                self._pendingRowCount -= 1
+        if indexCurrent:
+            # Shift the PK index entries past the removed row.
+            self._pkIndex = {
+                key: (idx - 1 if idx > row else idx)
+                for key, idx in self._pkIndex.items()
+                if idx != row
+            }
+            self._pkIndexRecords = self._records
         self.RowNumber = min(self.RowNumber, self.RowCount - 1)
 
     def flush(self):
@@ -2023,14 +2931,82 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
             chKeys |= set(self._newRecords)
         return list(map(self._getRowByPk, chKeys))
 
+    def _pkForRecord(self, rec):
+        """
+        Returns the PK value of the passed record, corrected to the field type
+        but without modifying the record. Compound keys are returned as tuples.
+        """
+        kf = self.KeyField
+        _correctFieldType = self._correctFieldType
+        if isinstance(kf, tuple):
+            return tuple([_correctFieldType(rec.get(k), k) for k in kf])
+        return _correctFieldType(rec.get(kf), kf)
+
+    def _isKeyField(self, fld):
+        """Returns True if the passed field name is (part of) the KeyField."""
+        kf = self.KeyField
+        if isinstance(kf, tuple):
+            return fld in kf
+        return fld == kf
+
+    def _getPKIndex(self):
+        """
+        Returns the dict that maps PK values to row numbers. It is built on first
+        use, and again whenever the record set has been replaced since then (as is
+        done by requery(), sort() and filter()).
+        """
+        self._fetchRemaining()
+        records = self._records
+        if self._pkIndexRecords is not records:
+            index = {}
+            hasDups = False
+            if self.KeyField:
+                _pkForRecord = self._pkForRecord
+                for row, rec in enumerate(records):
+                    key = _pkForRecord(rec)
+                    if key in index:
+                        # Keep the first occurrence, as the linear search did.
+                        hasDups = True
+                        continue
+                    index[key] = row
+            self._pkIndex = index
+            self._pkIndexRecords = records
+            self._pkIndexHasDups = hasDups
+        return self._pkIndex
+
+    def _clearPKIndex(self):
+        """Discard the PK index; it will be rebuilt when next needed."""
+        self._pkIndex = self._pkIndexRecords = None
+        self._pkIndexHasDups = False
+
+    def _pkIndexIsCurrent(self):
+        return self._pkIndexRecords is not None and self._pkIndexRecords is self._records
+
+    def _updatePKIndex(self, oldKey, newKey, row):
+        """Re-key the index entry for the passed row after its PK value changed."""
+        if not self._pkIndexIsCurrent():
+            # Nothing built yet, or it is already stale and will be rebuilt.
+            return
+        index = self._pkIndex
+        if self._pkIndexHasDups or index.get(oldKey) != row or newKey in index:
+            # Duplicate keys: can't tell which row owns which entry.
+            self._clearPKIndex()
+            return
+        del index[oldKey]
+        index[newKey] = row
+
     def _getRecordByPk(self, pk, raiseRowNotFound=True):
         """Find the record with the passed primary key; return (row, record)."""
-        kf = self.KeyField
-        if kf:
-            for idx, rec in enumerate(self._records):
-                key = self.getFieldVal(kf, row=idx)
-                if key == pk:
-                    return (idx, rec)
+        if self.KeyField:
+            if isinstance(pk, list):
+                pk = tuple(pk)
+            try:
+                row = self._getPKIndex().get(pk)
+            except TypeError:
+                # Unhashable value; it can't be a PK.
+                row = None
+            if row is not None:
+                return (row, self._records[row])
         if raiseRowNotFound:
             tbl, rc = self.Table, self.RowCount
             raise exceptions.RowNotFoundException(
@@ -2045,8 +3021,8 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
 
     def hasPK(self, pk):
         """Return True if the passed pk is present in the dataset."""
-        kf = self.KeyField
-        return bool([v[kf] for v in self._records if v[kf] == pk])
+        row, rec = self._getRecordByPk(pk, raiseRowNotFound=False)
+        return row is not None
 
     def moveToPK(self, pk):
         """
@@ -2134,6 +3110,8 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
 
         if isinstance(fld, list) or isinstance(fld, tuple):
             simpleKey = len(fld) == 1
+            if simpleKey and isinstance(val, (list, tuple)) and len(val) == 1:
+                val = val[0]
             flds = fld
             fld = flds[0]
         else:
@@ -2152,20 +3130,10 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
                 _("Non-existent field(s) '%s'") % ", ".join(badflds)
             )
 
-        # Copy the specified field vals and their row numbers to a list, and
-        # add those lists to the sort list
-        sortList = []
-        for row in range(0, self.RowCount):
-            if simpleKey:
-                rowval = self.getFieldVal(fld, row=row)
-            else:
-                rowval = tuple([self.getFieldVal(f, row=row) for f in flds])
-            sortList.append([rowval, row])
-
+        keys, rows, compStrings = self._getSeekIndex(tuple(flds), caseSensitive)
         if simpleKey:
-            # Determine if we are seeking string values
-            field_type = self._types.get(fld, type(sortList[0][0]))
-            compString = issubclass(field_type, str)
+            compString = compStrings[0]
+            field_type = self._types.get(fld) or type(self.getFieldVal(fld, row=0))
         else:
             compString = False
 
@@ -2177,78 +3145,115 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
                 except ValueError:
                     val = int(0)
 
-            elif issubclass(field_type, int):
-                try:
-                    val = int(val)
-                except ValueError:
-                    val = int(0)
-
             elif issubclass(field_type, float):
                 try:
                     val = float(val)
                 except ValueError:
                     val = float(0)
 
-        if sort:
-            if compString and not caseSensitive:
-                sortList.sort(key=caseInsensitiveSortKey)
-            else:
-                sortList.sort()
-
-        if compString and not caseSensitive:
-            # Change all of the first elements to lower case
-            def safeLower(val):
-                try:
-                    return val.lower()
-                except AttributeError:
-                    return val
-
-            searchList = [safeLower(first) for first, second in sortList]
-            try:
-                matchVal = val.lower()
-            except AttributeError:
-                # this is a string colum, but seeking a null value.
-                matchVal = val
+        if simpleKey:
+            matchVal = self._seekKey(val, compString and not caseSensitive)
         else:
-            matchVal = val
-            searchList = [first for first, second in sortList]
+            matchVal = tuple(
+                [self._seekKey(v, comp and not caseSensitive) for v, comp in zip(val, compStrings)]
+            )
 
-        # See if we have an exact match before we look for 'near' values
-        try:
-            idx = searchList.index(matchVal)
-            ret = sortList[idx][1]
-        except ValueError:
-            if near:
-                if incremental:
-                    # Match the next string only taking into account the first characters
-                    # up to the length of matchStr (so that seeking for 'AB' will bring up
-                    # 'AB-PC' instead of 'FW-PC'.
-
-                    ret = len(sortList) - 1
-                    for idx, testVal in enumerate(searchList):
-                        if isinstance(testVal, str) and isinstance(matchVal, str):
-                            if (
-                                len(testVal) >= len(matchVal)
-                                and testVal[: len(matchVal)] == matchVal
-                            ):
-                                ret = sortList[idx][1]
-                                break
-                        elif not isinstance(matchVal, str) and testVal > matchVal:
-                            ret = idx
-                            break
+        # The keys are in sorted order, and equal keys are in row order, so the
+        # first matching key is the match on the lowest row.
+        idx = bisect.bisect_left(keys, matchVal)
+        if idx < len(keys) and keys[idx] == matchVal:
+            ret = rows[idx]
+        elif near:
+            lastRow = len(rows) - 1
+            if incremental and isinstance(matchVal[1], str):
+                # Match the next string only taking into account the first characters
+                # up to the length of matchStr (so that seeking for 'AB' will bring up
+                # 'AB-PC' instead of 'FW-PC'. All the values that start with the
+                # match string come right after it in the sorted keys.
+                prefix = matchVal[1]
+
+                def hasPrefix(pos):
+                    key = keys[pos][1] if pos < len(keys) else None
+                    return isinstance(key, str) and key.startswith(prefix)
+
+                if not hasPrefix(idx):
+                    ret = lastRow
+                elif sort:
+                    ret = rows[idx]
                 else:
-                    # Find the first row greater than the match value
-                    numSmaller = len([testVal for testVal in searchList if testVal < matchVal])
-                    try:
-                        ret = sortList[numSmaller][1]
-                    except IndexError:
-                        ret = len(sortList) - 1
+                    # The first of the matching values in row order
+                    end = idx + 1
+                    while hasPrefix(end):
+                        end += 1
+                    ret = min(rows[idx:end])
+            elif incremental:
+                # Find the first row greater than the match value
+                idx = bisect.bisect_right(keys, matchVal)
+                if idx < len(keys):
+                    ret = rows[idx] if sort else min(rows[idx:])
+                else:
+                    ret = lastRow
+            elif sort:
+                # The first row greater than the match value
+                ret = rows[idx] if idx < len(rows) else lastRow
+            else:
+                # The unsorted rows, skipping as many as there are smaller values
+                ret = min(idx, lastRow)
 
         if movePointer and ret > -1:
             # Move the record pointer
             self.RowNumber = ret
         return ret
 
+    @staticmethod
+    def _seekKey(val, lower):
+        """Returns the key for the passed value used in the seek indexes."""
+        if val is None:
+            return (0, None)
+        if lower:
+            try:
+                val = val.lower()
+            except AttributeError:
+                pass
+        return (1, val)
+
+    def _getSeekIndex(self, flds, caseSensitive):
+        """
+        Returns the index that seek() uses for the passed fields: a tuple of the
+        sorted keys for the values in those fields, the row number for each key, and
+        whether each field holds strings. The index is built on first use, and
+        kept until the values or the records in the data set change.
+        """
+        self._fetchRemaining()
+        records = self._records
+        cacheKey = (flds, caseSensitive)
+        cached = self._seekIndexCache.get(cacheKey)
+        if cached is not None and cached[0] is records:
+            return cached[1:]
+        getFieldVal = self.getFieldVal
+        converters = self._getTypeConverters()
+        colKeys = []
+        compStrings = []
+        for fld in flds:
+            if fld in self.VirtualFields:
+                vals = [getFieldVal(fld, row=row) for row in range(len(records))]
+            else:
+                convert = converters[fld]
+                vals = [convert(rec[fld]) for rec in records]
+            fieldType = self._types.get(fld) or type(vals[0])
+            compString = issubclass(fieldType, str)
+            lower = compString and not caseSensitive
+            _seekKey = self._seekKey
+            colKeys.append([_seekKey(val, lower) for val in vals])
+            compStrings.append(compString)
+        keys = colKeys[0] if len(flds) == 1 else list(zip(*colKeys))
+        rows = sorted(range(len(keys)), key=keys.__getitem__)
+        keys = [keys[row] for row in rows]
+        if not [fld for fld in flds if fld in self.VirtualFields]:
+            # Virtual fields can depend on anything, so they are never cached.
+            self._seekIndexCache[cacheKey] = (records, keys, rows, compStrings)
+        return keys, rows, compStrings
+
     def checkPK(self):
         """Verify that the field(s) specified in the KeyField prop exist."""
         # First, make sure that there is *something* in the field
@@ -2309,6 +3314,30 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
                 ret.extend([tblPrefix, fldSafe, "=", ustr(pkVal), " "])
         return "".join(ret)
 
+    def _makePkParamWhere(self, row):
+        """
+        Like makePkWhere(), but returns a 2-tuple of the WHERE clause using parameter
+        placeholders for the PK values, and a tuple of those values.
+        """
+        if not self.KeyField:
+            # Cannot update without a KeyField
+            return ("1 = 0", ())
+        bo = self.BackendObject
+        aq = self.AutoQuoteNames
+        tblPrefix = bo.getWhereTablePrefix(self.Table, autoQuote=aq)
+        rec = self._records[row]
+        if self._compoundKey:
+            keyFields = [fld for fld in self.KeyField]
+        else:
+            keyFields = [self.KeyField]
+        mem = self._mementos.get(self.pkExpression(rec), {})
+        clauses = []
+        params = []
+        for fld in keyFields:
+            clauses.append(f"{tblPrefix}{bo.encloseNames(fld, aq)}={self.ParamPlaceholder}")
+            params.append(mem.get(fld, rec[fld]))
+        return (" AND ".join(clauses), tuple(params))
+
     def makeUpdClause(self, diff):
         """
         Create the 'set field=val' section of the Update statement. Return a 2-tuple
@@ -2321,12 +3350,13 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
         aq = self.AutoQuoteNames
         tblPrefix = bo.getUpdateTablePrefix(self.Table, autoQuote=aq)
         nonup = self.getNonUpdateFields()
+        fieldTypes = self._getFieldTypeMap()
         for fld, val in list(diff.items()):
             old_val, new_val = val
             # Skip the fields that are not to be updated.
             if fld in nonup:
                 continue
-            fieldType = [ds[1] for ds in self.DataStructure if ds[0] == fld][0]
+            fieldType = fieldTypes[fld]
             val = new_val
             if fieldType == "L" or (isinstance(val, str) and "\0" in val):
                 val = self.formatBLOB(val)
@@ -2365,17 +3395,13 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
             | 1: the field type ('I', 'N', 'C', 'M', 'B', 'D', 'T')
             | 2: boolean specifying whether this is a pk field.
 
+        The information is cached by the backend object, so the table is only
+        introspected once per connection; see dBackend.getCachedFields().
         """
         if tableName is None:
             # Use the default
             tableName = self.Table
-        key = f"{tableName}:::{self.CurrentSQL}"
-        try:
-            return self._fieldStructure[key]
-        except KeyError:
-            flds = self.BackendObject.getFields(tableName, self.AuxCursor)
-            self._fieldStructure[key] = flds
-            return flds
+        return self.BackendObject.getCachedFields(tableName, self.AuxCursor)
 
     def getFieldInfoFromDescription(self):
         """
@@ -2457,8 +3483,9 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
 
         You can optionally skip some of the first records by specifying a `start` value.
         """
-        num = num or len(self._records)
+        num = num or self.RowCount
         start = start or 0
+        self._fetchToRow(num - 1)
         return self._records[start:num]
 
     ###     SQL Builder methods     ########
@@ -2593,8 +3620,12 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
         """Modifies WHERE clauses as needed for each backend."""
         return self.sqlManager.BackendObject.prepareWhere(clause, autoQuote=self.AutoQuoteNames)
 
-    def setChildFilter(self, fld):
-        """This method sets the appropriate WHERE filter for dependent child queries."""
+    def setChildFilter(self, fld, keyCount=None):
+        """
+        This method sets the appropriate WHERE filter for dependent child queries.
+        If keyCount is passed, the filter matches that many parent keys instead of
+        one; the params then hold the values of each key in turn.
+        """
 
         def getTableAlias(fromClause):
             if not fromClause.strip():
@@ -2624,6 +3655,12 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
         if not isinstance(fld, (list, tuple)):
             fld = (fld,)
         filtExpr = "and".join([f" {alias}.{fldExpr} = {self.ParamPlaceholder} " for fldExpr in fld])
+        if keyCount is not None:
+            if len(fld) == 1:
+                marks = ", ".join([self.ParamPlaceholder] * keyCount)
+                filtExpr = f" {alias}.{fld[0]} in ({marks}) "
+            else:
+                filtExpr = " or ".join([f"({filtExpr})"] * keyCount)
         self.setChildFilterClause(filtExpr)
 
     def setNonMatchChildFilterClause(self):
@@ -2785,6 +3822,8 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
             raise exceptions.NoRecordsException
         if row is None:
             row = self.RowNumber
+        elif self._fetchPending:
+            self._fetchToRow(row)
         rec = self._records[row]
         pk = self.pkExpression(rec)
         mem = self._mementos.get(pk, None)
@@ -2916,6 +3955,20 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
         if self.__auxCursor:
             self.__auxCursor.__backend = obj
 
+    @property
+    def ColumnarStorage(self):
+        """
+        When True, the data returned by a query is stored column-wise, with one list
+        of values per field instead of one dict per record. The records are
+        lightweight views that are used just like dicts. This greatly reduces the
+        memory needed for large data sets. Default=False  (bool)
+        """
+        return self._columnarStorage
+
+    @ColumnarStorage.setter
+    def ColumnarStorage(self, val):
+        self._columnarStorage = bool(val)
+
     @property
     def CurrentSQL(self):
         """Returns the current SQL that will be run, which is one of UserSQL or AutoSQL."""
@@ -2979,6 +4032,15 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
             self._types[field_name] = db.getPythonType(field_type)
         self._dataStructure = self.AuxCursor._dataStructure = tuple(val)
 
+    @property
+    def DataVersion(self):
+        """
+        A number that changes whenever the records of the cursor, or the values in
+        them, are changed. Caches of values computed from the data can use it to
+        know when they are stale.  (int) (read-only)
+        """
+        return self._dataVersion
+
     @property
     def Encoding(self):
         """Encoding type used by the Backend  (string)"""
@@ -2988,6 +4050,20 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
     def Encoding(self, val):
         self.BackendObject.Encoding = val
 
+    @property
+    def FetchSize(self):
+        """
+        When greater than 0, a query only gets this many rows from the backend at
+        first. The remaining rows are fetched in batches of this size as they are
+        reached by RowNumber or getFieldVal(); RowCount still reports the total number
+        of rows. Default=0, which fetches all the rows at once  (int)
+        """
+        return self._fetchSize
+
+    @FetchSize.setter
+    def FetchSize(self, val):
+        self._fetchSize = max(0, int(val or 0))
+
     @property
     def FieldDescription(self):
         """Tuple of field names and types, as returned by the backend  (tuple)"""
@@ -3076,6 +4152,8 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
             ret = len(self._records)
         except AttributeError:
             ret = 0
+        if ret and self._fetchPending:
+            ret = self._getPendingRowCount()
         return ret
 
     @property
@@ -3089,6 +4167,8 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
 
     @RowNumber.setter
     def RowNumber(self, num):
+        if self._fetchPending:
+            self._fetchToRow(num)
         self.__rownumber = min(max(0, num), self.RowCount - 1)
 
     @property
@@ -3129,7 +4209,17 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
         name.
 
         The common use is to assign a bare function to a virtual field, but you can also specify
-        args and kwargs by assigning a dict with 'func', 'args' and 'kwargs' keys.
+        args and kwargs by assigning a dict with 'func', 'args' and 'kwargs' keys. Other keys
+        of the dict:
+
+            | batch_func: function called with a list of row numbers, which returns the list of
+            |     values for those rows. It is used instead of 'func' whenever the field is
+            |     read, so the record pointer doesn't have to be moved to each row.
+            | depends_on: sequence of the names of the fields the value is computed from. When
+            |     given, the value is cached for each record, until one of those fields is
+            |     changed in that record or the data is requeried.
+            | requery_children: when True, the child bizobjs are requeried for each row before
+            |     'func' is called.
         """
         return self._virtualFields
 
@@ -3137,3 +4227,4 @@ xsi:noNamespaceSchemaLocation = "http://dabodev.com/schema/dabocursor.xsd">
     def VirtualFields(self, val):
         assert isinstance(val, dict)
         self._virtualFields = val
+        self._virtualFieldCache = {}
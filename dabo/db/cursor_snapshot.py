@@ -0,0 +1,89 @@
+# -*- coding: utf-8 -*-
+from .. import exceptions
+from ..localization import _
+
+
+class dCursorSnapshot(object):
+    """
+    The state of a cursor's records, mementos and new record flags at the moment
+    that dCursorMixin.takeSnapshot() was called.
+
+    Taking a snapshot doesn't copy any data: the snapshot shares the cursor's
+    records, and a record is only copied the first time that it is changed
+    afterwards. Snapshots can be nested, and restore() can be called any number of
+    times, e.g. to try out some edits and then throw them away, or to roll back
+    the changes made during a transaction that failed.
+
+    A snapshot can be pickled; the pickled snapshot is no longer tied to a cursor,
+    but can be passed to the restoreSnapshot() method of any cursor for the same
+    table.
+    """
+
+    def __init__(self, cursor, unsortedRows=None):
+        self._cursor = cursor
+        self._records = cursor._records
+        self._mementos = cursor._mementos
+        self._newRecords = cursor._newRecords
+        self._rowNumber = cursor.RowNumber
+        self._sort = (cursor.sortColumn, cursor.sortOrder, cursor.sortCase)
+        self._unsortedRows = unsortedRows
+        self._types = cursor._types
+        # The records changed since the snapshot was taken, as they were
+        # before the change, keyed on the ids of the records.
+        self._originals = {}
+
+    def _keepRecord(self, rec):
+        """Called by the cursor before the passed record is changed in place."""
+        if id(rec) not in self._originals:
+            self._originals[id(rec)] = (rec, rec.copy())
+
+    def restore(self):
+        """Return the cursor to the state it was in when the snapshot was taken."""
+        if self._cursor is None:
+            raise exceptions.dException(_("This snapshot isn't attached to a cursor"))
+        self._cursor.restoreSnapshot(self)
+
+    def release(self):
+        """
+        Stop tracking the changes made to the cursor. Snapshots are also released
+        when they are garbage collected.
+        """
+        if self._cursor is not None:
+            self._cursor._snapshots.discard(self)
+            self._cursor = None
+        self._originals = {}
+
+    def getRecords(self):
+        """Returns a list with a copy of each record as it was when the snapshot was taken."""
+        originals = self._originals
+        ret = []
+        for rec in self._records:
+            orig = originals.get(id(rec))
+            ret.append(dict(orig[1]) if orig is not None else rec.copy())
+        return ret
+
+    def __getstate__(self):
+        return {
+            "records": self.getRecords(),
+            "mementos": dict([(pk, dict(mem)) for pk, mem in self._mementos.items()]),
+            "newRecords": dict(self._newRecords),
+            "rowNumber": self._rowNumber,
+            "sort": self._sort,
+            "types": self._types,
+        }
+
+    def __setstate__(self, state):
+        self._cursor = None
+        self._records = state["records"]
+        self._mementos = state["mementos"]
+        self._newRecords = state["newRecords"]
+        self._rowNumber = state["rowNumber"]
+        self._sort = state["sort"]
+        self._unsortedRows = None
+        self._types = state["types"]
+        self._originals = {}
+
+    @property
+    def RowCount(self):
+        """Number of records in the snapshot.  (int) (read-only)"""
+        return len(self._records)
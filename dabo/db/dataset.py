@@ -1,9 +1,11 @@
 # -*- coding: utf-8 -*-
+import ast
+import builtins
 import datetime
-import hashlib
+import functools
 import operator
-import re
 import sys
+from collections.abc import MutableMapping
 from decimal import Decimal
 
 try:
@@ -27,6 +29,207 @@ import dabo
 from dabo.lib.utils import ustr
 from dabo.localization import _
 
+# Marks a cell in a column store that holds no value, as the row doesn't have that key.
+_NoValue = object()
+
+
+class _ColumnStore(object):
+    """Holds the data for a set of records column-wise: one list of values per
+    field, plus a single field name-to-column index shared by all the rows.
+    """
+
+    __slots__ = ("fieldIndex", "columns", "rowCount", "rowWidth")
+
+    def __init__(self, fieldNames, rows):
+        self.fieldIndex = dict([(fld, idx) for idx, fld in enumerate(fieldNames)])
+        # Number of values in each row passed in; fields can be added later.
+        self.rowWidth = len(self.fieldIndex)
+        rows = list(rows)
+        self.rowCount = len(rows)
+        if rows:
+            self.columns = [list(col) for col in zip(*rows)]
+        else:
+            self.columns = [[] for fld in fieldNames]
+
+    def appendRows(self, rows):
+        """Add the passed rows to the end of the columns, and return the row
+        number of the first one added.
+        """
+        start = self.rowCount
+        rows = list(rows)
+        rowWidth = self.rowWidth
+        for idx, col in enumerate(self.columns):
+            if idx < rowWidth:
+                col.extend([row[idx] for row in rows])
+            else:
+                # Column added after the store was created; the new rows don't have it.
+                col.extend([_NoValue] * len(rows))
+        self.rowCount += len(rows)
+        return start
+
+    def addField(self, fld):
+        """Add a new, empty column for the passed field name, and return its position."""
+        idx = self.fieldIndex[fld] = len(self.columns)
+        self.columns.append([_NoValue] * self.rowCount)
+        return idx
+
+    def column(self, fld):
+        """Return the list of values for the passed field name."""
+        return self.columns[self.fieldIndex[fld]]
+
+
+class _ColumnarRecord(MutableMapping):
+    """Lightweight view of one row of a _ColumnStore. It behaves like the
+    dicts that make up a regular dDataSet, so code using rec[fld] doesn't
+    need to know how the data is stored.
+    """
+
+    __slots__ = ("_store", "_row")
+
+    def __init__(self, store, row):
+        self._store = store
+        self._row = row
+
+    def __getitem__(self, key):
+        store = self._store
+        try:
+            val = store.columns[store.fieldIndex[key]][self._row]
+        except KeyError:
+            raise KeyError(key)
+        if val is _NoValue:
+            raise KeyError(key)
+        return val
+
+    def __setitem__(self, key, val):
+        store = self._store
+        try:
+            idx = store.fieldIndex[key]
+        except KeyError:
+            idx = store.addField(key)
+        store.columns[idx][self._row] = val
+
+    def __delitem__(self, key):
+        store = self._store
+        try:
+            col = store.columns[store.fieldIndex[key]]
+        except KeyError:
+            raise KeyError(key)
+        if col[self._row] is _NoValue:
+            raise KeyError(key)
+        col[self._row] = _NoValue
+
+    def __contains__(self, key):
+        store = self._store
+        try:
+            return store.columns[store.fieldIndex[key]][self._row] is not _NoValue
+        except KeyError:
+            return False
+
+    def __iter__(self):
+        row = self._row
+        columns = self._store.columns
+        for fld, idx in list(self._store.fieldIndex.items()):
+            if columns[idx][row] is not _NoValue:
+                yield fld
+
+    def __len__(self):
+        return len(list(iter(self)))
+
+    def __eq__(self, other):
+        if isinstance(other, _ColumnarRecord) and other._store is self._store:
+            return other._row == self._row or dict(self) == dict(other)
+        return super().__eq__(other)
+
+    __hash__ = None
+
+    def __repr__(self):
+        return repr(dict(self))
+
+    def copy(self):
+        """Returns a regular dict with this row's values."""
+        return dict(self)
+
+
+def _sortKey(val, lower=False):
+    """Returns the key used to sort a value, putting empty values first."""
+    if val is None:
+        return (0, None)
+    if lower and isinstance(val, str):
+        val = val.lower()
+    return (1, val)
+
+
+def _notNull(vals):
+    return [val for val in vals if val is not None]
+
+
+def _aggSum(vals):
+    vals = _notNull(vals)
+    return sum(vals[1:], vals[0]) if vals else None
+
+
+def _aggMin(vals):
+    vals = _notNull(vals)
+    return min(vals) if vals else None
+
+
+def _aggMax(vals):
+    vals = _notNull(vals)
+    return max(vals) if vals else None
+
+
+def _aggAvg(vals):
+    vals = _notNull(vals)
+    return sum(vals[1:], vals[0]) / len(vals) if vals else None
+
+
+# The aggregate functions for dDataSet.groupBy(); they work like their SQL equivalents.
+_aggregateFunctions = {
+    "count": lambda vals: len(_notNull(vals)),
+    "sum": _aggSum,
+    "min": _aggMin,
+    "max": _aggMax,
+    "avg": _aggAvg,
+}
+
+
+@functools.lru_cache(maxsize=256)
+def _compileExpression(expr, fields, asFilter):
+    """Compiles a user expression for dDataSet.filterByExpression() and replace().
+
+    The field names in the expression become the variables of a list comprehension
+    that loops over the records and the values of the fields used, so that it only
+    has to be parsed and compiled once for each expression and set of fields.
+    Returns the code object and the names of the fields it uses, in the order in
+    which the comprehension expects their values.
+    """
+    tree = ast.parse(expr.strip(), mode="eval")
+    used = set()
+    bound = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Name):
+            if isinstance(node.ctx, ast.Load):
+                used.add(node.id)
+            else:
+                bound.add(node.id)
+        elif isinstance(node, ast.arg):
+            bound.add(node.arg)
+    flds = tuple(sorted(used & fields))
+    unknown = [
+        name
+        for name in sorted(used - fields - bound)
+        if name not in globals() and not hasattr(builtins, name)
+    ]
+    if unknown:
+        raise NameError(_("Unknown field(s) in expression: %s") % ", ".join(unknown))
+    loopVars = ", ".join(("_dabo_rec",) + flds)
+    body = ast.unparse(tree.body)
+    if asFilter:
+        src = f"[_dabo_rec for {loopVars}, in _dabo_rows if ({body})]"
+    else:
+        src = f"[({body}) for {loopVars}, in _dabo_rows]"
+    return compile(src, "<expression>", "eval"), flds
+
 
 class dDataSet(tuple):
     """This class assumes that its contents are not ordinary tuples, but
@@ -34,7 +237,9 @@ class dDataSet(tuple):
     This is the data structure returned by the dCursorMixin class.
 
     It is used to give these data sets the ability to be queried, joined, etc.
-    This is accomplished by using SQLite in-memory databases. If SQLite
+    Sorting, filtering, projection, grouping and joins are done directly on
+    the records by the methods of this class. Arbitrary SQL statements can be
+    run with execute(), which uses SQLite in-memory databases. If SQLite
     and pysqlite2 are not installed on the machine this is run on, a
     warning message will be printed out and the SQL functions will return
     None. The data will still be usable, though.
@@ -51,13 +256,20 @@ class dDataSet(tuple):
         self._typeStructure = {}
         # We may need to encode fields that are not legal names.
         self.fieldAliases = {}
-        # Keep a hash value to tell if we need to re-populate
-        self._dataHash = ""
+        # Incremented whenever the values in the records are changed, so that
+        # execute() knows when the SQLite tables need to be re-populated.
+        self._version = 0
+        # Maps the alias of each table loaded into SQLite to the dataset and version
+        # it was loaded from, its field names, and the values of its records.
+        self._loadedTables = {}
 
         sqlite.register_adapter(Decimal, self._adapt_decimal)
         # When filtering datasets, we need a reference to the dataset
         # this dataset was derived from.
         self._sourceDataSet = None
+        # If all the records are views into the same column store, this will hold
+        # a reference to it. It is determined on first use.
+        self._columnStore = _NoValue
 
         # Register the converters
         sqlite.register_converter("decimal", self._convert_decimal)
@@ -85,6 +297,62 @@ class dDataSet(tuple):
     def __mul__(self, *args, **kwargs):
         return dDataSet(super().__mul__(*args, **kwargs))
 
+    @classmethod
+    def fromRows(cls, fieldNames, rows):
+        """Creates a dataset that stores its data column-wise instead of as one
+        dict per row. 'rows' is a sequence of tuples or lists, with the values in
+        the same order as 'fieldNames'.
+
+        The records of the returned dataset are lightweight views into the
+        columns, and can be used just like the dicts of a regular dDataSet.
+        This greatly reduces the memory used by large data sets.
+        """
+        store = _ColumnStore(fieldNames, rows)
+        ret = cls([_ColumnarRecord(store, row) for row in range(store.rowCount)])
+        ret._columnStore = store
+        return ret
+
+    def extendRows(self, rows):
+        """Returns a new dataset with the passed rows added to the end. The new
+        rows are stored in the same columns as this dataset's records, so this
+        can only be called on a dataset created by fromRows().
+        """
+        store = self._getColumnStore()
+        start = store.appendRows(rows)
+        newRecs = [_ColumnarRecord(store, row) for row in range(start, store.rowCount)]
+        ret = self.__class__(self + tuple(newRecs))
+        ret._columnStore = store
+        return ret
+
+    def _getColumnStore(self):
+        """If all the records in this dataset are views into the same column store,
+        returns that store. Otherwise, returns None.
+        """
+        if self._columnStore is _NoValue:
+            store = None
+            if self and isinstance(self[0], _ColumnarRecord):
+                store = self[0]._store
+                for rec in self:
+                    if not isinstance(rec, _ColumnarRecord) or rec._store is not store:
+                        store = None
+                        break
+            self._columnStore = store
+        return self._columnStore
+
+    def _columnValues(self, fld):
+        """Returns a list with the value of the passed field for each record, in order."""
+        store = self._getColumnStore()
+        if store is None:
+            return [rec[fld] for rec in self]
+        try:
+            col = store.column(fld)
+        except KeyError:
+            raise KeyError(fld)
+        ret = [col[rec._row] for rec in self]
+        if _NoValue in ret:
+            raise KeyError(fld)
+        return ret
+
     @staticmethod
     def _adapt_decimal(decVal):
         """Converts the decimal value to a string for storage"""
@@ -114,30 +382,86 @@ class dDataSet(tuple):
 
         Scope is a boolean expression.
         """
+        if not self:
+            return
+        recs = self
         if scope is not None:
-            scope = self._fldReplace(scope, "rec")
-
-        literal = True
-        if isinstance(valOrExpr, str):
-            if valOrExpr.strip()[0] == "=":
-                literal = False
-                valOrExpr = valOrExpr.replace("=", "", 1)
-            valOrExpr = self._fldReplace(valOrExpr, "rec")
-        if literal:
-            upDict = {field: valOrExpr}
-            if scope is None:
-                [rec.update(upDict) for rec in self]
-            else:
-                [rec.update(upDict) for rec in self if eval(scope)]
+            recs = self.__class__(self._evalExpression(scope, asFilter=True))
+        if isinstance(valOrExpr, str) and valOrExpr.strip().startswith("="):
+            vals = recs._evalExpression(valOrExpr.strip()[1:])
+            for rec, val in zip(recs, vals):
+                rec[field] = val
         else:
-            # Need to go record-by-record so that the expression evaluates correctly
-            for rec in self:
-                if eval(scope):
-                    rec[field] = eval(valOrExpr)
+            for rec in recs:
+                rec[field] = valOrExpr
+        self.dataChanged()
+
+    def dataChanged(self):
+        """Call this after changing the values in the records directly, so that
+        the next execute() reloads them without having to compare them to the
+        ones loaded before.
+        """
+        self._version += 1
 
     def sort(self, col, ascdesc=None, caseSensitive=None):
+        """Returns a dataset with the records sorted on the passed column. Several
+        columns can be passed, separated by commas, and each can be followed by
+        ASC or DESC; 'ascdesc' is used for those that aren't. Empty (None) values
+        come first in ascending order, as they do in SQL. If 'caseSensitive' is
+        False, strings are compared without regard to case.
+
+        Anything that isn't a list of columns is used as the ORDER BY clause of
+        a SQL statement run with execute().
+        """
         if ascdesc is None:
             ascdesc = "ASC"
+        orderBy = self._parseOrderBy(col, ascdesc)
+        if orderBy is None:
+            return self._sqlSort(col, ascdesc, caseSensitive)
+        order = list(range(len(self)))
+        try:
+            # Sort on the last column first; the sorts are stable, so the
+            # earlier columns take precedence.
+            for fld, desc in reversed(orderBy):
+                lower = caseSensitive is False
+                keys = [_sortKey(val, lower) for val in self._columnValues(fld)]
+                order.sort(key=keys.__getitem__, reverse=desc)
+        except (TypeError, KeyError):
+            # Values of different types in the column, or records without the
+            # field; let SQLite sort them.
+            return self._sqlSort(col, ascdesc, caseSensitive)
+        # Copy the records, as the SQLite sort did, so that changing the sorted
+        # dataset doesn't change this one.
+        ret = self.__class__([dict(self[row]) for row in order])
+        # Sorting doesn't change the data, so preserve any source dataset.
+        ret._sourceDataSet = self._sourceDataSet
+        return ret
+
+    def _parseOrderBy(self, col, ascdesc):
+        """Returns a list of (field, descending) tuples for the passed sort
+        columns, or None if they are not just field names and directions.
+        """
+        if not self or not isinstance(col, str):
+            return None
+        directions = {"ASC": False, "DESC": True}
+        ascdesc = ascdesc.strip().upper()
+        if ascdesc not in directions:
+            return None
+        ret = []
+        for term in col.split(","):
+            words = term.split()
+            if not words or len(words) > 2 or words[0] not in self[0]:
+                return None
+            if len(words) == 2:
+                direction = words[1].upper()
+                if direction not in directions:
+                    return None
+            else:
+                direction = ascdesc
+            ret.append((words[0], directions[direction]))
+        return ret
+
+    def _sqlSort(self, col, ascdesc, caseSensitive):
         casecollate = ""
         if caseSensitive is False:
             # The default of None will be case-sensitive
@@ -145,10 +469,111 @@ class dDataSet(tuple):
         stmnt = "select * from dataset order by %s %s %s"
         stmnt = stmnt % (col, casecollate, ascdesc)
         ret = self.execute(stmnt)
+        if ret is None:
+            # No records
+            return self.__class__()
         # Sorting doesn't change the data, so preserve any source dataset.
         ret._sourceDataSet = self._sourceDataSet
         return ret
 
+    def project(self, flds):
+        """Returns a dataset with new records that contain only the passed fields.
+        'flds' can be a sequence of field names, or a string with field names
+        separated by commas.
+        """
+        if isinstance(flds, str):
+            flds = [fld.strip() for fld in flds.split(",")]
+        cols = [self._columnValues(fld) for fld in flds]
+        return self.__class__([dict(zip(flds, vals)) for vals in zip(*cols)])
+
+    def groupBy(self, flds, aggregates=None):
+        """Groups the records on the values in the passed fields, and returns a
+        dataset with one record for each group, in the order in which the groups
+        first appear. Each record contains the grouped fields and the values of
+        the aggregates.
+
+        'flds' can be a sequence of field names, or a string with field names
+        separated by commas. 'aggregates' is a dict whose keys are the names of
+        the fields to create, and whose values are (function, field) tuples. The
+        function can be one of "count", "sum", "min", "max" and "avg", which
+        handle empty values the way SQL does, or a callable that accepts the list
+        of values for the group. Use a field of "*" or None to count all the
+        records in the group. Example:
+
+            ds.groupBy("color", {"cnt": ("count", "*"), "oldest": ("max", "age")})
+        """
+        if isinstance(flds, str):
+            flds = [fld.strip() for fld in flds.split(",") if fld.strip()]
+        aggregates = aggregates or {}
+        keyCols = [self._columnValues(fld) for fld in flds]
+        groups = {}
+        for row, key in enumerate(zip(*keyCols) if flds else [()] * len(self)):
+            groups.setdefault(key, []).append(row)
+        aggFuncs = []
+        for name, (func, fld) in list(aggregates.items()):
+            if fld in (None, "*"):
+                vals = None
+            else:
+                vals = self._columnValues(fld)
+            if not callable(func):
+                try:
+                    func = _aggregateFunctions[func.lower()]
+                except KeyError:
+                    raise ValueError(_("Unknown aggregate function: %s") % func)
+            aggFuncs.append((name, func, vals))
+        ret = []
+        for key, rows in list(groups.items()):
+            rec = dict(zip(flds, key))
+            for name, func, vals in aggFuncs:
+                if vals is None:
+                    rec[name] = func(rows)
+                else:
+                    rec[name] = func([vals[row] for row in rows])
+            ret.append(rec)
+        return self.__class__(ret)
+
+    def join(self, other, on, how="inner"):
+        """Joins this dataset with the 'other' dataset, and returns a dataset with
+        new records that contain the fields of both. Where both have a field with
+        the same name, the value from 'other' is used, as it would be in a SQL
+        'select *'.
+
+        'on' is the name of the field to match in both datasets, a (field,
+        otherField) tuple when the names differ, or a list of these to match on
+        several fields. 'how' is either "inner" (only records with a match in
+        'other' are included) or "left" (all the records in this dataset are
+        included; fields from 'other' are None when there is no match).
+        """
+        how = how.lower()
+        if how not in ("inner", "left"):
+            raise ValueError(_("Invalid join type: %s") % how)
+        if isinstance(on, (str, tuple)):
+            on = [on]
+        pairs = [(fld, fld) if isinstance(fld, str) else tuple(fld) for fld in on]
+        otherKeyCols = [other._columnValues(otherFld) for fld, otherFld in pairs]
+        matches = {}
+        for otherRow, key in enumerate(zip(*otherKeyCols)):
+            matches.setdefault(key, []).append(otherRow)
+        otherNulls = list(other[0]) if other else []
+        keyCols = [self._columnValues(fld) for fld, otherFld in pairs]
+        ret = []
+        for rec, key in zip(self, zip(*keyCols)):
+            otherRows = matches.get(key)
+            if not otherRows or None in key:
+                # As in SQL, empty values never match.
+                if how == "left":
+                    newRec = dict(rec)
+                    for fld in otherNulls:
+                        # The fields that both datasets have keep their values.
+                        newRec.setdefault(fld, None)
+                    ret.append(newRec)
+                continue
+            for otherRow in otherRows:
+                newRec = dict(rec)
+                newRec.update(other[otherRow])
+                ret.append(newRec)
+        return self.__class__(ret)
+
     def filter(self, fld, expr, op="="):
         """This takes a field name, an expression, and an optional operator,
         and returns a dataset that is filtered on that field by that expression.
@@ -189,14 +614,15 @@ class dDataSet(tuple):
             fnc = opDict[op]
         except KeyError:
             fnc = None
+        vals = self._columnValues(fld)
         if fnc:
-            filtered = [rec for rec in self if fnc(rec[fld], expr)]
+            filtered = [rec for rec, val in zip(self, vals) if fnc(val, expr)]
         elif op in ("startswith", "beginswith"):
-            filtered = [rec for rec in self if (rec[fld] or "").startswith(expr)]
+            filtered = [rec for rec, val in zip(self, vals) if (val or "").startswith(expr)]
         elif op == "endswith":
-            filtered = [rec for rec in self if (rec[fld] or "").endswith(expr)]
+            filtered = [rec for rec, val in zip(self, vals) if (val or "").endswith(expr)]
         elif op == "contains":
-            filtered = [rec for rec in self if expr in (rec[fld] or "")]
+            filtered = [rec for rec, val in zip(self, vals) if expr in (val or "")]
         ret = self.__class__(filtered)
         ret._sourceDataSet = self
         ret._filtered_fld = fld
@@ -209,12 +635,27 @@ class dDataSet(tuple):
         if not self:
             # No rows, so nothing to filter
             return self
-        stmnt = f""" [rec for rec in self if {self._fldReplace(expr, "rec")}] """
-        recs = eval(stmnt)
-        ret = self.__class__(recs)
+        ret = self.__class__(self._evalExpression(expr, asFilter=True))
+        ret._sourceDataSet = self
+        return ret
+
+    def _filterRows(self, rows):
+        """Returns a filtered dataset with the records at the passed row numbers."""
+        ret = self.__class__([self[row] for row in rows])
         ret._sourceDataSet = self
         return ret
 
+    def _evalExpression(self, expr, asFilter=False):
+        """Evaluates the passed expression, in which the field names can be used
+        as variables, for every record. Returns the list of the records for which
+        it is true if 'asFilter' is True; otherwise, the list of the values.
+        """
+        fields = frozenset(self[0])
+        code, flds = _compileExpression(expr, fields, asFilter)
+        namespace = globals().copy()
+        namespace["_dabo_rows"] = zip(self, *[self._columnValues(fld) for fld in flds])
+        return eval(code, namespace)
+
     def removeFilter(self):
         """Remove the most recently applied filter."""
         ret = self
@@ -229,30 +670,6 @@ class dDataSet(tuple):
             ret = ret._sourceDataSet
         return ret
 
-    def _fldReplace(self, expr, dictName=None):
-        """The list comprehensions require the field names be the keys
-        in a dictionary expression. Users, though, should not have to know
-        about this. This takes a user-defined, SQL-like expressions, and
-        substitutes any field name with the corresponding dict
-        expression. If no dictName is supplied, the name 'rec' will be used,
-        for the typical list comprehension of :
-            [rec for rec in self where ...]
-        Examples (assuming 'price' is a column in the data):
-            self._fldReplace("price > 50")
-                => returns "rec['price'] > 50"
-            self._fldReplace("price > 50", "foo")
-                => returns "foo['price'] > 50"
-        """
-        patTemplate = r"\b%s\b"
-        ret = expr
-        if dictName is None:
-            dictName = "rec"
-        for kk in self[0]:
-            pat = patTemplate % kk
-            replacement = f"{dictName}['{kk}']"
-            ret = re.sub(pat, replacement, ret)
-        return ret
-
     def _makeCreateTable(self, ds, alias=None):
         """Makes the CREATE TABLE string needed to represent
         this data set. There must be at least one record in the
@@ -298,26 +715,26 @@ class dDataSet(tuple):
             # Can't create and populate a table without a structure
             dabo.log.info(_("Cannot populate without data for alias '%s'") % alias)
             return None
-        uds = ustr(ds)
-        try:
-            uds = uds.encode("utf-8")
-        except AttributeError:
-            # Already encoded
-            pass
-        hs = hashlib.md5(uds).hexdigest()
-        if hs == ds._dataHash:
-            # Data's already there and hasn't changed; no need to re-load it
-            return
-        ds._dataHash = hs
-        if ds._populated:
-            # Clear out the old records
-            self._cursor.execute("delete from %s" % alias)
-        else:
+        # Fields may contain illegal names. This will correct them
+        flds = [fld.replace("dabo-", "dabo_") for fld in ds[0]]
+        loaded = self._loadedTables.get(alias)
+        # Records may have been changed in place without a call to dataChanged().
+        vals = [tuple(rec.values()) for rec in ds]
+        if loaded is not None:
+            loadedDs, version, loadedFlds, loadedVals = loaded
+            if loadedDs is ds and version == ds._version and loadedVals == vals:
+                # Data's already there and hasn't changed; no need to re-load it
+                return
+            if loadedFlds == flds:
+                # Clear out the old records
+                self._cursor.execute("delete from %s" % alias)
+            else:
+                self._cursor.execute("drop table %s" % alias)
+                loaded = None
+        if loaded is None:
             # Create the table
             self._cursor.execute(self._makeCreateTable(ds, alias))
 
-        # Fields may contain illegal names. This will correct them
-        flds = [fld.replace("dabo-", "dabo_") for fld in ds[0]]
         fldParams = [f":{fld}" for fld in flds]
         insStmnt = "insert into %s (%s) values (%s)" % (
             alias,
@@ -327,9 +744,13 @@ class dDataSet(tuple):
 
         def recGenerator(ds):
             for rec in ds:
+                if isinstance(rec, _ColumnarRecord):
+                    # SQLite only accepts real dicts for named parameters.
+                    rec = dict(rec)
                 yield rec
 
         self._cursor.executemany(insStmnt, recGenerator(ds))
+        self._loadedTables[alias] = (ds, ds._version, flds, vals)
         if ds is self:
             self._populated = True
 
@@ -399,6 +820,8 @@ class dDataSet(tuple):
         # modified data set.
         if not sqlExpr.lower().strip().startswith("select "):
             self._cursor.execute("select * from dataset")
+            # The table no longer matches the records.
+            self._loadedTables.pop("dataset", None)
         tmpres = self._cursor.fetchall()
         return dDataSet(tmpres)
 
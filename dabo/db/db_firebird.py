@@ -16,6 +16,7 @@ class Firebird(dBackend):
     # if you need quotes for spaces and bad names, you'll have to supply
     # them yourself.
     nameEnclosureChar = ""
+    validationSQL = "select 1 from rdb$database"
 
     def __init__(self):
         dBackend.__init__(self)
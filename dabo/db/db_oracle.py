@@ -14,6 +14,8 @@ from .backend import dBackend
 
 
 class Oracle(dBackend):
+    validationSQL = "select 1 from dual"
+
     def __init__(self):
         import cx_Oracle as dbapi
 
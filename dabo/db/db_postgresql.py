@@ -94,6 +94,9 @@ class Postgres(dBackend):
         dabo.dbActivityLog.info("SQL: begin (implicit, nothing done)")
         return True
 
+    def interrupt(self):
+        self._connection.cancel()
+
     def getDictCursorClass(self):
         # the new psycopg 2.0 supports DictCursor
         import psycopg2.extras as cursors
@@ -239,6 +242,46 @@ class Postgres(dBackend):
         self.commitTransaction(cursor)
         dabo.dbActivityLog.info("SQL: Commit")
 
+    def insertMany(self, cursor, sql, paramList, keyField=None):
+        """
+        Postgres can return the generated key of an insert with the RETURNING clause,
+        which saves asking for each key after the insert. The order in which a multi-row
+        insert returns its records isn't defined, so each row gets its own statement.
+        """
+        if not keyField:
+            return super().insertMany(cursor, sql, paramList)
+        kf = self.encloseNames(keyField, cursor.AutoQuoteNames)
+        ret = []
+        for row in self._insertReturning(cursor, sql, paramList, kf):
+            if isinstance(row, dict):
+                row = list(row.values())
+            ret.append(row[0])
+        return ret
+
+    def insertManyReturning(self, cursor, sql, paramList):
+        """
+        Returns the complete inserted records, using 'returning *'. Each record is
+        inserted with its own statement, as the order of the rows returned by a
+        multi-row insert isn't defined.
+        """
+        ret = []
+        names = None
+        for row in self._insertReturning(cursor, sql, paramList, "*"):
+            if not isinstance(row, dict):
+                if names is None:
+                    names = [desc[0] for desc in cursor.description]
+                row = dict(zip(names, row))
+            ret.append(row)
+        return ret
+
+    def _insertReturning(self, cursor, sql, paramList, returning):
+        """
+        Inserts each set of parameters with its own statement, and returns the record
+        that each statement returned, in the same order as 'paramList'.
+        """
+        sql = "%s returning %s" % (sql.rstrip(), returning)
+        return [cursor._executeReturning(sql, params)[0] for params in paramList]
+
     def getLastInsertID(self, cursor):
         """
         Return the ID of the last inserted row, or None.
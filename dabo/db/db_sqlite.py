@@ -71,7 +71,11 @@ class SQLite(dBackend):
             pth = pth.decode(settings.fileSystemEncoding)
 
         # Need to specify "isolation_level=None" to have transactions working correctly.
-        self._connection = self.dbapi.connect(pth, factory=DictConnection, isolation_level=None)
+        # Pooled connections are handed from thread to thread, but only ever used by
+        # one thread at a time, so sqlite's same-thread check isn't needed for them.
+        self._connection = self.dbapi.connect(
+            pth, factory=DictConnection, isolation_level=None, check_same_thread=not self.pooled
+        )
 
         # Non-utf8-encoded bytestrings could be in the database, and Dabo will try various encodings
         # to deal with it. So tell sqlite not to decode with utf-8, but to just return the bytes:
@@ -86,6 +90,9 @@ class SQLite(dBackend):
                 self._encoding = enc_resp.get("encoding", settings.getEncoding())
         return self._connection
 
+    def interrupt(self):
+        self._connection.interrupt()
+
     def getDictCursorClass(self):
         return self._dictCursorClass
 
@@ -155,6 +162,17 @@ class SQLite(dBackend):
         rs = cursor.getDataSet()
         return len(rs) > 0
 
+    def insertManyReturning(self, cursor, sql, paramList):
+        """
+        SQLite 3.35 and later support the RETURNING clause. The order in which it
+        returns the records of a multi-row insert isn't defined, so each record is
+        inserted with its own statement; this still saves selecting it again.
+        """
+        if self.dbapi.sqlite_version_info < (3, 35, 0):
+            return None
+        sql = "%s returning *" % sql.rstrip()
+        return [cursor._executeReturning(sql, params)[0] for params in paramList]
+
     def getTables(self, cursor, includeSystemTables=False):
         cursor.execute("select * from sqlite_master")
         rs = cursor.getDataSet()
@@ -1,7 +1,11 @@
 # -*- coding: utf-8 -*-
+import os
+import tempfile
+import threading
 import unittest
 
 from .. import db
+from .. import exceptions
 
 
 class Test_dConnectInfo(unittest.TestCase):
@@ -30,6 +34,115 @@ class Test_dConnectInfo(unittest.TestCase):
         self.assertRaises(Exception, anotherBogusParm)
 
 
+class Test_dConnectionPool(unittest.TestCase):
+    def setUp(self):
+        fd, self.dbPath = tempfile.mkstemp(suffix=".sqlite")
+        os.close(fd)
+        self.conn = db.dConnection(DbType="SQLite", Database=self.dbPath)
+        self.conn.getDaboCursor().execute("create table t (pk INTEGER PRIMARY KEY, val INT)")
+        self.pool = self.conn.Pool
+        self.pool.MaxSize = 2
+
+    def tearDown(self):
+        self.conn.close()
+        os.remove(self.dbPath)
+
+    def test_checkout(self):
+        pool = self.pool
+        first = pool.checkout()
+        self.assertIsNot(first, self.conn)
+        self.assertIsNot(first.getBackendObject(), self.conn.getBackendObject())
+        second = pool.checkout()
+        self.assertRaises(exceptions.ConnectionPoolExhaustedException, pool.checkout, 0)
+        pool.checkin(first)
+        self.assertIs(pool.checkout(), first)
+        pool.checkin(first)
+        pool.checkin(second)
+        self.assertEqual((pool.Size, pool.IdleCount), (2, 2))
+        self.assertRaises(ValueError, pool.checkin, first)
+
+    def test_transactions(self):
+        # Uncommitted work in a pooled connection is rolled back when it is checked in
+        with self.pool.connection() as pooled:
+            crs = pooled.getDaboCursor()
+            crs.beginTransaction()
+            crs.execute("insert into t (val) values (1)")
+        crs = self.conn.getDaboCursor()
+        crs.execute("select * from t")
+        self.assertEqual(crs.RowCount, 0)
+
+    def test_validation(self):
+        pool = self.pool
+        pool.ValidateAfter = 0
+        pooled = pool.checkout()
+        pool.checkin(pooled)
+        pooled.getConnection().close()
+        # The broken connection is replaced
+        self.assertIsNot(pool.checkout(), pooled)
+
+    def test_reap(self):
+        pool = self.pool
+        pool.checkin(pool.checkout())
+        pool.IdleTimeout = -1
+        pool.reap()
+        self.assertEqual(pool.Size, 0)
+        pool.MinSize = 1
+        self.assertEqual(pool.IdleCount, 1)
+
+    def test_getThreadConnection(self):
+        self.assertIs(self.conn.getThreadConnection(), self.conn)
+        found = []
+
+        def work():
+            found.append(self.conn.getThreadConnection())
+            found.append(self.conn.getThreadConnection())
+
+        thd = threading.Thread(target=work)
+        thd.start()
+        thd.join()
+        self.assertIs(found[0], found[1])
+        self.assertIsNot(found[0], self.conn)
+        # Connections of finished threads go back to the pool
+        self.assertIs(self.pool.checkout(), found[0])
+
+    def test_closeWithThreadConnection(self):
+        started = threading.Event()
+        finish = threading.Event()
+        found = []
+
+        def work():
+            found.append(self.pool.getThreadConnection())
+            started.set()
+            finish.wait()
+
+        thd = threading.Thread(target=work)
+        thd.start()
+        started.wait()
+        self.assertEqual(self.pool.Size, 1)
+        self.pool.close()
+        finish.set()
+        thd.join()
+        self.assertEqual(self.pool.Size, 0)
+        self.assertRaises(Exception, found[0].getConnection().execute, "select 1")
+
+    def test_sameThreadCheck(self):
+        # Only pooled connections may be used from threads other than their own
+        errors = []
+
+        def work(conn):
+            try:
+                conn.getConnection().execute("select 1")
+            except Exception as e:
+                errors.append(e)
+
+        for conn in (self.pool.checkout(), self.conn):
+            thd = threading.Thread(target=work, args=(conn,))
+            thd.start()
+            thd.join()
+        self.assertEqual(len(errors), 1)
+
+
 if __name__ == "__main__":
-    suite = unittest.TestLoader().loadTestsFromTestCase(Test_dConnectInfo)
-    unittest.TextTestRunner(verbosity=2).run(suite)
+    for testCase in (Test_dConnectInfo, Test_dConnectionPool):
+        suite = unittest.TestLoader().loadTestsFromTestCase(testCase)
+        unittest.TextTestRunner(verbosity=2).run(suite)
@@ -1,5 +1,9 @@
 # -*- coding: utf-8 -*-
 import datetime
+import json
+import os
+import pickle
+import tempfile
 import unittest
 from decimal import Decimal
 
@@ -312,6 +316,7 @@ insert into %s (cfield, ifield, nfield) values (NULL, NULL, NULL)
         cur.requery()
         self.assertEqual(settings.convertFloatToDecimal, False)
         self.assertIsInstance(rec.ffield, float)
+        settings.convertFloatToDecimal = True
 
     def test_convert_float_to_decimal(self):
         """
@@ -331,6 +336,292 @@ insert into %s (cfield, ifield, nfield) values (NULL, NULL, NULL)
         self.assertEqual(rec.ffield, Decimal("11"))
         self.assertEqual(str(rec.ffield), "11.0")
 
+    def test_pkIndex(self):
+        """
+        Make sure PK lookups stay correct as the dataset changes.
+        """
+        cur = self.cur
+        cur.sort("cfield")
+        cur.moveToPK(1)
+        self.assertEqual(cur.Record.cfield, "Paul Keith McNett")
+        self.assertEqual(cur.RowNumber, 2)
+        self.assertTrue(cur.hasPK(2))
+        self.assertFalse(cur.hasPK(99))
+
+        cur.new()
+        tmpPK = cur.genTempAutoPK()
+        cur.setNewFlag()
+        self.assertTrue(cur.hasPK(tmpPK))
+        cur.first()
+        cur.moveToPK(tmpPK)
+        self.assertEqual(cur.RowNumber, 3)
+
+        cur.moveToPK(3)
+        cur.setFieldVal("pk", 33)
+        self.assertFalse(cur.hasPK(3))
+        cur.first()
+        cur.moveToPK(33)
+        self.assertEqual(cur.Record.cfield, "Carl Karsten")
+
+        cur.moveToPK(2)
+        cur.delete()
+        self.assertFalse(cur.hasPK(2))
+        cur.moveToPK(tmpPK)
+        self.assertEqual(cur.RowNumber, 2)
+        cur.moveToPK(1)
+        self.assertEqual(cur.Record.cfield, "Paul Keith McNett")
+
+    def test_sort(self):
+        """
+        Make sure sorting, reversing and unsorting keep the rows and pointer right.
+        """
+        cur = self.cur
+
+        def cvals():
+            return [rec["cfield"] for rec in cur.getDataSet(flds=("cfield",))]
+
+        cur.moveToPK(2)
+        cur.sort("cfield")
+        self.assertEqual(cvals(), ["Carl Karsten", "Edward Leafe", "Paul Keith McNett"])
+        self.assertEqual(cur.Record.pk, 2)
+        cur.sort("cfield", "DESC")
+        self.assertEqual(cvals(), ["Paul Keith McNett", "Edward Leafe", "Carl Karsten"])
+        self.assertEqual(cur.Record.pk, 2)
+        cur.setFieldVal("cfield", "Zeke", row=2)
+        cur.sort("cfield", "ASC")
+        self.assertEqual(cvals(), ["Edward Leafe", "Paul Keith McNett", "Zeke"])
+        cur.sort("cfield", "DESC")
+        # Cycling from DESC restores the unsorted order.
+        cur.sort("cfield", "CYCLE")
+        self.assertEqual(cur.sortOrder, "")
+        self.assertEqual([rec["pk"] for rec in cur.getDataSet(flds=("pk",))], [1, 2, 3])
+
+        cur.setFieldVal("ifield", 42, row=0)
+        cur.sort(("ifield", "cfield"), "DESC")
+        self.assertEqual([rec["pk"] for rec in cur.getDataSet(flds=("pk",))], [3, 1, 2])
+        self.assertEqual(cur.sortColumn, ("ifield", "cfield"))
+        self.assertRaises(exceptions.dException, cur.sort, ("ifield", "nosuchfield"))
+
+    def test_seek(self):
+        """
+        Make sure seek() finds exact, near, incremental and compound matches.
+        """
+        cur = self.cur
+        self.assertEqual(cur.seek("Edward Leafe", "cfield"), 1)
+        self.assertEqual(cur.RowNumber, 1)
+        self.assertEqual(cur.seek("edward leafe", "cfield"), -1)
+        self.assertEqual(cur.seek("edward leafe", "cfield", caseSensitive=False), 1)
+        self.assertEqual(cur.seek("Dan", "cfield", near=True), 1)
+        self.assertEqual(cur.seek("pau", "cfield", False, near=True, incremental=True), 0)
+        self.assertEqual(cur.seek("Zed", "cfield", near=True, incremental=True), 2)
+        self.assertEqual(cur.seek(42, "ifield"), 1)
+        self.assertEqual(cur.seek(50, "ifield", near=True), 2)
+        self.assertEqual(cur.seek(("Carl Karsten", 10223), ("cfield", "ifield")), 2)
+        self.assertEqual(cur.seek(("Carl Karsten", 42), "cfield, ifield"), -1)
+        self.assertEqual(cur.seek(("Carl Karsten",), ("cfield",)), 2)
+        self.assertEqual(cur.seek(["Edward Leafe"], ["cfield"]), 1)
+        self.assertTrue(cur.locate("Paul Keith McNett", "cfield"))
+        self.assertEqual(cur.RowNumber, 0)
+
+        # Changed values must be found
+        cur.setFieldVal("cfield", "Ed Leafe", row=1)
+        self.assertEqual(cur.seek("Edward Leafe", "cfield"), -1)
+        self.assertEqual(cur.seek("Ed Leafe", "cfield"), 1)
+        cur.sort("cfield", "DESC")
+        self.assertEqual(cur.seek("Carl Karsten", "cfield"), 2)
+        self.assertRaises(exceptions.FieldNotFoundException, cur.seek, 1, "nosuchfield")
+
+    def test_saveAllRows(self):
+        cur = self.cur
+        cur.setFieldVal("cfield", "Paul McNett", row=0)
+        cur.setFieldVal("cfield", "Ed Leafe", row=1)
+        cur.setFieldVal("ifield", 99, row=2)
+        cur.new()
+        cur.genTempAutoPK()
+        cur.setNewFlag()
+        cur.Record.cfield = "Denise McNett"
+        cur.new()
+        cur.genTempAutoPK()
+        cur.setNewFlag()
+        cur.Record.cfield = "Alison Anton"
+        cur.save(allRows=True)
+        self.assertFalse(cur.isChanged())
+        self.assertEqual(cur.getFieldVal("pk", 3), 4)
+        self.assertEqual(cur.getFieldVal("pk", 4), 5)
+        cur.requery()
+        self.assertEqual(cur.RowCount, 5)
+        self.assertEqual(
+            [cur.getFieldVal("cfield", row) for row in range(5)],
+            ["Paul McNett", "Ed Leafe", "Carl Karsten", "Denise McNett", "Alison Anton"],
+        )
+        self.assertEqual(cur.getFieldVal("ifield", 2), 99)
+
+    def test_getFields(self):
+        cur = self.cur
+        bo = cur.BackendObject
+        flds = cur.getFields()
+        self.assertEqual([fld[0] for fld in flds], ["pk", "cfield", "ifield", "nfield", "ffield"])
+        # The backend table is only introspected once
+        self.assertIs(cur.getFields(), flds)
+        version = bo.SchemaCacheVersion
+        cur.execute("alter table %s add column dfield DATE" % self.temp_table_name)
+        self.assertGreater(bo.SchemaCacheVersion, version)
+        self.assertEqual(cur.getFields()[-1][0], "dfield")
+
+    def test_SchemaCacheFile(self):
+        cur = self.cur
+        bo = cur.BackendObject
+        flds = cur.getFields()
+        fd, pth = tempfile.mkstemp(suffix=".json")
+        os.close(fd)
+        self.addCleanup(os.remove, pth)
+        bo.saveSchemaCache(pth)
+        bo.invalidateSchemaCache()
+        self.assertTrue(bo.loadSchemaCache(pth))
+        self.assertEqual(cur.getFields(), flds)
+        # Files written by another version of Dabo are ignored
+        with open(pth, encoding="utf-8") as ff:
+            snapshot = json.load(ff)
+        snapshot["identity"][1] = "0.0.0-other"
+        with open(pth, "w", encoding="utf-8") as ff:
+            json.dump(snapshot, ff)
+        bo.invalidateSchemaCache()
+        self.assertFalse(bo.loadSchemaCache(pth))
+
+    def test_getDataStructureMap(self):
+        cur = self.cur
+        dsMap = cur.getDataStructureMap()
+        self.assertEqual(dsMap["cfield"], cur.DataStructure[1])
+        self.assertIs(cur.getDataStructureMap(), dsMap)
+        cur.DataStructure = (("pk", "I", True), ("cfield", "C", False))
+        self.assertEqual(sorted(cur.getDataStructureMap()), ["cfield", "pk"])
+
+    def test_getColumns(self):
+        cur = self.cur
+        cur.RowNumber = 1
+        cols = cur.getColumns(("cfield", "ifield"))
+        self.assertEqual(cols["ifield"], [23, 42, 10223])
+        self.assertEqual(cur.getColumns(("nfield",), rows=[2])["nfield"], [Decimal("23032.76")])
+        self.assertEqual(sorted(cur.getColumns()), ["cfield", "ffield", "ifield", "nfield", "pk"])
+        self.assertEqual(list(cur.iterRows(("pk",), rows=(2, 0))), [{"pk": 3}, {"pk": 1}])
+        self.assertRaises(exceptions.RowNotFoundException, cur.getColumns, rows=[5])
+        self.assertEqual(cur.RowNumber, 1)
+
+    def test_snapshot(self):
+        cur = self.cur
+        snap = cur.takeSnapshot()
+        rec0 = cur._records[0]
+        cur.setFieldVal("cfield", "Changed", 0)
+        # Only the changed record was copied.
+        self.assertEqual(list(snap._originals), [id(rec0)])
+        inner = cur.takeSnapshot()
+        cur.setFieldVal("ifield", 99, 1)
+        cur.new()
+        cur.genTempAutoPK()
+        cur.setNewFlag()
+        self.assertEqual(cur.RowCount, 4)
+
+        restored = pickle.loads(pickle.dumps(inner))
+        inner.restore()
+        self.assertEqual(cur.RowCount, 3)
+        self.assertEqual(cur.getFieldVal("ifield", 1), 42)
+        self.assertEqual(cur.getFieldVal("cfield", 0), "Changed")
+        self.assertEqual(cur._newRecords, {})
+        snap.restore()
+        self.assertEqual(cur.getFieldVal("cfield", 0), "Paul Keith McNett")
+        self.assertFalse(cur.isChanged())
+        # Restoring the outer snapshot didn't affect the inner one.
+        inner.restore()
+        self.assertEqual(cur.getFieldVal("cfield", 0), "Changed")
+        self.assertEqual(cur._mementos, {1: {"cfield": "Paul Keith McNett"}})
+        snap.release()
+        inner.release()
+
+        # An unpickled snapshot can be restored into any cursor for the table.
+        cur.requery()
+        cur.restoreSnapshot(restored)
+        self.assertEqual(cur.RowCount, 3)
+        self.assertEqual(cur.getFieldVal("cfield", 0), "Changed")
+        self.assertTrue(cur.isChanged())
+        cur.save(allRows=True)
+        cur.requery()
+        self.assertEqual(cur.getFieldVal("cfield", 0), "Changed")
+
+    def test_FieldTypeCorrection(self):
+        cur = self.cur
+        cur.UserSQL = (
+            "select *, ifield * 1.5 as calc, null as nofield, '12' as txt from %s"
+            % self.temp_table_name
+        )
+        cur.requery()
+        # The values are corrected when they are fetched.
+        self.assertIsInstance(cur._records[0]["nfield"], Decimal)
+        # Floats become Decimals with the scale they were stored with.
+        self.assertEqual(cur.getFieldVal("nfield", 0), Decimal("23.23"))
+        self.assertEqual(cur.getFieldVal("ffield", 1), Decimal("0.999999"))
+        # In untyped fields, only floats are converted.
+        self.assertEqual(cur.getFieldVal("calc", 0), Decimal("34.5"))
+        self.assertIsNone(cur.getFieldVal("nofield", 0))
+        self.assertEqual(cur.getFieldVal("txt", 0), "12")
+        self.assertEqual(cur.getFieldVal("ifield", 2), 10223)
+        # A scale in the DataStructure is applied to the Decimals.
+        ds = list(cur.DataStructure)
+        idx = [fld[0] for fld in ds].index("nfield")
+        ds[idx] = ds[idx][:5] + (3,)
+        cur.DataStructure = ds
+        cur.requery()
+        val = cur.getFieldVal("nfield", 2)
+        self.assertEqual(val, Decimal("23032.76"))
+        self.assertEqual(val.as_tuple().exponent, -3)
+
+    def test_DataVersion(self):
+        cur = self.cur
+        version = cur.DataVersion
+        cur.RowNumber = 1
+        cur.getFieldVal("cfield")
+        self.assertEqual(cur.DataVersion, version)
+        for change in (
+            lambda: cur.setFieldVal("cfield", "Changed"),
+            lambda: cur.cancel(),
+            lambda: cur.sort("ifield", "DESC"),
+            lambda: cur.requery(),
+        ):
+            change()
+            self.assertNotEqual(cur.DataVersion, version)
+            version = cur.DataVersion
+
+    def test_FetchSize(self):
+        cur = self.cur
+        cur.FetchSize = 2
+        cur.requery()
+        self.assertEqual(len(cur._records), 2)
+        self.assertEqual(cur.RowCount, 3)
+        self.assertEqual(cur.getFieldVal("cfield", 2), "Carl Karsten")
+        self.assertEqual(len(cur._records), 3)
+        self.assertEqual(cur.RowCount, 3)
+
+        cur.requery()
+        cur.last()
+        self.assertEqual(cur.RowNumber, 2)
+        self.assertEqual(cur.Record.cfield, "Carl Karsten")
+
+        cur.first()
+        cur.requery()
+        cur.setFieldVal("ifield", 24)
+        stream = cur.getRecordStream()
+        self.assertEqual(len(stream), 3)
+        self.assertEqual(stream[0]["cfield"], "Paul Keith McNett")
+        self.assertEqual([rec["ifield"] for rec in stream], [24, 42, 10223])
+        # The streamed rows are not kept in the cursor, which is left as it was.
+        self.assertEqual(len(cur._records), 2)
+        self.assertEqual(cur.RowCount, 3)
+        self.assertEqual(cur.getFieldVal("cfield", 2), "Carl Karsten")
+        cur.requery()
+        stream = cur.getRecordStream()
+        self.assertEqual(stream[2]["cfield"], "Carl Karsten")
+        self.assertEqual(len(cur._records), 3)
+        self.assertRaises(IndexError, stream.__getitem__, 3)
+
 
 class Test_dCursorMixin_sqlite(Test_dCursorMixin, unittest.TestCase):
     def setUp(self):
@@ -340,6 +631,29 @@ class Test_dCursorMixin_sqlite(Test_dCursorMixin, unittest.TestCase):
         super().setUp()
 
 
+class Test_dCursorMixin_sqlite_columnar(Test_dCursorMixin, unittest.TestCase):
+    def setUp(self):
+        con = db.dConnection(DbType="SQLite", Database=":memory:")
+        self.cur = con.getDaboCursor()
+        self.cur.ColumnarStorage = True
+        self.temp_table_name = f"unittest{getRandomUUID().replace('-', '')[-17:]}"
+        super().setUp()
+
+    def testColumnarRecords(self):
+        cur = self.cur
+        store = cur._records._getColumnStore()
+        self.assertIsNotNone(store)
+        self.assertEqual(store.column("ifield"), [23, 42, 10223])
+        rec = cur._records[1]
+        self.assertEqual(rec["cfield"], "Edward Leafe")
+        rec["cfield"] = "Ed Leafe"
+        self.assertEqual(cur.getFieldVal("cfield", 1), "Ed Leafe")
+        self.assertEqual(len(cur._records.filter("ifield", 40, "gt")), 2)
+        ds = cur.getDataSet(flds=("pk", "ifield"))
+        self.assertEqual(ds[2], {"pk": 3, "ifield": 10223})
+        self.assertIsInstance(ds[2], dict)
+
+
 class Test_dCursorMixin_mysql(Test_dCursorMixin, unittest.TestCase):
     def setUp(self):
         con = db.dConnection(
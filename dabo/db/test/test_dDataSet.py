@@ -0,0 +1,117 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from .. import db
+
+
+class Test_dDataSet(unittest.TestCase):
+    def setUp(self):
+        self.ds = db.dDataSet(
+            [
+                {"name": "Ed Leafe", "age": 51, "coder": True, "color": "brown"},
+                {"name": "Mike Leafe", "age": 21, "coder": False, "color": "purple"},
+                {"name": "Dan Leafe", "age": 17, "coder": False, "color": None},
+                {"name": "Paul McNett", "age": 39, "coder": True, "color": "red"},
+            ]
+        )
+
+    def tearDown(self):
+        self.ds = None
+
+    def names(self, ds):
+        return [rec["name"] for rec in ds]
+
+    def test_sort(self):
+        ds = self.ds
+        self.assertEqual(
+            self.names(ds.sort("age")), ["Dan Leafe", "Mike Leafe", "Paul McNett", "Ed Leafe"]
+        )
+        self.assertEqual(
+            self.names(ds.sort("age", "desc")),
+            ["Ed Leafe", "Paul McNett", "Mike Leafe", "Dan Leafe"],
+        )
+        # Empty values sort first, as in SQL
+        self.assertEqual(ds.sort("color")[0]["name"], "Dan Leafe")
+        self.assertEqual(
+            self.names(ds.sort("coder DESC, name")),
+            ["Ed Leafe", "Paul McNett", "Dan Leafe", "Mike Leafe"],
+        )
+        # Anything else is handled by SQLite
+        self.assertEqual(self.names(ds.sort("length(name)"))[0], "Ed Leafe")
+        # The sorted records are copies
+        ds.sort("name")[0]["age"] = 999
+        self.assertNotIn(999, [rec["age"] for rec in ds])
+
+    def test_project(self):
+        ds = self.ds.project("name, age")
+        self.assertEqual(ds[1], {"name": "Mike Leafe", "age": 21})
+
+    def test_groupBy(self):
+        ds = self.ds.groupBy(
+            "coder",
+            {
+                "cnt": ("count", "*"),
+                "colors": ("count", "color"),
+                "oldest": ("max", "age"),
+                "avgAge": ("avg", "age"),
+            },
+        )
+        self.assertEqual(len(ds), 2)
+        self.assertEqual(ds[0], {"coder": True, "cnt": 2, "colors": 2, "oldest": 51, "avgAge": 45})
+        self.assertEqual(ds[1], {"coder": False, "cnt": 2, "colors": 1, "oldest": 21, "avgAge": 19})
+        self.assertRaises(ValueError, self.ds.groupBy, "coder", {"x": ("median", "age")})
+
+    def test_join(self):
+        colors = db.dDataSet(
+            [
+                {"color": "brown", "hex": "#8B4513"},
+                {"color": "red", "hex": "#FF0000"},
+            ]
+        )
+        ds = self.ds.join(colors, "color")
+        self.assertEqual(self.names(ds), ["Ed Leafe", "Paul McNett"])
+        self.assertEqual(ds[1]["hex"], "#FF0000")
+        ds = self.ds.join(colors, "color", how="left")
+        self.assertEqual(len(ds), 4)
+        self.assertEqual(ds[2]["hex"], None)
+        # The unmatched records keep the values of the shared fields
+        self.assertEqual(ds[1], {**self.ds[1], "hex": None})
+        self.assertEqual(ds[2]["color"], None)
+
+    def test_filterByExpression(self):
+        ds = self.ds.filterByExpression("age > 20 and name.endswith('Leafe')")
+        self.assertEqual(self.names(ds), ["Ed Leafe", "Mike Leafe"])
+        self.assertIs(ds.removeFilter(), self.ds)
+        # Field names inside strings are left alone
+        ds = self.ds.filterByExpression("color == 'red' or name == 'age'")
+        self.assertEqual(self.names(ds), ["Paul McNett"])
+        self.assertRaises(NameError, self.ds.filterByExpression, "agee > 20")
+
+    def test_replace(self):
+        ds = self.ds
+        ds.replace("age", "=age + 1", scope="coder")
+        self.assertEqual([rec["age"] for rec in ds], [52, 21, 17, 40])
+        ds.replace("color", "blue", scope="color is None")
+        self.assertEqual(ds[2]["color"], "blue")
+        ds.replace("name", "=name.upper()")
+        self.assertEqual(ds[0]["name"], "ED LEAFE")
+
+    def test_execute(self):
+        ds = self.ds
+        over30 = ds.execute("select name, age from dataset where age > 30")
+        self.assertEqual(len(over30), 2)
+        # Values changed in place are seen, whether or not dataChanged() is called
+        ds[1]["age"] = 99
+        over30 = ds.execute("select name, age from dataset where age > 30")
+        self.assertEqual(len(over30), 3)
+        ds[2]["age"] = 98
+        ds.dataChanged()
+        over30 = ds.execute("select name, age from dataset where age > 30")
+        self.assertEqual(len(over30), 4)
+        ds.replace("age", 10)
+        self.assertEqual(len(ds.execute("select * from dataset where age > 30")), 0)
+
+
+if __name__ == "__main__":
+    suite = unittest.TestLoader().loadTestsFromTestCase(Test_dDataSet)
+    unittest.TextTestRunner(verbosity=2).run(suite)
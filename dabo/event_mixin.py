@@ -19,20 +19,68 @@ class EventMixin:
     # (dPemMixin calls _initEvents → bindEvent before dObject.__init__ → EventMixin.__init__)
     _event_bindings = None
     _raised_events = None
+    # Lookup tables built from _event_bindings; see _getEventIndex().
+    _event_index = None
 
     def __init__(self):
         # Don't touch _event_bindings — it may already have bindings from
         # _initEvents/bindEvent, which runs before this __init__ in the
         # dPemMixin init sequence.
-        # Per-instance list to avoid the shared-mutable-list problem.
+        # Per-instance dict to avoid the shared-mutable problem.
         if self._raised_events is None:
-            self._raised_events = []
+            self._raised_events = {}
 
     def bindEvent(self, eventClass, function, _auto=False):
         """Bind a dEvent to a callback function."""
         eb = self._EventBindings
-        if (eventClass, function) not in [(b[0], b[1]) for b in eb]:
+        bindingKeys = self._getEventIndex()[2]
+        key = (eventClass, function)
+        try:
+            isBound = key in bindingKeys
+        except TypeError:
+            # Unhashable callback; compare it to each binding instead.
+            isBound = key in [(b[0], b[1]) for b in eb]
+        if not isBound:
             eb.append((eventClass, function, _auto))
+            try:
+                bindingKeys.add(key)
+            except TypeError:
+                pass
+            # The handlers for the event class and its subclasses have changed.
+            self._event_index = (eb, len(eb), bindingKeys, {})
+
+    def _getEventIndex(self):
+        """
+        Returns the lookup tables for the event bindings, rebuilding them if the
+        bindings have changed: a tuple of the bindings list and its length when the
+        tables were built, the set of (eventClass, function) keys used to detect
+        duplicate bindings, and a dict that maps each raised event class to the
+        functions bound to it or to one of its base classes, in binding order.
+        """
+        eb = self._EventBindings
+        index = self._event_index
+        if index is None or index[0] is not eb or index[1] != len(eb):
+            bindingKeys = set()
+            for binding in eb:
+                try:
+                    bindingKeys.add((binding[0], binding[1]))
+                except TypeError:
+                    pass
+            index = self._event_index = (eb, len(eb), bindingKeys, {})
+        return index
+
+    def _getEventHandlers(self, eventClass):
+        """Returns the functions to call when the passed event class is raised."""
+        if not self._event_bindings:
+            return ()
+        handlerMap = self._getEventIndex()[3]
+        try:
+            return handlerMap[eventClass]
+        except KeyError:
+            classes = getattr(eventClass, "__mro__", (eventClass,))
+            handlers = tuple([b[1] for b in self._event_bindings if b[0] in classes])
+            handlerMap[eventClass] = handlers
+            return handlers
 
     def bindEvents(self, bindings):
         """Bind a sequence of [dEvent, callback] lists."""
@@ -59,46 +107,53 @@ class EventMixin:
         the event class (events.Hit, for example) as the only parameter.
         """
 
+        handlers = self._getEventHandlers(eventClass)
+        if not handlers and not settings.eventLogging:
+            # Nobody is listening, and the event isn't being logged: there is no
+            # need to create the event object at all.
+            if uiEvent is not None:
+                from . import ui
+
+                return ui.continueEvent(uiEvent)
+            return None
+
         # Instantiate the event, no matter if there aren't any bindings: the event
         # did happen, after all, and perhaps we want to log that fact.
 
-        from . import ui
-
-        # Ensure per-instance list exists (may still be the class-level None
+        # Ensure per-instance dict exists (may still be the class-level None
         # if __init__ hasn't run yet).
         if self._raised_events is None:
-            self._raised_events = []
+            self._raised_events = {}
 
-        eventSig = (eventClass, args, kwargs)
-        if eventSig in self._raised_events:
+        # The (args, kwargs) of each event of this class currently being handled.
+        raising = self._raised_events.setdefault(eventClass, [])
+        eventSig = (args, kwargs)
+        if raising and eventSig in raising:
             # The event is already being handled, but one of the handlers caused it to be
             # raised again.
             return None
-        self._raised_events.append(eventSig)
+        raising.append(eventSig)
 
         try:
             eventData = kwargs.pop("eventData", None)
             evtObject = kwargs.pop("eventObject", self)
 
             event = eventClass(evtObject, uiEvent=uiEvent, eventData=eventData, *args, **kwargs)
-            # Now iterate the bindings, and execute the callbacks:
+            # Now call the handlers that are bound to this event class (or one of
+            # its base classes):
             if settings.reverseEventsOrder:
-                bindings = reversed(self._EventBindings)
-            else:
-                bindings = self._EventBindings
-            for binding in bindings:
-                bindingClass, bindingFunction = binding[0], binding[1]
+                handlers = reversed(handlers)
+            for handler in handlers:
                 if not event:
                     continue
-                if bindingClass == eventClass:
-                    bindingFunction(event)
+                handler(event)
                 if not event.Continue:
                     # The event handler set the Continue flag to False, specifying that
                     # no more event handlers should process the event.
                     break
         finally:
             try:
-                self._raised_events.pop()
+                raising.pop()
             except (AttributeError, IndexError):
                 # This is a deleted object; no need (or ability!) to do anything else.
                 return
@@ -316,18 +371,21 @@ class EventMixin:
         toRemove.reverse()
         for idx in toRemove:
             del self._EventBindings[idx]
+        self._event_index = None
 
     @property
     def _EventBindings(self):
         """The list of event bindings ([Event, callback]) for this object."""
         # Handle initial `None` value
-        self._event_bindings = self._event_bindings or []
+        if self._event_bindings is None:
+            self._event_bindings = []
         return self._event_bindings
 
     @_EventBindings.setter
     def _EventBindings(self, val):
         if isinstance(val, list):
             self._event_bindings = val
+            self._event_index = None
         else:
             raise ValueError("_EventBindings must be a list.")
 
@@ -87,6 +87,10 @@ class DBFileDoesNotExistException(DatabaseException):
     pass
 
 
+class ConnectionPoolExhaustedException(DatabaseException):
+    pass
+
+
 class DBQueryException(DatabaseException):
     def __init__(self, err, sql=None):
         self.err_desc = err.rstrip()
@@ -6,27 +6,57 @@ later on to support other UI toolkits.
 """
 
 import codecs
+import hashlib
+import importlib.util
 import json
+import marshal
 import os
 import random
 import re
+import sys
 import tempfile
 import time
 from datetime import datetime
 from io import IOBase
 
 from .. import settings
+from .. import version
 from ..base_object import dObject
 from ..localization import _
 from ..ui.dialogs import Wizard
 from . import utils
 from . import xmltodict as xtd
+from .lruCache import LRUCache
 from .utils import ustr
 
 # Doesn't matter what platform we're on; Python needs
 # newlines in its compiled code.
 LINESEP = "\n"
 
+# Compiled class code, keyed on (source file path, source hash, Dabo version,
+# CreateDesignerControls). See DesignerClassConverter.classFromText().
+_codeCache = LRUCache(256)
+_daboVersion = None
+
+
+def _getDaboVersion():
+    global _daboVersion
+    if _daboVersion is None:
+        try:
+            _daboVersion = version.get_version()
+        except OSError:
+            _daboVersion = ""
+    return _daboVersion
+
+
+def _fileHash(pth):
+    """Returns a hash of the contents of the passed file, or None if it can't be read."""
+    try:
+        with open(pth, "rb") as ff:
+            return hashlib.sha1(ff.read()).hexdigest()
+    except OSError:
+        return None
+
 
 class DesignerClassConverter(dObject):
     def __init__(self, *args, **kwargs):
@@ -65,11 +95,110 @@ class DesignerClassConverter(dObject):
         self._srcFile = None
         # Encoding to be used
         self._encoding = settings.getEncoding()
+        # The files that the generated code was made from, mapped to hashes of their contents
+        self._sourceFiles = {}
 
     def classFromText(self, src):
         """
         Given a text file, returns a class object that that file represents. You can pass the text
         as either a file path, a file object, or raw XML/JSON text.
+
+        The compiled code for the class is cached, so later calls for the same text don't need to
+        parse it and generate the code again. The code for a file is also saved next to it, in a
+        .pyc file in a __pycache__ directory (unless sys.dont_write_bytecode is set), for use by
+        later runs. The cached code is used until the file, its code file, or any of the files
+        for the classes that it inherits from are changed.
+        """
+        key, pth = self._getCacheKey(src)
+        cached = self._getCachedCode(key, pth)
+        if cached is None:
+            cached = self._compileClass(src, pth)
+            if key is not None:
+                self._storeCachedCode(key, pth, cached)
+        nmSpace = {}
+        exec(cached[2], nmSpace)
+        return nmSpace[cached[1]]
+
+    def _getCacheKey(self, src):
+        """
+        Returns the key for the compiled code cache for the passed source, along with the
+        path of the source file, if any. Returns (None, None) for sources that can't be cached.
+        """
+        if isinstance(src, IOBase):
+            return None, None
+        pth = None
+        text = src
+        if not src.lstrip().startswith(("<", "{")):
+            try:
+                resolved = utils.resolvePathAndUpdate(src)
+            except IOError:
+                return None, None
+            if not os.path.isfile(resolved):
+                return None, None
+            pth = os.path.abspath(resolved)
+            with open(pth, "rb") as ff:
+                text = ff.read()
+        if isinstance(text, str):
+            text = text.encode("utf-8")
+        srcHash = hashlib.sha1(text).hexdigest()
+        return (pth, srcHash, _getDaboVersion(), bool(self.CreateDesignerControls)), pth
+
+    def _getPycPath(self, pth):
+        """Returns the path of the file that the compiled code for the passed file is saved in."""
+        dirName, fileName = os.path.split(pth)
+        return os.path.join(
+            dirName, "__pycache__", f"{fileName}.{sys.implementation.cache_tag}.pyc"
+        )
+
+    def _getCachedCode(self, key, pth):
+        """
+        Returns the cached (sourceFiles, className, code) for the passed key, from memory or from
+        the file's __pycache__ directory, or None if there isn't any or it is out of date.
+        """
+        if key is None:
+            return None
+        cached = _codeCache.get(key)
+        if cached is None and pth is not None:
+            try:
+                with open(self._getPycPath(pth), "rb") as ff:
+                    data = ff.read()
+                magic = importlib.util.MAGIC_NUMBER
+                if data.startswith(magic):
+                    storedKey, sourceFiles, className, code = marshal.loads(data[len(magic) :])
+                    if storedKey == key:
+                        cached = _codeCache[key] = (sourceFiles, className, code)
+            except (OSError, EOFError, ValueError, TypeError):
+                cached = None
+        if cached is None:
+            return None
+        for sourceFile, fileHash in cached[0].items():
+            if _fileHash(sourceFile) != fileHash:
+                _codeCache.pop(key)
+                return None
+        return cached
+
+    def _storeCachedCode(self, key, pth, cached):
+        _codeCache[key] = cached
+        if pth is None or sys.dont_write_bytecode:
+            return
+        pycPath = self._getPycPath(pth)
+        try:
+            os.makedirs(os.path.dirname(pycPath), exist_ok=True)
+            with open(pycPath, "wb") as ff:
+                ff.write(importlib.util.MAGIC_NUMBER + marshal.dumps((key,) + cached))
+        except (OSError, ValueError):
+            # Not writable, or the code can't be marshalled; it's still cached in memory.
+            pass
+
+    def _addSourceFile(self, pth):
+        """Records a file that the generated code depends on."""
+        pth = os.path.abspath(pth)
+        self._sourceFiles[pth] = _fileHash(pth)
+
+    def _compileClass(self, src, pth=None):
+        """
+        Parses the passed source and generates and compiles the code for the class. Returns a
+        tuple of the source files, the name of the class and the compiled code.
         """
         dct = self.dictFromStoredText(src)
         # Traverse the dct, looking for superclass information
@@ -95,10 +224,19 @@ class DesignerClassConverter(dObject):
         # jfcs added self._codeFileName to below
         # egl - created a tmp file for the main class code that we can use
         #   for compiling. This allows for full Python introspection.
-        compClass = compile(self.classText, self._classFileName, "exec")
-        nmSpace = {}
-        exec(compClass, nmSpace)
-        return nmSpace[self.mainClassName]
+        codeFileName = self._classFileName
+        if pth is not None and not sys.dont_write_bytecode:
+            # Keep the source for the cached code, for tracebacks and introspection.
+            pyPath = self._getPycPath(pth)[:-1]
+            try:
+                os.makedirs(os.path.dirname(pyPath), exist_ok=True)
+                with open(pyPath, "w") as ff:
+                    ff.write(self.classText)
+                codeFileName = pyPath
+            except OSError:
+                pass
+        compClass = compile(self.classText, codeFileName, "exec")
+        return (self._sourceFiles, self.mainClassName, compClass)
 
     def dictFromStoredText(self, src):
         """Takes either a path to a text file, an open file containing the text,
@@ -123,6 +261,7 @@ class DesignerClassConverter(dObject):
             encoding = self._encoding
         # Get the associated code file, if any
         codePth = f"{os.path.splitext(pth)[0]}-code.py"
+        self._addSourceFile(codePth)
         if os.path.exists(codePth):
             try:
                 codeContent = codecs.open(codePth, "r", encoding).read()
@@ -145,6 +284,7 @@ class DesignerClassConverter(dObject):
         except AttributeError:
             if os.path.exists(src):
                 self._srcFile = src = utils.resolvePathAndUpdate(src)
+                self._addSourceFile(src)
                 with open(src) as ff:
                     jsonText = ff.read()
             else:
@@ -168,6 +308,7 @@ class DesignerClassConverter(dObject):
                 xml = src = utils.resolvePathAndUpdate(src)
             if os.path.exists(src):
                 self._srcFile = src
+                self._addSourceFile(src)
             else:
                 parseCode = False
                 self._srcFile = os.getcwd()
@@ -799,6 +940,7 @@ class DesignerClassConverter(dObject):
         conv = DesignerClassConverter()
         xmlDict = conv.importXmlSrc(pth)
         conv.createClassText(xmlDict, addImports=False, specList=specList)
+        self._sourceFiles.update(conv._sourceFiles)
         self.innerClassText += conv.classText + (2 * LINESEP)
         self.innerClassNames.append(conv.mainClassName)
         return conv.mainClassName
@@ -0,0 +1,65 @@
+# -*- coding: utf-8 -*-
+import collections
+
+_NoValue = object()
+
+
+class LRUCache(object):
+    """
+    A dictionary-like cache that holds at most MaxSize items. Once it is full,
+    adding an item discards the item that was used least recently.
+    """
+
+    def __init__(self, maxSize=1000):
+        self._data = collections.OrderedDict()
+        self._maxSize = maxSize
+
+    def get(self, key, default=None):
+        """Return the value for the passed key, or 'default' if it isn't cached."""
+        val = self._data.get(key, _NoValue)
+        if val is _NoValue:
+            return default
+        self._data.move_to_end(key)
+        return val
+
+    def pop(self, key, default=None):
+        return self._data.pop(key, default)
+
+    def clear(self):
+        self._data.clear()
+
+    def _trim(self):
+        data = self._data
+        while len(data) > self._maxSize:
+            data.popitem(last=False)
+
+    def __getitem__(self, key):
+        val = self._data[key]
+        self._data.move_to_end(key)
+        return val
+
+    def __setitem__(self, key, val):
+        data = self._data
+        data[key] = val
+        data.move_to_end(key)
+        if len(data) > self._maxSize:
+            self._trim()
+
+    def __delitem__(self, key):
+        del self._data[key]
+
+    def __contains__(self, key):
+        return key in self._data
+
+    def __len__(self):
+        return len(self._data)
+
+    @property
+    def MaxSize(self):
+        """The number of items that the cache can hold.  (int)"""
+        return self._maxSize
+
+    @MaxSize.setter
+    def MaxSize(self, val):
+        self._maxSize = val
+        self._trim()
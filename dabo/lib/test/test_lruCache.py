@@ -0,0 +1,33 @@
+# -*- coding: utf-8 -*-
+import unittest
+
+from dabo.lib.lruCache import LRUCache
+
+
+class Test_LRUCache(unittest.TestCase):
+    def test_Eviction(self):
+        cache = LRUCache(3)
+        for num in range(3):
+            cache[num] = str(num)
+        # Using an item makes it the most recently used one.
+        self.assertEqual(cache.get(0), "0")
+        cache[3] = "3"
+        self.assertEqual(len(cache), 3)
+        self.assertNotIn(1, cache)
+        self.assertEqual(cache[0], "0")
+        self.assertIsNone(cache.get(1))
+
+    def test_MaxSize(self):
+        cache = LRUCache(5)
+        for num in range(5):
+            cache[num] = num
+        cache.MaxSize = 2
+        self.assertEqual(len(cache), 2)
+        self.assertIn(4, cache)
+        del cache[4]
+        self.assertEqual(cache.pop(3), 3)
+        self.assertEqual(len(cache), 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -265,6 +265,25 @@ dynamicMenuEnabling = False
 # When autosizing grid columns, limit the width to this value
 max_column_width = 500
 
+# Maximum number of tables whose field information each connection keeps cached
+schemaCacheSize = 256
+
+# Connection pools (see dabo.db.dConnectionPool): the number of connections kept open
+# even when idle, the most that can be open at once, how many seconds an idle
+# connection above the minimum is kept, how many seconds a connection can sit unused
+# before it is validated when borrowed, and how long to wait for a free connection.
+connectionPoolMinSize = 0
+connectionPoolMaxSize = 8
+connectionPoolIdleTimeout = 300
+connectionPoolValidateAfter = 30
+connectionPoolTimeout = 30
+
+# Number of resized and disabled images that dabo.ui.strToBmp() keeps in memory, and
+# a directory where it also saves them, so that later runs can load them instead of
+# resizing the original images again (None: don't save them).
+bitmapCacheSize = 500
+bitmapCacheDir = None
+
 ### Settings - end
 
 
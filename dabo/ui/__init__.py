@@ -4,6 +4,7 @@ This is Dabo's user interface layer.
 
 import datetime
 import glob
+import hashlib
 import importlib
 import inspect
 import io
@@ -26,6 +27,7 @@ from ..base_object import dObject
 from ..exceptions import dException
 from ..localization import _
 from ..lib import utils
+from ..lib.lruCache import LRUCache
 from ..lib.xmltodict import xmltodict
 from ..lib.utils import ustr
 
@@ -2074,17 +2076,75 @@ def setPositionInSizer(obj, pos):
     sz.setPositionInSizer(obj, pos)
 
 
-def fontMetricFromFont(txt, font):
+# Text extents measured by measureMany(), keyed on (font face, size, bold, italic, text).
+_textExtentCache = LRUCache(20000)
+# The width and height of one character, for monospace fonts.
+_monospaceExtents = {}
+_measureDC = None
+
+
+def _getFontKey(font):
+    return (
+        font.GetFaceName(),
+        font.GetPointSize(),
+        font.GetWeight() == wx.FONTWEIGHT_BOLD,
+        font.GetStyle() == wx.FONTSTYLE_ITALIC,
+    )
+
+
+def _getMeasureDC():
+    global _measureDC
+    if _measureDC is None:
+        _measureDC = wx.MemoryDC(wx.Bitmap(1, 1))
+    return _measureDC
+
+
+def measureMany(texts, font):
+    """
+    Returns a list with the (width, height) of each of the passed strings as it
+    would be drawn in the passed font (a dFont or a wx.Font).
+
+    Measured extents are cached, so each string is only measured once for each
+    font. With a monospace font, the extent of a string of printable ASCII
+    characters is calculated from the average width of a character instead.
+    """
     if isinstance(font, ui.dFont):
         font = font._nativeFont
-    wind = wx.Frame(None)
-    dc = wx.ClientDC(wind)
-    dc.SetFont(font)
-    ret = dc.GetTextExtent(txt)
-    wind.Destroy()
+    fontKey = _getFontKey(font)
+    charExtent = None
+    dc = None
+    if font.IsFixedWidth():
+        charExtent = _monospaceExtents.get(fontKey)
+        if charExtent is None:
+            dc = _getMeasureDC()
+            dc.SetFont(font)
+            wd, ht = dc.GetTextExtent("M" * 100)
+            charExtent = _monospaceExtents[fontKey] = (wd / 100, ht)
+    ret = []
+    for txt in texts:
+        if charExtent is not None and txt.isascii() and txt.isprintable():
+            ret.append((round(len(txt) * charExtent[0]), charExtent[1]))
+            continue
+        key = (fontKey, txt)
+        extent = _textExtentCache.get(key)
+        if extent is None:
+            if dc is None:
+                dc = _getMeasureDC()
+                dc.SetFont(font)
+            if "\n" in txt:
+                extent = dc.GetMultiLineTextExtent(txt)
+            else:
+                extent = dc.GetTextExtent(txt)
+            extent = _textExtentCache[key] = (extent[0], extent[1])
+        ret.append(extent)
     return ret
 
 
+def fontMetricFromFont(txt, font):
+    """Returns the width and height of the text when drawn in the passed font."""
+    return measureMany([txt], font)[0]
+
+
 def fontMetricFromDrawObject(obj):
     """Given a drawn text object, returns the width and height of the text."""
     return fontMetric(
@@ -2109,44 +2169,28 @@ def fontMetric(txt=None, wind=None, face=None, size=None, bold=None, italic=None
     Calculate the width and height of the given text using the supplied
     font information. If any font parameters are missing, they are taken
     from the specified window, or, if no window is specified, the currently
-    active form. If no form is active, the app's MainForm is used.
+    active form. If no form is active, the default GUI font is used.
     """
     if wind is None:
         wind = settings.get_application().ActiveForm
-    needToRelease = False
-    if wind is None:
-        # Need to create one
-        wind = wx.Frame(None)
-        needToRelease = True
     if txt is None:
         try:
             txt = wind.Caption
         except AttributeError:
             raise ValueError("No text supplied to fontMetric call")
-    fnt = wind.GetFont()
+    if wind is None:
+        fnt = wx.SystemSettings.GetFont(wx.SYS_DEFAULT_GUI_FONT)
+    else:
+        fnt = wind.GetFont()
     if face is not None:
         fnt.SetFaceName(face)
     if size is not None:
         fnt.SetPointSize(size)
     if bold is not None:
-        fnt.SetWeight(wx.FONTWEIGHT_BOLD)
+        fnt.SetWeight(wx.FONTWEIGHT_BOLD if bold else wx.FONTWEIGHT_NORMAL)
     if italic is not None:
-        fnt.SetStyle(wx.FONTSTYLE_ITALIC)
-
-    if not isinstance(wind, (ui.dForm, wx.Frame)):
-        try:
-            wind = wind.Form
-        except AttributeError:
-            try:
-                wind = wind.Parent
-            except AttributeError:
-                pass
-    dc = wx.ClientDC(wind)
-    dc.SetFont(fnt)
-    ret = dc.GetTextExtent(txt)
-    if needToRelease:
-        wind.Destroy()
-    return ret
+        fnt.SetStyle(wx.FONTSTYLE_ITALIC if italic else wx.FONTSTYLE_NORMAL)
+    return measureMany([txt], fnt)[0]
 
 
 def saveScreenShot(obj=None, imgType=None, pth=None, delaySeconds=None):
@@ -2220,84 +2264,148 @@ def imageFromData(data):
 # For applications that use the same image more than once,
 # this speeds up resolution of the requested image name.
 _bmpCache = {}
+# Resized and disabled images, keyed on (name, scale, width, height, disabled)
+_sizedBmpCache = LRUCache(settings.bitmapCacheSize)
 
 
-def strToBmp(val, scale=None, width=None, height=None):
+def strToBmp(val, scale=None, width=None, height=None, disabled=False):
     """
     This can be either a path, or the name of a built-in graphic. If an adjusted size is desired,
     you can either pass a 'scale' value (where 1.00 is full size, 0.5 scales it to 50% in both
     Height and Width), or you can pass specific 'height' and 'width' values. The final image will be
-    a bitmap resized to those specs.
+    a bitmap resized to those specs. Pass disabled=True to get the grayed-out version of the image
+    that is shown for disabled controls.
+
+    Resized and disabled bitmaps are cached as well as the original ones. If settings.bitmapCacheDir
+    is set, they are also saved there, so that later runs don't need to resize them again.
     """
-    ret = None
-    cwd = os.getcwd()
-    app = settings.get_application()
-    if app:
-        cwd = app.HomeDirectory
+    if scale is None and width is None and height is None and not disabled:
+        # No resize specs
+        return _getBmp(val)
+    key = (val, scale, width, height, disabled)
+    ret = _sizedBmpCache.get(key)
+    if ret is None:
+        ret = _sizedBmpCache[key] = _makeSizedBmp(val, scale, width, height, disabled)
+    return ret
+
 
+def preloadBitmaps(names, sizes=None, disabled=False):
+    """
+    Loads the passed images into the bitmap cache ahead of time, e.g. the icons for a
+    toolbar or a tree before it is built. 'sizes' is a list of (width, height) tuples
+    to prepare each image in; by default, each image is loaded at its own size. Pass
+    disabled=True to prepare the disabled versions of the images as well.
+    """
+    for name in names:
+        for wd, ht in sizes or [(None, None)]:
+            strToBmp(name, width=wd, height=ht)
+            if disabled:
+                strToBmp(name, width=wd, height=ht, disabled=True)
+
+
+def _getImagePaths(val):
+    """Returns the paths where strToBmp() looks for the passed image name."""
+    module_path = settings.root_path
+    icon_path = module_path / "icons"
+    resource_path = module_path / "resources"
+    # Create a list of the places to search for the image, with
+    # the most likely choices first.
+    paths = [(module_path / val), (icon_path / val), (resource_path / val)]
+    # See if it's running as a Mac application
+    macAppIndicator = "/Contents/Resources"
+    if macAppIndicator in str(module_path):
+        # Running as a py2app application
+        resPth = Path(f"{str(module_path).split(macAppIndicator)[0]}{macAppIndicator}")
+        macPaths = [(resPth / "icons" / val), (resPth / "resources" / val)]
+        paths += macPaths
+    return paths
+
+
+def _getBmp(val):
+    """Returns the bitmap for the passed path or image name, at its original size."""
     try:
-        ret = _bmpCache[val]
+        return _bmpCache[val]
     except KeyError:
-        if Path(val).exists():
-            ret = pathToBmp(val)
-        else:
-            # Include all the pathing possibilities
-            module_path = settings.root_path
-            icon_path = module_path / "icons"
-            resource_path = module_path / "resources"
-            # Create a list of the places to search for the image, with
-            # the most likely choices first.
-            paths = [(module_path / val), (icon_path / val), (resource_path / val)]
-            # See if it's running as a Mac application
-            macAppIndicator = "/Contents/Resources"
-            if macAppIndicator in str(module_path):
-                # Running as a py2app application
-                resPth = Path(f"{dpth.split(macAppIndicator)[0]}{macAppIndicator}")
-                macPaths = [(resPth / "icons" / val), (resPth / "resources" / val)]
-                paths += macPaths
-
-            # See if it's a standard icon
-            for pth in paths:
-                ret = icons.getIconBitmap(pth, noEmptyBmp=True)
-                if ret:
-                    break
-            if not ret and len(val) > 0:
-                # See if it's a built-in graphic
-                ret = getCommonBitmap(val)
+        pass
+    if Path(val).exists():
+        ret = pathToBmp(val)
+    else:
+        ret = None
+        # See if it's a standard icon
+        for pth in _getImagePaths(val):
+            ret = icons.getIconBitmap(pth, noEmptyBmp=True)
+            if ret:
+                break
+        if not ret and len(val) > 0:
+            # See if it's a built-in graphic
+            ret = getCommonBitmap(val)
     if not ret:
         # Return an empty bitmap
-        ret = wx.Bitmap(1, 1)
-    else:
-        _bmpCache[val] = ret
+        return wx.Bitmap(1, 1)
+    _bmpCache[val] = ret
+    return ret
 
-    if ret is not None:
-        if scale is None and width is None and height is None:
-            # No resize specs
-            pass
+
+def _getBmpCachePath(val, scale, width, height, disabled):
+    """
+    Returns the path of the file in settings.bitmapCacheDir for the passed image specs,
+    or None if the image doesn't come from a file. The name of the cache file changes
+    whenever the original file does.
+    """
+    if Path(val).exists():
+        fileName = val
+    else:
+        fileName = None
+        for pth in _getImagePaths(val):
+            fileName = icons.getIconFileName(pth)
+            if fileName:
+                break
+        if not fileName:
+            return None
+    stat = os.stat(fileName)
+    specs = (os.path.abspath(fileName), stat.st_mtime, stat.st_size, scale, width, height, disabled)
+    digest = hashlib.sha1(repr(specs).encode("utf-8")).hexdigest()
+    return Path(settings.bitmapCacheDir) / f"{digest}.png"
+
+
+def _makeSizedBmp(val, scale, width, height, disabled):
+    """Creates the bitmap returned by strToBmp() for resized or disabled images."""
+    cachePath = None
+    if settings.bitmapCacheDir:
+        cachePath = _getBmpCachePath(val, scale, width, height, disabled)
+        if cachePath is not None and cachePath.exists():
+            return pathToBmp(cachePath)
+    img = _getBmp(val).ConvertToImage()
+    if scale is not None or width is not None or height is not None:
+        oldWd = float(img.GetWidth())
+        oldHt = float(img.GetHeight())
+        if scale is not None:
+            # The bitmap should be scaled.
+            newWd = oldWd * scale
+            newHt = oldHt * scale
         else:
-            img = ret.ConvertToImage()
-            oldWd = float(img.GetWidth())
-            oldHt = float(img.GetHeight())
-            if scale is not None:
-                # The bitmap should be scaled.
-                newWd = oldWd * scale
-                newHt = oldHt * scale
-            else:
-                if width is not None and height is not None:
-                    # They passed both
-                    newWd = width
-                    newHt = height
-                elif width is not None:
-                    newWd = width
-                    # Scale the height
-                    newHt = oldHt * (newWd / oldWd)
-                elif height is not None:
-                    newHt = height
-                    # Scale the width
-                    newWd = oldWd * (newHt / oldHt)
-            img.Rescale(int(round(newWd)), int(round(newHt)))
-            ret = img.ConvertToBitmap()
-    return ret
+            if width is not None and height is not None:
+                # They passed both
+                newWd = width
+                newHt = height
+            elif width is not None:
+                newWd = width
+                # Scale the height
+                newHt = oldHt * (newWd / oldWd)
+            elif height is not None:
+                newHt = height
+                # Scale the width
+                newWd = oldWd * (newHt / oldHt)
+        img.Rescale(int(round(newWd)), int(round(newHt)))
+    if disabled:
+        img = img.ConvertToDisabled()
+    if cachePath is not None:
+        try:
+            cachePath.parent.mkdir(parents=True, exist_ok=True)
+            img.SaveFile(str(cachePath), wx.BITMAP_TYPE_PNG)
+        except OSError as e:
+            dabo_module.error(f"Could not save the bitmap cache file {cachePath}: {e}")
+    return img.ConvertToBitmap()
 
 
 def pathToBmp(pth):
@@ -1,8 +1,10 @@
 # -*- coding: utf-8 -*-
 import copy
 import datetime
+import heapq
 import locale
 import operator
+import random
 import re
 import sys
 import time
@@ -25,6 +27,7 @@ from .. import ui
 from ..base_object import dObject
 from ..debugging import loggit
 from ..lib import dates
+from ..lib.lruCache import LRUCache
 from ..lib.utils import caseInsensitiveSortKey
 from ..lib.utils import noneSortKey
 from ..lib.utils import ustr
@@ -56,16 +59,32 @@ decimalPoint = None
 
 
 class dGridDataTable(wx.grid.GridTableBase):
+    # The most cell values, and the most cell attribute objects, that each
+    # table keeps in its caches.
+    cacheSize = 5000
+
     def __init__(self, parent):
         super().__init__()
-        self._clearCache()
+        self.__cachedVals = LRUCache(self.cacheSize)
+        self.__cachedAttrs = LRUCache(self.cacheSize)
         self._inGetAttr = False
         self.grid = parent
         self._initTable()
 
     def _clearCache(self):
-        self.__cachedVals = {}
-        self.__cachedAttrs = {}
+        self.__cachedVals.clear()
+        self.__cachedAttrs.clear()
+
+    def _getDataVersion(self):
+        """
+        Returns a value that changes whenever the grid's data may have changed.
+        Grids bound to a DataSet instead of a bizobj can't tell when their data
+        changes, so their cached values still expire every ten seconds.
+        """
+        bizobj = self.grid.getBizobj()
+        if bizobj:
+            return bizobj.DataVersion
+        return (id(self.grid.DataSet), int(time.time() // 10))
 
     def _initTable(self):
         self.colDefs = []
@@ -76,13 +95,9 @@ class dGridDataTable(wx.grid.GridTableBase):
         col = self._convertWxColNumToDaboColNum(col)
         if col is None:
             # Empty grid so far, no biggie:
-            return self.grid._defaultGridColAttr.Clone()
-
-        cv = self.__cachedAttrs.get((row, col))
-        if cv:
-            diff = time.time() - cv[1]
-            if diff < 10:  ## if it's been less than this # of seconds.
-                return cv[0].Clone()
+            attr = self.grid._defaultGridColAttr
+            attr.IncRef()
+            return attr
 
         dcol = self.grid.Columns[col]
 
@@ -98,31 +113,44 @@ class dGridDataTable(wx.grid.GridTableBase):
                 dcol._updateCellDynamicProps(row)
 
             if dcol._gridCellAttrs:
-                attr = dcol._gridCellAttrs.get(row, dcol._gridColAttr)
+                baseAttr = dcol._gridCellAttrs.get(row, dcol._gridColAttr)
             else:
-                attr = dcol._gridColAttr
-
-            # Always clone to avoid mutating the shared column attr.
-            # Calling SetRenderer/SetOverflow on the shared attr can trigger
-            # synchronous repaints on macOS Cocoa → DrawCell recursion.
-            attr = attr.Clone()
+                baseAttr = dcol._gridColAttr
 
+            ## Override with a custom renderer for this row/col if applicable.
+            r = None
             if not reentrant:
-                ## Override with a custom renderer for this row/col if applicable.
                 r = dcol.getRendererClassForRow(row)
+            rowColor = None
+            if self.alternateRowColoring:
+                rowColor = row % 2
+
+            # All the cells that end up looking the same share one attr, which
+            # is cloned from the column (or cell) attr the first time it's
+            # needed and never changed afterwards: calling SetRenderer/SetOverflow
+            # on an attr that is in use can trigger synchronous repaints on
+            # macOS Cocoa → DrawCell recursion.
+            key = (col, id(baseAttr), dcol._attrVersion, r, dcol.Precision, rowColor)
+            cv = self.__cachedAttrs.get(key)
+            if cv is not None and cv[0] is baseAttr:
+                attr = cv[1]
+            else:
+                attr = baseAttr.Clone()
                 if r is not None:
                     rnd = r()
                     attr.SetRenderer(rnd)
                     if r in (dcol.floatRendererClass, dcol.decimalRendererClass):
                         rnd.SetPrecision(dcol.Precision)
-
-            # Now check for alternate row coloration
-            if self.alternateRowColoring:
-                attr.SetBackgroundColour((self.rowColorEven, self.rowColorOdd)[row % 2])
-
-            # Prevents overwriting when a long cell has None in the one next to it.
-            attr.SetOverflow(False)
-
+                # Now check for alternate row coloration
+                if rowColor is not None:
+                    attr.SetBackgroundColour((self.rowColorEven, self.rowColorOdd)[rowColor])
+                # Prevents overwriting when a long cell has None in the one next to it.
+                attr.SetOverflow(False)
+                # Keep a reference to the base attr, so that its id can't be reused.
+                self.__cachedAttrs[key] = (baseAttr, attr)
+
+            # The grid releases the attr when it is done with it.
+            attr.IncRef()
             return attr
         finally:
             if not reentrant:
@@ -335,11 +363,11 @@ class dGridDataTable(wx.grid.GridTableBase):
         _fromGridEditor=False,
     ):
         col = self._convertWxColNumToDaboColNum(col)
-        if useCache and not _fromGridEditor:
-            cv = self.__cachedVals.get((row, col))
-            if cv:
-                diff = time.time() - cv[1]
-                if diff < 10:  ## if it's been less than this # of seconds.
+        if not _fromGridEditor:
+            version = self._getDataVersion()
+            if useCache:
+                cv = self.__cachedVals.get((row, col))
+                if cv is not None and cv[1] == version:
                     return cv[0]
 
         if col is None:
@@ -369,7 +397,7 @@ class dGridDataTable(wx.grid.GridTableBase):
         if ret is None and convertNoneToString:
             ret = self.grid.NoneDisplay
         if not _fromGridEditor:
-            self.__cachedVals[(row, col)] = (ret, time.time())
+            self.__cachedVals[(row, col)] = (ret, version)
         return ret
 
     def getStringValue(self, val):
@@ -385,7 +413,8 @@ class dGridDataTable(wx.grid.GridTableBase):
         self.grid._setCellValue(row, col, value)
         if not _fromGridEditor:
             # Update the cache
-            self.__cachedVals[(row, col)] = (value, time.time())
+            self.__cachedVals[(row, col)] = (value, self._getDataVersion())
+        self.grid._autoSizeCellChanged(row, col)
         self.grid.afterCellEdit(row, col)
 
     def _convertWxColNumToDaboColNum(self, wxCol):
@@ -498,6 +527,15 @@ class dColumn(wx._core.Object, dPemMixin):
         att.SetFont(self._getDefaultFont()._nativeFont)
 
         self._gridCellAttrs = {}
+        # The Cell props set for each row, and the attrs shared by the rows
+        # whose Cell props are the same.
+        self._gridCellProps = {}
+        self._sharedCellAttrs = LRUCache(1000)
+        # Incremented whenever _gridColAttr changes, so that the grid table knows to
+        # rebuild any attrs that it made from it.
+        self._attrVersion = 0
+        # The width that the grid's autoSizeCol() last gave the column.
+        self._autoSizeWidth = None
 
         wx._core.Object.__init__(self)
         dPemMixin.__init__(
@@ -693,6 +731,7 @@ class dColumn(wx._core.Object, dPemMixin):
         #            if edClass is self.floatEditorClass:
         #                editor.SetPrecision(self.Precision)
         self._gridColAttr = attr
+        self._attrChanged()
 
     def getListEditorChoicesForRow(self, row):
         """Return the list of choices for the list editor for the given row."""
@@ -741,8 +780,14 @@ class dColumn(wx._core.Object, dPemMixin):
             # best overall results, but risks relying on wx implementation details.
             self.Parent.SetColLabelValue(self.ColumnIndex, "")
 
+    def _attrChanged(self):
+        """The column attr has changed: discard the attrs that were made from it."""
+        self._attrVersion += 1
+        self._sharedCellAttrs.clear()
+
     def _refreshGrid(self):
         """Refresh the grid region, not the header region."""
+        self._attrChanged()
         if self.Parent:
             gw = self.Parent.GetGridWindow()
             gw.Refresh()
@@ -801,6 +846,7 @@ class dColumn(wx._core.Object, dPemMixin):
                 kwargs["precision"] = self.Precision
             editor = editorClass(**kwargs)
         self._gridColAttr.SetEditor(editor)
+        self._attrChanged()
 
     def _updateRenderer(self):
         """The Field, DataType, or CustomRenderer has changed: set in the attr"""
@@ -811,6 +857,7 @@ class dColumn(wx._core.Object, dPemMixin):
         else:
             renderer = rendClass()
         self._gridColAttr.SetRenderer(renderer)
+        self._attrChanged()
 
     def _onFontPropsChanged(self, evt):
         # Sent by the dFont object when any props changed. Wx needs to be notified:
@@ -829,15 +876,26 @@ class dColumn(wx._core.Object, dPemMixin):
         except RuntimeError:
             # @ui.deadCheck didn't seem to work...
             return
-        cellAttr = obj = self._gridCellAttrs.get(row, self._gridColAttr.Clone())
-        if "." in wxPropName:
-            # For instance, Font.SetWeight
-            wxPropName, subObject = wxPropName.split(".")
-            obj = getattr(cellAttr, wxPropName)
-            getattr(obj, subObject)(*args, **kwargs)
-            setattr(cellAttr, wxPropName, obj)
-        else:
-            getattr(cellAttr, wxPropName)(*args, **kwargs)
+        # Dynamic Cell props are set again each time the grid asks for a cell's attr,
+        # so rather than changing an attr that may be in use, the rows whose Cell props
+        # are the same share one attr, made the first time it's needed.
+        props = dict(self._gridCellProps.get(row, {}))
+        props[wxPropName] = (args, kwargs)
+        key = repr(sorted(props.items()))
+        cellAttr = self._sharedCellAttrs.get(key)
+        if cellAttr is None:
+            cellAttr = self._gridColAttr.Clone()
+            for propName, (propArgs, propKwargs) in props.items():
+                if "." in propName:
+                    # For instance, Font.SetWeight
+                    propName, subObject = propName.split(".")
+                    obj = getattr(cellAttr, propName)
+                    getattr(obj, subObject)(*propArgs, **propKwargs)
+                    setattr(cellAttr, propName, obj)
+                else:
+                    getattr(cellAttr, propName)(*propArgs, **propKwargs)
+            self._sharedCellAttrs[key] = cellAttr
+        self._gridCellProps[row] = props
         self._gridCellAttrs[row] = cellAttr
 
     def _setAutoHorizontalAlignment(self):
@@ -1114,6 +1172,7 @@ class dColumn(wx._core.Object, dPemMixin):
     def Editable(self, val):
         if self._constructed():
             self._gridColAttr.SetReadOnly(not val)
+            self._attrChanged()
             if self.Parent:
                 self.Parent.refresh()
         else:
@@ -1241,6 +1300,7 @@ class dColumn(wx._core.Object, dPemMixin):
             # Getting the color failed on Mac and win: "no default attr"
             default = color_tools.colorTupleFromName("black")
             self._gridColAttr.SetTextColour(default)
+            self._attrChanged()
             return default
 
     @ForeColor.setter
@@ -1799,6 +1859,9 @@ class dGrid(dControlMixin, wx.grid.Grid):
     """
 
     USE_DATASOURCE_BEING_SET_HACK = False
+    # Room left on either side of the widest text when auto-sizing a column from a
+    # sample of its rows; this matches what wx's AutoSizeColumn() leaves.
+    autoSizeMargin = 10
 
     def __init__(self, parent, properties=None, attProperties=None, *args, **kwargs):
         # Update global decimalPoint attribute.
@@ -1846,6 +1909,8 @@ class dGrid(dControlMixin, wx.grid.Grid):
 
         # Flag to indicate we are auto-sizing all columns
         self._inAutoSizeLoop = False
+        # Grids with more rows than this auto-size their columns from a sample
+        self._autoSizeSampleSize = 200
         # Flag to indicate we are in a range selection event
         self._inRangeSelect = False
         # Flag to indicate we are in a selection update event
@@ -2615,15 +2680,6 @@ class dGrid(dControlMixin, wx.grid.Grid):
             idx = self._convertDaboColNumToWxColNum(idx)
             autoWidth = self.GetColSize(idx)
 
-            # Get the max width needed for the column's text
-            ds = self.DataSet
-            fld = colObj.DataField
-            face = colObj.FontFace if colObj.Font else self.FontFace
-            if idx == 0:
-                col_text = (f"{rec.get(fld)}" for rec in ds)
-                col_text_widths = (ui.fontMetric(txt)[0] for txt in col_text)
-                auto_text_width = max(col_text_widths)
-
             # Account for the width of the header caption:
             cw = ui.fontMetricFromFont(colObj.Caption, colObj.HeaderFont._nativeFont)[0] + int(
                 capBuffer
@@ -2631,13 +2687,18 @@ class dGrid(dControlMixin, wx.grid.Grid):
             w = max(autoWidth, cw)
             w = min(w, settings.max_column_width)
             colObj.Width = w
+            colObj._autoSizeWidth = w
             if persist:
                 colObj._persist("Width")
 
-        try:
-            self.AutoSizeColumn(self._convertDaboColNumToWxColNum(colNum), setAsMin=False)
-        except (TypeError, wx.wxAssertionError):
-            pass
+        sampleSize = self.AutoSizeSampleSize
+        if sampleSize and colNum > -1 and self.RowCount > sampleSize:
+            self._autoSizeColFromSample(colNum, sampleSize)
+        else:
+            try:
+                self.AutoSizeColumn(self._convertDaboColNumToWxColNum(colNum), setAsMin=False)
+            except (TypeError, wx.wxAssertionError):
+                pass
         if colNum > -1:
             _setColSize(colNum)
 
@@ -2646,6 +2707,72 @@ class dGrid(dControlMixin, wx.grid.Grid):
             self.unlockDisplay()
             self._updateColumnWidths()
 
+    def _autoSizeColFromSample(self, colNum, sampleSize):
+        """
+        Set the wx column width to fit the widest of a sample of the column's values:
+        the first and last rows, some random rows, and the rows with the longest
+        values. Only the sampled values are measured.
+        """
+        colObj = self.Columns[colNum]
+        wxColNum = self._convertDaboColNumToWxColNum(colNum)
+        if wxColNum is None:
+            return
+        texts = self._getColumnStrings(colObj)
+        rowCount = len(texts)
+        if rowCount > sampleSize:
+            quarter = max(sampleSize // 4, 1)
+            rows = set(range(quarter))
+            rows.update(range(rowCount - quarter, rowCount))
+            rows.update(random.sample(range(rowCount), quarter))
+            rows.update(
+                heapq.nlargest(
+                    sampleSize - len(rows), range(rowCount), key=lambda row: len(texts[row])
+                )
+            )
+            texts = [texts[row] for row in rows]
+        width = 0
+        if texts:
+            width = self._getTextWidth(texts, colObj.Font._nativeFont) + self.autoSizeMargin
+        self.SetColSize(wxColNum, width)
+
+    def _getColumnStrings(self, colObj):
+        """Returns a list with the text displayed in each row of the passed column."""
+        fld = colObj.DataField
+        if not fld:
+            return []
+        bizobj = self.getBizobj()
+        if bizobj:
+            try:
+                vals = bizobj.getColumns((fld,))[fld]
+            except (exceptions.FieldNotFoundException, KeyError):
+                return []
+        else:
+            vals = [rec.get(fld) for rec in self.DataSet or []]
+        noneDisplay = self.NoneDisplay
+        getStringValue = self._Table.getStringValue
+        return [noneDisplay if val is None else ustr(getStringValue(val)) for val in vals]
+
+    def _getTextWidth(self, texts, font):
+        """Returns the width of the widest of the passed strings in the passed font."""
+        return max(extent[0] for extent in ui.measureMany(texts, font))
+
+    def _autoSizeCellChanged(self, row, col):
+        """
+        Called when the value in a cell changes. If the column was last sized by
+        autoSizeCol() and the new value doesn't fit, widen the column to fit it.
+        """
+        if col is None:
+            return
+        colObj = self.Columns[col]
+        if colObj._autoSizeWidth is None or colObj._autoSizeWidth != colObj.Width:
+            # Not auto-sized, or resized since.
+            return
+        txt = self._Table.GetValue(row, self._convertDaboColNumToWxColNum(col), useCache=False)
+        width = self._getTextWidth([ustr(txt)], colObj.Font._nativeFont) + self.autoSizeMargin
+        width = min(width, settings.max_column_width)
+        if width > colObj.Width:
+            colObj.Width = colObj._autoSizeWidth = width
+
     def _paintHeader(self):
         """
         This method handles all of the display for the header, including writing
@@ -4509,6 +4636,20 @@ class dGrid(dControlMixin, wx.grid.Grid):
         else:
             self._properties["AutoAdjustHeaderHeight"] = val
 
+    @property
+    def AutoSizeSampleSize(self):
+        """
+        When the grid has more rows than this, autoSizeCol() sizes columns to fit a
+        sample of this many rows (the first and last rows, random rows and the rows
+        with the longest values) instead of measuring every row. Set to 0 to always
+        measure every row. Default=200  (int)
+        """
+        return self._autoSizeSampleSize
+
+    @AutoSizeSampleSize.setter
+    def AutoSizeSampleSize(self, val):
+        self._autoSizeSampleSize = val
+
     @property
     def CellHighlightWidth(self):
         """Specifies the width of the cell highlight box."""
@@ -156,7 +156,11 @@ class dToolBar(dControlMixin, wx.ToolBar):
             ht = self.MaxHeight
             needScale = True
         if needScale:
-            picBmp = self._resizeBmp(picBmp, wd, ht)
+            if isinstance(pic, str):
+                # Use the cached copy of the resized image
+                picBmp = ui.strToBmp(pic, width=wd, height=ht)
+            else:
+                picBmp = self._resizeBmp(picBmp, wd, ht)
 
         if toggle:
             kind = wx.ITEM_CHECK
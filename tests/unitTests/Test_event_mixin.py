@@ -0,0 +1,137 @@
+"""
+Unit Tests for event_mixin.py
+
+If this file is run standalone, it will automatically run all of the test cases found in the file.
+"""
+
+import unittest
+
+from dabo import events
+from dabo import settings
+from dabo.event_mixin import EventMixin
+
+
+class ParentEvent(events.dEvent):
+    pass
+
+
+class ChildEvent(ParentEvent):
+    pass
+
+
+class OtherEvent(events.dEvent):
+    pass
+
+
+class TestEventDispatch(unittest.TestCase):
+    def setUp(self):
+        self.obj = EventMixin()
+        self.calls = []
+        self._reverseEventsOrder = settings.reverseEventsOrder
+        settings.reverseEventsOrder = False
+
+    def tearDown(self):
+        settings.reverseEventsOrder = self._reverseEventsOrder
+
+    def handler(self, name):
+        def onEvent(evt):
+            self.calls.append((name, evt.__class__))
+
+        return onEvent
+
+    def testNoListeners(self):
+        """Raising an event that nothing is bound to does nothing"""
+        self.assertIsNone(self.obj.raiseEvent(ParentEvent))
+        self.assertEqual(self.calls, [])
+
+    def testSubclassDelivery(self):
+        """Handlers bound to an event class also get its subclasses, but not its base classes"""
+        onParent = self.handler("parent")
+        onChild = self.handler("child")
+        self.obj.bindEvent(ParentEvent, onParent)
+        self.obj.bindEvent(ChildEvent, onChild)
+        self.obj.raiseEvent(ChildEvent)
+        self.assertEqual(self.calls, [("parent", ChildEvent), ("child", ChildEvent)])
+        self.calls = []
+        self.obj.raiseEvent(ParentEvent)
+        self.assertEqual(self.calls, [("parent", ParentEvent)])
+        self.calls = []
+        self.obj.raiseEvent(OtherEvent)
+        self.assertEqual(self.calls, [])
+
+    def testBindingTwice(self):
+        """Binding the same function to the same event again is ignored"""
+        onParent = self.handler("parent")
+        self.obj.bindEvent(ParentEvent, onParent)
+        self.obj.bindEvent(ParentEvent, onParent)
+        self.obj.raiseEvent(ParentEvent)
+        self.assertEqual(len(self.calls), 1)
+
+    def testRebindAndUnbind(self):
+        """Changing the bindings after an event was raised updates the cached handlers"""
+        onParent = self.handler("parent")
+        onChild = self.handler("child")
+        self.obj.bindEvent(ParentEvent, onParent)
+        self.obj.raiseEvent(ChildEvent)
+        self.obj.bindEvent(ChildEvent, onChild)
+        self.obj.raiseEvent(ChildEvent)
+        self.assertEqual(
+            self.calls, [("parent", ChildEvent), ("parent", ChildEvent), ("child", ChildEvent)]
+        )
+        self.calls = []
+        self.obj.unbindEvent(ParentEvent, onParent)
+        self.obj.raiseEvent(ChildEvent)
+        self.assertEqual(self.calls, [("child", ChildEvent)])
+        self.calls = []
+        self.obj.unbindEvent()
+        self.obj.raiseEvent(ChildEvent)
+        self.assertEqual(self.calls, [])
+        # Binding again after unbinding everything
+        self.obj.bindEvent(ParentEvent, onParent)
+        self.obj.raiseEvent(ChildEvent)
+        self.assertEqual(self.calls, [("parent", ChildEvent)])
+
+    def testReverseEventsOrder(self):
+        """With settings.reverseEventsOrder, the last handler bound is called first"""
+        self.obj.bindEvent(ParentEvent, self.handler("first"))
+        self.obj.bindEvent(ParentEvent, self.handler("second"))
+        self.obj.raiseEvent(ParentEvent)
+        settings.reverseEventsOrder = True
+        self.obj.raiseEvent(ParentEvent)
+        self.assertEqual([name for name, cls in self.calls], ["first", "second", "second", "first"])
+
+    def testStop(self):
+        """A handler that stops the event keeps the rest from being called"""
+
+        def onStop(evt):
+            self.calls.append(("stop", evt.__class__))
+            evt.stop()
+
+        self.obj.bindEvent(ParentEvent, onStop)
+        self.obj.bindEvent(ParentEvent, self.handler("after"))
+        self.obj.raiseEvent(ParentEvent)
+        self.assertEqual(self.calls, [("stop", ParentEvent)])
+
+    def testRecursionGuard(self):
+        """An event raised again by its own handler isn't handled again"""
+
+        def onParent(evt):
+            self.calls.append(("parent", evt.__class__))
+            self.obj.raiseEvent(ParentEvent)
+            # Other event classes are still handled.
+            self.obj.raiseEvent(ChildEvent)
+
+        self.obj.bindEvent(ParentEvent, onParent)
+        self.obj.bindEvent(ChildEvent, self.handler("child"))
+        self.obj.raiseEvent(ParentEvent)
+        self.assertEqual(
+            self.calls, [("parent", ParentEvent), ("parent", ChildEvent), ("child", ChildEvent)]
+        )
+        # Once the event has been handled, it can be raised again.
+        self.calls = []
+        self.obj.raiseEvent(ChildEvent)
+        self.assertEqual(self.calls[-1], ("child", ChildEvent))
+
+
+if __name__ == "__main__":
+    unittest.main()